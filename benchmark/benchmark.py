@@ -190,6 +190,16 @@ def bench_spydlog_async():
             pass
 
 
+def bench_spydlog_null_st():
+    """spydlog single-threaded null sink (binding call overhead)."""
+    logger = spd.logger("bench_null_st", spd.null_sink_st())
+
+    for i in range(NUM_MESSAGES):
+        logger.info(f"Benchmark message number {i}")
+
+    spd.drop("bench_null_st")
+
+
 def bench_spydlog_disabled():
     """spydlog with logging disabled."""
     logger = spd.stdout_logger_mt("bench_disabled")
@@ -242,6 +252,9 @@ def run_benchmarks():
         _, spd_async = benchmark(bench_spydlog_async, "Async File")
         results.append(("spydlog", "Async File", spd_async))
 
+        _, spd_null_st = benchmark(bench_spydlog_null_st, "Null (ST)")
+        results.append(("spydlog", "Null (ST)", spd_null_st))
+
         _, spd_disabled = benchmark(bench_spydlog_disabled, "Disabled")
         results.append(("spydlog", "Disabled", spd_disabled))
 
@@ -280,6 +293,7 @@ def run_benchmarks():
     print("- MT = Multi-threaded (thread-safe)")
     print("- ST = Single-threaded (faster, but not thread-safe)")
     print("- Async = Asynchronous logging (background thread)")
+    print("- Null = Messages sent to a null sink (binding overhead measurement)")
     print("- Disabled = Logging disabled (overhead measurement)")
     print(f"- All tests logged {NUM_MESSAGES:,} messages")
     print("="*70 + "\n")
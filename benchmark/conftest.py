@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+import spydlog
+
+STORAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".benchmarks")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """Store the runs in benchmark/.benchmarks wherever pytest is started from, and save every
+    run, so --benchmark-compare compares against the previous one without any option"""
+    if not config.pluginmanager.hasplugin("benchmark"):
+        return
+
+    from pytest_benchmark.utils import get_tag
+
+    if config.getoption("benchmark_storage") == "file://./.benchmarks":
+        config.option.benchmark_storage = f"file://{STORAGE}"
+
+    if not config.getoption("benchmark_save") and not config.getoption("benchmark_disable"):
+        config.option.benchmark_autosave = get_tag()
+
+
+@pytest.fixture(autouse=True)
+def cleanup_loggers():
+    """Drop the loggers created by each benchmark"""
+    yield
+    spydlog.drop_all()
+
+
+@pytest.fixture
+def silence_stdio():
+    """Redirect the stdout and stderr file descriptors to the null device, for the console sinks"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    saved = [os.dup(1), os.dup(2)]
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    os.close(devnull)
+
+    yield
+
+    os.dup2(saved[0], 1)
+    os.dup2(saved[1], 2)
+    os.close(saved[0])
+    os.close(saved[1])
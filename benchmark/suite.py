@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+
+"""
+spydlog benchmark suite.
+
+Measures the per-call latency (p50/p99/p99.9) and the throughput of the bindings:
+- latency of each logger kind from a single thread
+- throughput and latency of 1 to N producer threads sharing a logger
+- async queue saturation with each overflow policy
+- cost of each pattern flag
+
+Results are printed as tables and can be written as JSON (--output) to compare
+releases.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import spydlog as spd
+    SPYDLOG_AVAILABLE = True
+except ImportError:
+    SPYDLOG_AVAILABLE = False
+    print("Warning: spydlog not available. Install with: pip install spydlog")
+
+# Number of messages logged by each thread in each test
+NUM_MESSAGES = 100_000
+
+MESSAGE = "Benchmark message number {}"
+PATTERN = "%Y-%m-%d %H:%M:%S.%e [%n] [%l] %v"
+
+# Pattern flags measured by the pattern benchmark, see the spdlog documentation
+PATTERN_FLAGS = [
+    "%v", "%t", "%P", "%n", "%l", "%L", "%a", "%A", "%b", "%B", "%c", "%C", "%Y", "%D",
+    "%x", "%m", "%d", "%H", "%I", "%M", "%S", "%e", "%f", "%F", "%p", "%r", "%R", "%T",
+    "%X", "%z", "%E", "%i", "%u", "%o", "%O", "%s", "%g", "%#", "%!", "%@", "%^%$", "%%",
+]
+
+
+def percentiles(latencies: List[int]) -> Dict[str, float]:
+    """Return the p50/p99/p99.9/max latencies in nanoseconds of unsorted latencies."""
+    latencies = sorted(latencies)
+    last = len(latencies) - 1
+
+    def at(fraction: float) -> float:
+        return float(latencies[min(last, int(fraction * len(latencies)))])
+
+    return {
+        "p50_ns": at(0.50),
+        "p99_ns": at(0.99),
+        "p999_ns": at(0.999),
+        "max_ns": float(latencies[last]),
+    }
+
+
+def timer_overhead() -> float:
+    """Return the median cost in nanoseconds of a perf_counter_ns pair, included in the latencies."""
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(10_000):
+        start = clock()
+        samples.append(clock() - start)
+    return percentiles(samples)["p50_ns"]
+
+
+def log_timed(logger, count: int, latencies: List[int]) -> None:
+    """Log count messages, appending the latency of each call."""
+    clock = time.perf_counter_ns
+    append = latencies.append
+    info = logger.info
+    for i in range(count):
+        msg = MESSAGE.format(i)
+        start = clock()
+        info(msg)
+        append(clock() - start)
+
+
+def run_producers(logger, num_threads: int, count: int) -> Dict[str, float]:
+    """
+    Log count messages from each of num_threads threads sharing a logger.
+
+    Returns:
+        The throughput (messages/second, until the async queue is drained) and latency percentiles
+    """
+    barrier = threading.Barrier(num_threads + 1)
+    latencies: List[List[int]] = [[] for _ in range(num_threads)]
+
+    def worker(index: int):
+        barrier.wait()
+        log_timed(logger, count, latencies[index])
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(num_threads)]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    logger.flush()
+    while spd.thread_pool_stats()["queue_size"] > 0:
+        time.sleep(0.0001)
+    elapsed = time.perf_counter() - start
+
+    result = {"threads": num_threads, "messages": num_threads * count,
+              "throughput": num_threads * count / elapsed}
+    result.update(percentiles([latency for thread_latencies in latencies for latency in thread_latencies]))
+    return result
+
+
+# Loggers, created with a unique name and sinks writing to the null device so the formatting
+# and write costs are measured without depending on the disk
+def null_st_logger(name: str):
+    return spd.logger(name, spd.null_sink_st())
+
+
+def null_mt_logger(name: str):
+    return spd.logger(name, spd.dist_sink_mt([spd.null_sink_st()]))
+
+
+def file_st_logger(name: str):
+    logger = spd.logger(name, spd.basic_file_sink_st(os.devnull))
+    logger.set_pattern(PATTERN)
+    return logger
+
+
+def file_mt_logger(name: str):
+    logger = spd.logger(name, spd.basic_file_sink_mt(os.devnull))
+    logger.set_pattern(PATTERN)
+    return logger
+
+
+def async_file_logger(name: str, overflow_policy=None):
+    if overflow_policy is None:
+        logger = spd.async_logger(name, spd.basic_file_sink_mt(os.devnull))
+    else:
+        logger = spd.async_logger(name, spd.basic_file_sink_mt(os.devnull), overflow_policy=overflow_policy)
+    logger.set_pattern(PATTERN)
+    return logger
+
+
+def disabled_logger(name: str):
+    logger = spd.logger(name, spd.null_sink_st())
+    logger.set_level(spd.level.off)
+    return logger
+
+
+LOGGERS: Dict[str, Callable] = {
+    "disabled": disabled_logger,
+    "null_st": null_st_logger,
+    "null_mt": null_mt_logger,
+    "file_st": file_st_logger,
+    "file_mt": file_mt_logger,
+    "async_file": async_file_logger,
+}
+
+# Loggers that can be shared by several threads
+SHARED_LOGGERS = ("null_mt", "file_mt", "async_file")
+
+
+def print_table(title: str, columns: List[str], rows: List[Dict]) -> None:
+    """Print rows as a markdown table with the given columns."""
+    def cell(value) -> str:
+        if isinstance(value, float):
+            return f"{value:,.0f}" if value >= 100 else f"{value:.1f}"
+        return str(value)
+
+    cells = [[cell(row[column]) for column in columns] for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+
+    print(f"\n{title}")
+    print("| " + " | ".join(f"{column:{width}}" for column, width in zip(columns, widths)) + " |")
+    print("|" + "|".join("-" * (width + 2) for width in widths) + "|")
+    for row in cells:
+        print("| " + " | ".join(f"{value:>{width}}" for value, width in zip(row, widths)) + " |")
+
+
+def bench_latency(count: int) -> List[Dict]:
+    """Single-thread latency and throughput of each logger kind."""
+    results = []
+
+    for kind, factory in LOGGERS.items():
+        logger = factory(f"suite_latency_{kind}")
+        result = {"logger": kind}
+        result.update(run_producers(logger, 1, count))
+        results.append(result)
+        del logger
+
+    print_table("Latency (1 thread)", ["logger", "throughput", "p50_ns", "p99_ns", "p999_ns", "max_ns"], results)
+    return results
+
+
+def bench_scaling(count: int, max_threads: int) -> List[Dict]:
+    """Throughput and latency of 1 to max_threads threads sharing a logger."""
+    thread_counts = [1]
+    while thread_counts[-1] * 2 <= max_threads:
+        thread_counts.append(thread_counts[-1] * 2)
+    if thread_counts[-1] != max_threads:
+        thread_counts.append(max_threads)
+
+    results = []
+
+    for kind in SHARED_LOGGERS:
+        single = None
+        for num_threads in thread_counts:
+            logger = LOGGERS[kind](f"suite_scaling_{kind}_{num_threads}")
+            result = {"logger": kind}
+            result.update(run_producers(logger, num_threads, count))
+            if single is None:
+                single = result["throughput"]
+            result["speedup"] = result["throughput"] / single
+            results.append(result)
+            del logger
+
+    print_table("Scaling", ["logger", "threads", "throughput", "speedup", "p50_ns", "p99_ns", "p999_ns"], results)
+    return results
+
+
+def bench_overflow(count: int, num_threads: int) -> List[Dict]:
+    """Saturate the async queue from num_threads threads with each overflow policy."""
+    results = []
+
+    for policy in spd.async_overflow_policy:
+        logger = async_file_logger(f"suite_overflow_{policy.name}", policy)
+
+        overrun = spd.thread_pool_stats(reset=True)["overrun"]
+        result = {"policy": policy.name}
+        result.update(run_producers(logger, num_threads, count))
+
+        # Messages dropped while the queue was full (overrun_oldest)
+        stats = spd.thread_pool_stats()
+        result["dropped"] = stats["overrun"] - overrun
+        result["queue_high_water_mark"] = stats["queue_high_water_mark"]
+        results.append(result)
+        del logger
+
+    print_table(f"Async queue saturation ({num_threads} threads)",
+                ["policy", "throughput", "dropped", "p50_ns", "p99_ns", "p999_ns", "max_ns"], results)
+    return results
+
+
+def bench_patterns(count: int) -> List[Dict]:
+    """Cost of each pattern flag, on top of a "%v" pattern, with a file sink."""
+    logger = spd.logger("suite_patterns", spd.basic_file_sink_st(os.devnull))
+
+    def cost(pattern: str) -> Dict[str, float]:
+        logger.set_pattern(pattern)
+        latencies: List[int] = []
+        log_timed(logger, count, latencies)
+        return percentiles(latencies)
+
+    baseline = cost("%v")
+    results = []
+
+    for flag in PATTERN_FLAGS:
+        result = {"flag": flag}
+        result.update(cost(f"{flag} %v"))
+        result["cost_ns"] = result["p50_ns"] - baseline["p50_ns"]
+        results.append(result)
+
+    del logger
+
+    print_table('Pattern flags (p50 cost on top of "%v")', ["flag", "cost_ns", "p50_ns", "p99_ns"], results)
+    return results
+
+
+def metadata(args: argparse.Namespace) -> Dict:
+    """Describe the environment of the run."""
+    return {
+        "spydlog_version": spd.__version__,
+        "python_version": platform.python_version(),
+        "python_implementation": platform.python_implementation(),
+        "gil_enabled": sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "messages": args.messages,
+        "timer_overhead_ns": timer_overhead(),
+    }
+
+
+BENCHMARKS = ("latency", "scaling", "overflow", "patterns")
+
+
+def run_suite(args: argparse.Namespace) -> Dict:
+    """Run the selected benchmarks and return the results."""
+    results = {"metadata": metadata(args)}
+
+    print(f"\n{'='*70}")
+    print("spydlog Benchmark Suite")
+    print(f"{'='*70}")
+    for key, value in results["metadata"].items():
+        print(f"{key}: {value}")
+
+    if "latency" in args.only:
+        results["latency"] = bench_latency(args.messages)
+    if "scaling" in args.only:
+        results["scaling"] = bench_scaling(args.messages, args.max_threads)
+    if "overflow" in args.only:
+        results["overflow"] = bench_overflow(args.messages, args.max_threads)
+    if "patterns" in args.only:
+        results["patterns"] = bench_patterns(args.messages // 10)
+
+    print()
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", "-o", help="write the results as JSON to this file")
+    parser.add_argument("--messages", "-n", type=int, default=NUM_MESSAGES,
+                        help=f"messages logged by each thread (default: {NUM_MESSAGES})")
+    parser.add_argument("--max-threads", "-t", type=int, default=min(8, os.cpu_count() or 1),
+                        help="highest number of producer threads (default: CPU count, at most 8)")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help="benchmarks to run (default: all)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    if not SPYDLOG_AVAILABLE:
+        print("\nERROR: spydlog is not installed.")
+        print("Install it with: pip install spydlog")
+        print("Exiting...\n")
+        exit(1)
+
+    args = parse_args()
+    results = run_suite(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
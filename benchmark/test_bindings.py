@@ -0,0 +1,195 @@
+"""
+Regression benchmarks of the bindings, built on pytest-benchmark.
+
+Every sink class and logger factory is measured with a single-threaded (_st) and a
+multi-threaded (_mt) logger, and every _mt sink behind an async logger, with a short
+and a long message. Each benchmark logs a fixed number of messages so file sinks write
+a bounded amount of data.
+
+Every run is saved in benchmark/.benchmarks (see conftest.py). Run it before a change, then
+compare against that run after the change (a slower median fails):
+
+    python -m pytest benchmark
+    python -m pytest benchmark --benchmark-compare --benchmark-compare-fail=median:10%
+
+TestOverheadGuard needs no saved run: it fails on its own when a logging call gets slower than
+a fixed bound, measured in calls of a builtin function.
+"""
+
+import os
+import time
+import timeit
+
+import pytest
+import spydlog
+
+pytest.importorskip("pytest_benchmark")
+
+MESSAGES = {
+    "short": "Benchmark message number 42",
+    "long": "Benchmark message " + "x" * 1006,
+}
+
+ROUNDS = 50
+ITERATIONS = 1000
+
+# Upper bounds of a logger.info() call on null_sink_st with the "%v" pattern, in len() calls.
+# len() is a builtin called with one argument like logger.info(), so the ratios depend much
+# less on the machine than times. Before the fastcall entry points a disabled call took 4.3-4.5
+# len() calls and an enabled call 7.3-7.7; they now take 1.2-1.4 and 4.4-5.8.
+MAX_DISABLED_CALLS = 2.0
+MAX_ENABLED_CALLS = 6.5
+
+
+# Sink constructors by name, called with a directory for the file sinks and a variant suffix
+SINKS = {
+    "stdout_color_sink": lambda path, suffix: getattr(spydlog, f"stdout_color_sink_{suffix}")(),
+    "stderr_color_sink": lambda path, suffix: getattr(spydlog, f"stderr_color_sink_{suffix}")(),
+    "stdout_sink": lambda path, suffix: getattr(spydlog, f"stdout_sink_{suffix}")(),
+    "stderr_sink": lambda path, suffix: getattr(spydlog, f"stderr_sink_{suffix}")(),
+    "basic_file_sink": lambda path, suffix: getattr(spydlog, f"basic_file_sink_{suffix}")(
+        os.path.join(path, "basic.log"), truncate=True),
+    "rotating_file_sink": lambda path, suffix: getattr(spydlog, f"rotating_file_sink_{suffix}")(
+        os.path.join(path, "rotating.log"), 8 * 1024 * 1024, 2),
+    "daily_file_sink": lambda path, suffix: getattr(spydlog, f"daily_file_sink_{suffix}")(
+        os.path.join(path, "daily.log")),
+    "null_sink": lambda path, suffix: spydlog.null_sink_st(),
+    "dist_sink": lambda path, suffix: getattr(spydlog, f"dist_sink_{suffix}")([spydlog.null_sink_st()]),
+    "binary_file_sink": lambda path, suffix: getattr(spydlog, f"binary_file_sink_{suffix}")(
+        os.path.join(path, "binary.bin"), truncate=True),
+    "raw_file_sink": lambda path, suffix: getattr(spydlog, f"raw_file_sink_{suffix}")(
+        os.path.join(path, "raw.log"), truncate=True),
+}
+
+# Logger factories by name, called with a logger name, a directory and a variant suffix
+FACTORIES = {
+    "stdout_color": lambda name, path, suffix: getattr(spydlog, f"stdout_color_{suffix}")(name),
+    "stderr_color": lambda name, path, suffix: getattr(spydlog, f"stderr_color_{suffix}")(name),
+    "stdout_logger": lambda name, path, suffix: getattr(spydlog, f"stdout_logger_{suffix}")(name),
+    "stderr_logger": lambda name, path, suffix: getattr(spydlog, f"stderr_logger_{suffix}")(name),
+    "basic_logger": lambda name, path, suffix: getattr(spydlog, f"basic_logger_{suffix}")(
+        name, os.path.join(path, "basic.log"), truncate=True),
+    "rotating_logger": lambda name, path, suffix: getattr(spydlog, f"rotating_logger_{suffix}")(
+        name, os.path.join(path, "rotating.log"), 8 * 1024 * 1024, 2),
+    "daily_logger": lambda name, path, suffix: getattr(spydlog, f"daily_logger_{suffix}")(
+        name, os.path.join(path, "daily.log")),
+}
+
+
+def run(benchmark, logger, message):
+    """Log a fixed number of messages, the async queue being drained at the end of each round."""
+    def teardown(*args):
+        logger.flush()
+        while spydlog.thread_pool_stats()["queue_size"] > 0:
+            time.sleep(0.0001)
+
+    benchmark.pedantic(logger.info, args=(message,), rounds=ROUNDS, iterations=ITERATIONS,
+                       warmup_rounds=1, teardown=teardown)
+
+
+@pytest.mark.usefixtures("silence_stdio")
+@pytest.mark.parametrize("size", list(MESSAGES))
+class TestSinkBenchmarks:
+    """Sinks behind a logger"""
+
+    @pytest.mark.parametrize("kind", ["st", "mt"])
+    @pytest.mark.parametrize("sink", list(SINKS))
+    def test_sink(self, benchmark, tmp_path, sink, kind, size):
+        if sink == "null_sink" and kind == "mt":
+            pytest.skip("null_sink has no _mt variant")
+
+        logger = spydlog.logger(f"bench_{sink}_{kind}", SINKS[sink](str(tmp_path), kind))
+        run(benchmark, logger, MESSAGES[size])
+
+    @pytest.mark.parametrize("sink", [name for name in SINKS if name != "null_sink"])
+    def test_async_sink(self, benchmark, tmp_path, sink, size):
+        logger = spydlog.async_logger(f"bench_async_{sink}", SINKS[sink](str(tmp_path), "mt"))
+        run(benchmark, logger, MESSAGES[size])
+
+    @pytest.mark.parametrize("kind", ["st", "async"])
+    def test_shm_queue_sink(self, benchmark, kind, size):
+        name = f"spydlog_bench_{os.getpid()}_{kind}_{size}"
+        collector = spydlog.collector(name, [spydlog.null_sink_st()], slot_size=2048)
+        sink = spydlog.shm_queue_sink(name)
+
+        if kind == "async":
+            logger = spydlog.async_logger("bench_shm_queue_async", sink)
+        else:
+            logger = spydlog.logger("bench_shm_queue", sink)
+
+        run(benchmark, logger, MESSAGES[size])
+        collector.stop()
+
+
+@pytest.mark.usefixtures("silence_stdio")
+@pytest.mark.parametrize("size", list(MESSAGES))
+class TestFactoryBenchmarks:
+    """Loggers created by the factory functions"""
+
+    @pytest.mark.parametrize("kind", ["st", "mt"])
+    @pytest.mark.parametrize("factory", list(FACTORIES))
+    def test_factory(self, benchmark, tmp_path, factory, kind, size):
+        logger = FACTORIES[factory](f"bench_{factory}_{kind}", str(tmp_path), kind)
+        run(benchmark, logger, MESSAGES[size])
+
+
+@pytest.mark.parametrize("size", list(MESSAGES))
+class TestLoggerBenchmarks:
+    """Logging calls that do not depend on the sink"""
+
+    def test_disabled(self, benchmark, size):
+        logger = spydlog.logger("bench_disabled", spydlog.null_sink_st())
+        logger.set_level(spydlog.level.off)
+        run(benchmark, logger, MESSAGES[size])
+
+    def test_bytes_message(self, benchmark, size):
+        logger = spydlog.logger("bench_bytes", spydlog.null_sink_st())
+        run(benchmark, logger, MESSAGES[size].encode())
+
+    def test_chunked_message(self, benchmark, size):
+        logger = spydlog.logger("bench_chunked", spydlog.null_sink_st())
+        spydlog.set_message_chunk_size(256)
+        try:
+            run(benchmark, logger, MESSAGES[size])
+        finally:
+            spydlog.set_message_chunk_size(0)
+
+    def test_source_location(self, benchmark, size):
+        logger = spydlog.logger("bench_source_location", spydlog.null_sink_st())
+        spydlog.enable_source_location()
+        try:
+            run(benchmark, logger, MESSAGES[size])
+        finally:
+            spydlog.disable_source_location()
+
+
+class TestOverheadGuard:
+    """Per-call overhead of logger.info(), checked against fixed bounds"""
+
+    @staticmethod
+    def per_call(funcs, message, number=2000, repeat=300):
+        """Best time of a single call of each function. The functions are timed in turn, so a
+        slower period of the machine affects them alike, and the minimum is kept as the time
+        least disturbed by other processes"""
+        timers = [timeit.Timer("func(message)", globals={"func": func, "message": message}) for func in funcs]
+        best = [float("inf")] * len(funcs)
+
+        for _ in range(repeat):
+            for i, timer in enumerate(timers):
+                best[i] = min(best[i], timer.timeit(number) / number)
+
+        return best
+
+    def test_call_overhead(self):
+        enabled = spydlog.logger("bench_guard_enabled", spydlog.null_sink_st())
+        enabled.set_pattern("%v")
+        disabled = spydlog.logger("bench_guard_disabled", spydlog.null_sink_st())
+        disabled.set_level(spydlog.level.off)
+
+        funcs = [enabled.info, disabled.info, len]
+        enabled_call, disabled_call, len_call = self.per_call(funcs, MESSAGES["short"])
+        times = ", ".join(f"{name} {call * 1e9:.0f} ns" for name, call in
+                          zip(["enabled", "disabled", "len"], [enabled_call, disabled_call, len_call]))
+
+        assert disabled_call <= MAX_DISABLED_CALLS * len_call, times
+        assert enabled_call <= MAX_ENABLED_CALLS * len_call, times
@@ -8,3 +8,4 @@ except ImportError:
         __version__ = "0.0.0+unknown"
 
 from .spydlog import *
+from .config import configure
@@ -0,0 +1,512 @@
+"""
+Configure loggers, sinks and the async thread pool from a specification: a dict, or the
+path of a TOML or JSON file.
+
+    import spydlog
+
+    spydlog.configure({
+        "level": "info",
+        "pattern": "[%Y-%m-%d %H:%M:%S.%e] [%n] [%l] %v",
+        "sinks": {
+            "console": {"type": "stdout_color_sink_mt"},
+            "file": {"type": "rotating_file_sink_mt", "filename": "logs/app.log",
+                     "max_size": 10485760, "max_files": 3, "level": "debug"},
+        },
+        "loggers": {
+            "app": {"sinks": ["console", "file"], "level": "debug"},
+            "db": {"sinks": ["file"], "async": True, "flush_on": "warn"},
+        },
+    })
+
+The whole specification is validated and its sinks and loggers are built before anything
+is applied, so an invalid specification leaves the current configuration untouched.
+
+reload() applies the levels, patterns and flush levels of a specification to the loggers
+and sinks already configured, without recreating them. watch() reloads a file when it
+changes, reload_on_signal() when the process receives a signal (SIGHUP by default).
+"""
+
+import json
+import os
+import signal
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from . import spydlog as _spydlog
+from .spydlog import color_mode, level, pattern_time_type, async_overflow_policy
+
+Spec = Union[Dict[str, Any], str, "os.PathLike[str]"]
+
+# Level names accepted in a specification, with the spdlog long names (SPDLOG_LEVEL)
+LEVELS = {
+    "trace": level.trace,
+    "debug": level.debug,
+    "info": level.info,
+    "warn": level.warn,
+    "warning": level.warn,
+    "err": level.err,
+    "error": level.err,
+    "critical": level.critical,
+    "off": level.off,
+}
+
+GLOBAL_KEYS = {"level", "pattern", "time_type", "flush_on", "flush_every", "thread_pool", "sinks", "loggers"}
+SINK_KEYS = {"type", "level", "pattern"}
+LOGGER_KEYS = {"sinks", "level", "pattern", "time_type", "flush_on", "async", "overflow_policy"}
+THREAD_POOL_KEYS = {"queue_size", "thread_count", "cpu_affinity", "nice", "thread_name"}
+
+# Sinks built by the last configure, by name, for reload
+_sinks: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def load(spec: Spec) -> Dict[str, Any]:
+    """Returns the specification as a dict, read from a .toml or .json file if given a path"""
+    if isinstance(spec, dict):
+        return spec
+
+    path = os.fspath(spec)
+
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("reading TOML requires Python 3.11 or the tomli package") from None
+
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, "rb") as f:
+            data = json.load(f)
+
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: the specification must be a table or an object")
+
+    return data
+
+
+def _check_keys(where: str, spec: Dict[str, Any], allowed: set) -> None:
+    unknown = sorted(set(spec) - allowed)
+
+    if unknown:
+        raise ValueError(f"{where}: unknown keys {', '.join(unknown)}")
+
+
+def _level(where: str, name: Any) -> level:
+    if isinstance(name, level):
+        return name
+
+    try:
+        return LEVELS[str(name).lower()]
+    except KeyError:
+        raise ValueError(f"{where}: invalid level {name!r}") from None
+
+
+def _time_type(where: str, name: Any) -> pattern_time_type:
+    if isinstance(name, pattern_time_type):
+        return name
+
+    if name not in ("local", "utc"):
+        raise ValueError(f"{where}: invalid time_type {name!r}, expected 'local' or 'utc'")
+
+    return getattr(pattern_time_type, name)
+
+
+def _enum(where: str, enum: Any, name: Any) -> Any:
+    if isinstance(name, enum):
+        return name
+
+    try:
+        return getattr(enum, name)
+    except (AttributeError, TypeError):
+        raise ValueError(f"{where}: invalid {enum.__name__} {name!r}") from None
+
+
+def _str(where: str, value: Any) -> str:
+    if not isinstance(value, str):
+        raise ValueError(f"{where}: invalid value {value!r}, expected a string")
+
+    return value
+
+
+def _table(where: str, value: Any) -> Dict[str, Any]:
+    if not isinstance(value, dict):
+        raise ValueError(f"{where}: invalid value {value!r}, expected a table")
+
+    return dict(value)
+
+
+def _int(where: str, value: Any, low: int, high: Optional[int] = None) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value < low or (high is not None and value > high):
+        expected = f"between {low} and {high}" if high is not None else f"at least {low}"
+        raise ValueError(f"{where}: invalid value {value!r}, expected an integer {expected}")
+
+    return value
+
+
+def _thread_pool(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Validates the thread pool options, as init_thread_pool would, before anything is applied"""
+    options = _table("thread_pool", spec)
+    _check_keys("thread_pool", options, THREAD_POOL_KEYS)
+
+    if "queue_size" in options:
+        _int("thread_pool.queue_size", options["queue_size"], 1)
+
+    if "thread_count" in options:
+        _int("thread_pool.thread_count", options["thread_count"], 1, 1000)
+
+    if options.get("cpu_affinity") is not None:
+        if isinstance(options["cpu_affinity"], (str, bytes)):
+            raise ValueError(f"thread_pool.cpu_affinity: invalid value {options['cpu_affinity']!r}, expected a list of cpus")
+
+        options["cpu_affinity"] = [_int("thread_pool.cpu_affinity", cpu, 0) for cpu in options["cpu_affinity"]]
+
+    if options.get("nice") is not None:
+        _int("thread_pool.nice", options["nice"], -20, 19)
+
+    if "thread_name" in options:
+        _str("thread_pool.thread_name", options["thread_name"])
+
+    if (options.get("cpu_affinity") is not None or options.get("nice") is not None) and not sys.platform.startswith("linux"):
+        raise ValueError("thread_pool: cpu_affinity and nice are only supported on Linux")
+
+    return options
+
+
+def _sink_names(where: str, spec: Dict[str, Any], sinks: Dict[str, Any]) -> List[str]:
+    names = spec.get("sinks", [])
+
+    if isinstance(names, str):
+        names = [names]
+
+    if not isinstance(names, (list, tuple)):
+        raise ValueError(f"{where}.sinks: invalid value {names!r}, expected a list of sink names")
+
+    for name in names:
+        if _str(f"{where}.sinks", name) not in sinks:
+            raise ValueError(f"{where}: unknown sink {name!r}")
+
+    return list(names)
+
+
+def _settings(spec: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Validates a specification, the type of every value applied by configure and reload
+    included. Returns the global settings, and the sink and logger specifications, with
+    their levels, time types and enumerations converted
+    """
+    _check_keys("specification", spec, GLOBAL_KEYS)
+
+    settings = {"time_type": _time_type("time_type", spec.get("time_type", "local"))}
+
+    for key in ("level", "flush_on"):
+        if key in spec:
+            settings[key] = _level(key, spec[key])
+
+    if "pattern" in spec:
+        settings["pattern"] = _str("pattern", spec["pattern"])
+
+    sinks = {}
+
+    for name, sink_spec in _table("sinks", spec.get("sinks", {})).items():
+        where = f"sinks.{name}"
+        sink_spec = _table(where, sink_spec)
+
+        if "type" not in sink_spec:
+            raise ValueError(f"{where}: missing type")
+
+        sink_type = getattr(_spydlog, str(sink_spec["type"]), None)
+
+        if not isinstance(sink_type, type) or not issubclass(sink_type, _spydlog.sink):
+            raise ValueError(f"{where}: unknown sink type {sink_spec['type']!r}")
+
+        if "level" in sink_spec:
+            sink_spec["level"] = _level(f"{where}.level", sink_spec["level"])
+
+        if "pattern" in sink_spec:
+            _str(f"{where}.pattern", sink_spec["pattern"])
+
+        if "mode" in sink_spec:
+            sink_spec["mode"] = _enum(f"{where}.mode", color_mode, sink_spec["mode"])
+
+        sinks[name] = sink_spec
+
+    for name, sink_spec in sinks.items():
+        if "sinks" in sink_spec:
+            sink_spec["sinks"] = _sink_names(f"sinks.{name}", sink_spec, sinks)
+
+            if name in sink_spec["sinks"]:
+                raise ValueError(f"sinks.{name}: a sink cannot contain itself")
+
+    loggers = {}
+
+    for name, logger_spec in _table("loggers", spec.get("loggers", {})).items():
+        where = f"loggers.{name}"
+        logger_spec = _table(where, logger_spec)
+        _check_keys(where, logger_spec, LOGGER_KEYS)
+
+        logger_spec["sinks"] = _sink_names(where, logger_spec, sinks)
+        logger_spec["time_type"] = _time_type(f"{where}.time_type", logger_spec.get("time_type", "local"))
+
+        for key in ("level", "flush_on"):
+            if key in logger_spec:
+                logger_spec[key] = _level(f"{where}.{key}", logger_spec[key])
+
+        if "pattern" in logger_spec:
+            _str(f"{where}.pattern", logger_spec["pattern"])
+
+        if not isinstance(logger_spec.get("async", False), bool):
+            raise ValueError(f"{where}.async: invalid value {logger_spec['async']!r}, expected a boolean")
+
+        if "overflow_policy" in logger_spec:
+            logger_spec["overflow_policy"] = _enum(f"{where}.overflow_policy", async_overflow_policy,
+                                                   logger_spec["overflow_policy"])
+
+        loggers[name] = logger_spec
+
+    return settings, sinks, loggers
+
+
+def _build_sinks(sinks: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Builds the sinks, the sinks contained by a dist_sink first"""
+    built = {}
+
+    def build(name: str, chain: Tuple[str, ...]) -> Any:
+        if name in built:
+            return built[name]
+
+        if name in chain:
+            raise ValueError(f"sinks.{name}: circular sinks")
+
+        sink_spec = sinks[name]
+        kwargs = {key: value for key, value in sink_spec.items() if key not in SINK_KEYS}
+
+        if "sinks" in kwargs:
+            kwargs["sinks"] = [build(child, chain + (name,)) for child in kwargs["sinks"]]
+
+        try:
+            built[name] = getattr(_spydlog, sink_spec["type"])(**kwargs)
+        except TypeError as e:
+            raise ValueError(f"sinks.{name}: {e}") from None
+
+        return built[name]
+
+    for name in sinks:
+        build(name, ())
+
+    return built
+
+
+def _apply(settings: Dict[str, Any], sinks: Dict[str, Tuple[Any, Dict[str, Any]]],
+           loggers: Dict[str, Tuple[Any, Dict[str, Any]]]) -> None:
+    """
+    Applies the global settings (to the registered loggers), then the settings of the
+    loggers, then those of the sinks: a logger pattern is set on all its sinks
+    """
+    if "level" in settings:
+        _spydlog.set_level(settings["level"])
+
+    if "pattern" in settings:
+        _spydlog.set_pattern(settings["pattern"], settings["time_type"])
+
+    if "flush_on" in settings:
+        _spydlog.flush_on(settings["flush_on"])
+
+    for logger, logger_spec in loggers.values():
+        if "level" in logger_spec:
+            logger.set_level(logger_spec["level"])
+
+        if "pattern" in logger_spec:
+            logger.set_pattern(logger_spec["pattern"], logger_spec["time_type"])
+
+        if "flush_on" in logger_spec:
+            logger.flush_on(logger_spec["flush_on"])
+
+    for sink, sink_spec in sinks.values():
+        if "level" in sink_spec:
+            sink.set_level(sink_spec["level"])
+
+        if "pattern" in sink_spec:
+            sink.set_pattern(sink_spec["pattern"])
+
+
+def configure(spec: Spec) -> None:
+    """
+    Builds the sinks and loggers of a specification (dict, or path of a TOML or JSON file)
+    and registers the loggers, replacing the registered loggers of the same names in one
+    step (see replace_loggers). The
+    global settings apply to all the registered loggers, the new loggers included (which
+    get the current global level otherwise, like the loggers of the factory functions).
+    The thread pool is rebuilt last, once everything else is applied
+    """
+    spec = load(spec)
+    settings, sink_specs, logger_specs = _settings(spec)
+
+    thread_pool = spec.get("thread_pool")
+
+    if thread_pool is not None:
+        thread_pool = _thread_pool(thread_pool)
+
+    flush_every = spec.get("flush_every")
+
+    if flush_every is not None and (not isinstance(flush_every, (int, float)) or flush_every < 0):
+        raise ValueError(f"flush_every: invalid interval {flush_every!r}, expected seconds")
+
+    sinks = _build_sinks(sink_specs)
+    loggers = {}
+
+    for name, logger_spec in logger_specs.items():
+        logger_sinks = [sinks[sink] for sink in logger_spec["sinks"]]
+
+        if logger_spec.get("async", False):
+            logger = _spydlog.async_logger(name, logger_sinks,
+                                           logger_spec.get("overflow_policy", async_overflow_policy.block))
+        else:
+            logger = _spydlog.logger(name, sinks=logger_sinks)
+
+        loggers[name] = logger
+
+    with _lock:
+        if flush_every is not None:
+            _spydlog.flush_every(int(flush_every * 1000))
+
+        _apply(settings, {}, {})
+
+        # The new loggers are set up before they are registered, with the global settings
+        # first as if they had been registered when these were applied
+        for logger in loggers.values():
+            logger.set_level(_spydlog.get_level())
+
+            if "pattern" in settings:
+                logger.set_pattern(settings["pattern"], settings["time_type"])
+
+            if "flush_on" in settings:
+                logger.flush_on(settings["flush_on"])
+
+        _apply({},
+               {name: (sinks[name], sink_spec) for name, sink_spec in sink_specs.items()},
+               {name: (loggers[name], logger_spec) for name, logger_spec in logger_specs.items()})
+
+        # One registry step, a concurrent get never misses a replaced logger
+        _spydlog.replace_loggers(list(loggers.values()))
+
+        _sinks.clear()
+        _sinks.update(sinks)
+
+        # Last: the rebuild waits for the queue, and the settings above do not depend on it
+        if thread_pool is not None:
+            _spydlog.init_thread_pool(**thread_pool)
+
+
+def reload(spec: Spec) -> None:
+    """
+    Applies the levels, patterns and flush levels of a specification to the loggers and
+    sinks already configured, without recreating them. Loggers that are not registered and
+    sinks not built by configure are ignored, as are the sinks and the types of the
+    loggers and the thread pool options
+    """
+    spec = load(spec)
+    settings, sink_specs, logger_specs = _settings(spec)
+
+    with _lock:
+        sinks = {name: (_sinks[name], sink_spec) for name, sink_spec in sink_specs.items() if name in _sinks}
+        loggers = {}
+
+        for name, logger_spec in logger_specs.items():
+            logger = _spydlog.get(name)
+
+            if logger is not None:
+                loggers[name] = (logger, logger_spec)
+
+        _apply(settings, sinks, loggers)
+
+
+def _report(path: str, error: Exception) -> None:
+    """Logs a failed reload with the default logger, the configuration being unchanged"""
+    logger = _spydlog.default_logger()
+
+    if logger is not None:
+        logger.error(f"failed to reload {path}: {error}")
+
+
+class Watcher:
+    """Reloads a configuration file when it changes, see watch"""
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"], interval: float = 1.0) -> None:
+        self.path = os.fspath(path)
+        self.interval = interval
+        self.error: Optional[Exception] = None
+        self._stop = threading.Event()
+        self._stamp = self._stat()
+        self._thread = threading.Thread(target=self._run, name="spydlog-config-watcher", daemon=True)
+        self._thread.start()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+
+        return st.st_mtime_ns, st.st_size
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            stamp = self._stat()
+
+            if stamp is None or stamp == self._stamp:
+                continue
+
+            self._stamp = stamp
+
+            try:
+                reload(self.path)
+                self.error = None
+            except Exception as e:
+                # Kept and logged, the watcher keeps running with the last good configuration
+                self.error = e
+                _report(self.path, e)
+
+    def stop(self) -> None:
+        """Stops watching, waiting for a reload in progress"""
+        self._stop.set()
+        self._thread.join()
+
+
+def watch(path: Union[str, "os.PathLike[str]"], interval: float = 1.0) -> Watcher:
+    """
+    Reloads a configuration file (see reload) when its modification time or size changes,
+    checked every interval seconds by a daemon thread. Errors are logged with the default
+    logger and kept in Watcher.error
+    """
+    return Watcher(path, interval)
+
+
+def reload_on_signal(path: Union[str, "os.PathLike[str]"], signum: Optional[int] = None) -> None:
+    """
+    Reloads a configuration file (see reload) when the process receives signum (SIGHUP by
+    default). Must be called from the main thread. Errors are logged with the default logger.
+    Platforms without SIGHUP (Windows) require signum
+    """
+    path = os.fspath(path)
+
+    if signum is None:
+        if not hasattr(signal, "SIGHUP"):
+            raise ValueError(f"reload_on_signal: {sys.platform} has no SIGHUP, a signum is required")
+
+        signum = signal.SIGHUP
+
+    def run() -> None:
+        try:
+            reload(path)
+        except Exception as e:
+            _report(path, e)
+
+    # Reloaded from a thread, the signal may interrupt the main thread within configure
+    def handler(signum: int, frame: Any) -> None:
+        threading.Thread(target=run, name="spydlog-config-reload", daemon=True).start()
+
+    signal.signal(signum, handler)
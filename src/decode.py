@@ -0,0 +1,45 @@
+"""
+Render binary logs written by binary_file_sink_mt / binary_file_sink_st.
+
+    python -m spydlog.decode app.bin [more.bin ...] [--pattern PATTERN] [--utc] [--level LEVEL]
+"""
+
+import argparse
+import os
+import sys
+
+from .spydlog import decode, level, pattern_time_type
+
+LEVELS = ["trace", "debug", "info", "warn", "err", "critical"]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m spydlog.decode",
+                                     description="Render spydlog binary logs as text.")
+    parser.add_argument("files", nargs="+", help="binary log files, rendered in order")
+    parser.add_argument("--pattern", "-p", default="%+", help="spdlog pattern (default: %%+)")
+    parser.add_argument("--utc", action="store_true", help="format times in UTC rather than local time")
+    parser.add_argument("--level", "-l", choices=LEVELS, default="trace", help="lowest level rendered")
+    args = parser.parse_args(argv)
+
+    time_type = pattern_time_type.utc if args.utc else pattern_time_type.local
+    write = sys.stdout.write
+
+    try:
+        for filename in args.files:
+            for line in decode(filename, args.pattern, time_type, getattr(level, args.level)):
+                write(line)
+                write("\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Output closed early (e.g. piped into head), silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except RuntimeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,558 @@
+"""
+Read the text logs written by the file sinks.
+
+    from spydlog.reader import LogReader
+
+    log = LogReader("logs/app.log", "[%Y-%m-%d %H:%M:%S.%e] [%l] %v", level=spydlog.level.warn)
+    for record in log.tail(20):
+        print(record.time, record.level, record.message)
+
+Files are memory-mapped and read with a regular expression compiled from the pattern that
+wrote them. Lines that do not match the pattern (e.g. tracebacks) belong to the previous
+record. Without a pattern, files of JSON lines are detected and decoded, other files are
+read with the default "%+" pattern.
+
+The file name given to the sink finds the whole log: the rotated files of a rotating file
+sink (app.2.log, app.1.log) and the files of a daily file sink (app_2025-12-21.log) are
+read oldest first.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import re
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .spydlog import level, pattern_time_type
+
+# Distance in bytes between two entries of the sparse time index of a file
+INDEX_STRIDE = 64 * 1024
+
+DEFAULT_PATTERN = "%+"
+
+
+class Record(NamedTuple):
+    """A log record, the fields the pattern does not write are None"""
+    time: Optional[datetime]
+    level: Optional[level]
+    logger: Optional[str]
+    thread: Optional[int]
+    message: str
+    filename: str
+    offset: int
+
+
+# Level names written by %l and %L, and the other names used by JSON formatters
+_LEVEL_NAMES = {
+    level.trace: ("trace", "t"),
+    level.debug: ("debug", "d"),
+    level.info: ("info", "i"),
+    level.warn: ("warning", "warn", "w"),
+    level.err: ("error", "err", "e"),
+    level.critical: ("critical", "c", "fatal"),
+    level.off: ("off", "o"),
+}
+_LEVELS = {name: lvl for lvl, names in _LEVEL_NAMES.items() for name in names}
+
+_MONTHS = {name: index + 1 for index, name in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"])}
+_FULL_MONTHS = {name: index + 1 for index, name in enumerate(
+    ["January", "February", "March", "April", "May", "June", "July", "August", "September",
+     "October", "November", "December"])}
+
+
+def _level_of(name: str) -> Optional[level]:
+    """Return the level of a level name, which can be truncated by the pattern (%-3!l)"""
+    name = name.strip().lower()
+    lvl = _LEVELS.get(name)
+    if lvl is None and name:
+        lvl = next((lvl for lvl, names in _LEVEL_NAMES.items() if names[0].startswith(name)), None)
+    return lvl
+
+
+def _epoch_time(seconds: float, time_type: pattern_time_type) -> datetime:
+    if time_type == pattern_time_type.utc:
+        return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+    return datetime.fromtimestamp(seconds)
+
+
+# Regex and record field of each flag, see the spdlog pattern flags
+_FLAGS: Dict[str, Tuple[bytes, Optional[str]]] = {
+    "v": (rb".*?", "message"),
+    "t": (rb"\d+", "thread"),
+    "P": (rb"\d+", None),
+    "n": (rb".*?", "logger"),
+    "l": (rb"[a-z]+", "level"),
+    "L": (rb"[A-Z]", "level"),
+    "a": (rb"[A-Z][a-z]{2}", None),
+    "A": (rb"[A-Z][a-z]+", None),
+    "b": (rb"[A-Z][a-z]{2}", "b"),
+    "h": (rb"[A-Z][a-z]{2}", "b"),
+    "B": (rb"[A-Z][a-z]+", "B"),
+    "Y": (rb"\d{4}", "Y"),
+    "C": (rb"\d{2}", "C"),
+    "m": (rb"\d{2}", "m"),
+    "d": (rb"\d{2}", "d"),
+    "H": (rb"\d{2}", "H"),
+    "I": (rb"\d{2}", "I"),
+    "M": (rb"\d{2}", "M"),
+    "S": (rb"\d{2}", "S"),
+    "e": (rb"\d{3}", "e"),
+    "f": (rb"\d{6}", "f"),
+    "F": (rb"\d{9}", "F"),
+    "p": (rb"AM|PM", "p"),
+    "z": (rb"[+-]\d{2}:\d{2}", "z"),
+    "E": (rb"\d+", "E"),
+    "s": (rb".*?", None),
+    "g": (rb".*?", None),
+    "#": (rb"\d*", None),
+    "!": (rb".*?", None),
+    "i": (rb"\d+", None),
+    "u": (rb"\d+", None),
+    "o": (rb"\d+", None),
+    "O": (rb"\d+", None),
+    "^": (b"", None),
+    "$": (b"", None),
+}
+
+# Flags writing several values, expanded to an equivalent pattern
+_COMPOSITE_FLAGS = {
+    "D": "%m/%d/%C",
+    "x": "%m/%d/%C",
+    "r": "%I:%M:%S %p",
+    "R": "%H:%M",
+    "T": "%H:%M:%S",
+    "X": "%H:%M:%S",
+    "@": "%s:%#",
+}
+
+_PADDING = re.compile(r"[-=]?\d+!?")
+
+
+class _PatternFormat:
+    """Records written with a spdlog pattern, a record starting with each line matching it"""
+
+    def __init__(self, pattern: str, time_type: pattern_time_type):
+        self.time_type = time_type
+        self._groups: Dict[str, str] = {}
+        parts = self._compile(pattern)
+
+        # The message of the last flag runs to the end of the line
+        if parts and parts[-1].endswith(rb".*?)"):
+            parts[-1] = parts[-1][:-2] + b")"
+
+        self.regex = re.compile(b"^" + b"".join(parts) + rb"\r?$", re.M)
+        self._fields = list(self._groups.values())
+        fields = set(self._fields)
+        self.has_time = "E" in fields or bool(fields & {"Y", "C"} and fields & {"m", "b", "B"} and "d" in fields)
+
+    def _group(self, regex: bytes, field: Optional[str]) -> bytes:
+        if field is None:
+            return b"(?:" + regex + b")"
+        name = f"g{len(self._groups)}"
+        self._groups[name] = field
+        return b"(?P<" + name.encode() + b">" + regex + b")"
+
+    def _compile(self, pattern: str) -> List[bytes]:
+        parts: List[bytes] = []
+        i = 0
+        while i < len(pattern):
+            if pattern[i] != "%" or i + 1 == len(pattern):
+                parts.append(re.escape(pattern[i].encode()))
+                i += 1
+                continue
+
+            padding = _PADDING.match(pattern, i + 1)
+            if padding:
+                i = padding.end()
+            else:
+                i += 1
+            if i == len(pattern):
+                break
+            flag = pattern[i]
+            i += 1
+
+            if flag == "%":
+                part = b"%"
+            elif flag == "+":
+                part = self._full()
+            elif flag == "c":
+                part = b"".join(self._compile("%a %b ")) + self._group(rb"\d{1,2}", "d") + \
+                    b"".join(self._compile(" %H:%M:%S %Y"))
+            elif flag in _COMPOSITE_FLAGS:
+                part = b"".join(self._compile(_COMPOSITE_FLAGS[flag]))
+            elif flag in _FLAGS:
+                regex, field = _FLAGS[flag]
+                # A truncated value only keeps the level, from the start of its name
+                if padding and padding.group().endswith("!") and field not in ("level", "message"):
+                    regex, field = rb".*?", None
+                part = self._group(regex, field)
+            else:
+                # Unknown flags are written as is
+                part = re.escape(("%" + flag).encode())
+
+            if padding:
+                part = b" *" + part + b" *"
+            parts.append(part)
+
+        return parts
+
+    def _full(self) -> bytes:
+        """The "%+" pattern, the logger name and the source location being written when not empty"""
+        return (b"".join(self._compile("[%Y-%m-%d %H:%M:%S.%e] ")) +
+                b"(?:" + b"".join(self._compile("[%n] ")) + b")?" +
+                b"".join(self._compile("[%l] ")) +
+                b"(?:" + b"".join(self._compile("[%s:%#] ")) + b")?" +
+                b"".join(self._compile("%v")))
+
+    def parse(self, data, match, end: int) -> Tuple[Any, ...]:
+        """Return the time, level, logger, thread and message of the record matched until end"""
+        values = {field: value for field, value in zip(self._fields, match.groups()) if value is not None}
+
+        lvl = values.get("level")
+        thread = values.get("thread")
+        logger = values.get("logger")
+
+        message = values.get("message", b"").rstrip(b"\r")
+        if match.end() + 1 < end:
+            message += data[match.end():end].rstrip(b"\r\n")
+
+        return (self._time(values) if self.has_time else None,
+                _level_of(lvl.decode()) if lvl is not None else None,
+                logger.decode("utf-8", "replace") if logger is not None else None,
+                int(thread) if thread is not None else None,
+                message.decode("utf-8", "replace"))
+
+    def _time(self, values: Dict[str, bytes]) -> Optional[datetime]:
+        if "E" in values and "Y" not in values and "C" not in values:
+            return _epoch_time(int(values["E"]), self.time_type)
+
+        try:
+            year = int(values["Y"]) if "Y" in values else 2000 + int(values["C"])
+            if "m" in values:
+                month = int(values["m"])
+            elif "b" in values:
+                month = _MONTHS[values["b"].decode()]
+            else:
+                month = _FULL_MONTHS[values["B"].decode()]
+            day = int(values["d"])
+
+            if "H" in values:
+                hour = int(values["H"])
+            elif "I" in values:
+                hour = int(values["I"]) % 12 + (12 if values.get("p") == b"PM" else 0)
+            else:
+                hour = 0
+
+            if "F" in values:
+                microsecond = int(values["F"]) // 1000
+            elif "f" in values:
+                microsecond = int(values["f"])
+            else:
+                microsecond = int(values.get("e", 0)) * 1000
+
+            tzinfo = None
+            if "z" in values:
+                offset = values["z"]
+                minutes = int(offset[1:3]) * 60 + int(offset[4:6])
+                tzinfo = timezone(timedelta(minutes=-minutes if offset[:1] == b"-" else minutes))
+
+            return datetime(year, month, day, hour, int(values.get("M", 0)), int(values.get("S", 0)),
+                            microsecond, tzinfo)
+        except (KeyError, ValueError):
+            return None
+
+
+class _JsonFormat:
+    """Records written by a JSON pattern, a record starting with each line starting with "{" """
+
+    TIME_KEYS = ("time", "timestamp", "ts", "@timestamp", "datetime")
+    LEVEL_KEYS = ("level", "lvl", "severity", "levelname")
+    LOGGER_KEYS = ("logger", "name", "logger_name")
+    THREAD_KEYS = ("thread", "thread_id", "tid")
+    MESSAGE_KEYS = ("message", "msg", "text")
+
+    has_time = True
+
+    def __init__(self, time_type: pattern_time_type):
+        self.time_type = time_type
+        self.regex = re.compile(rb"^[ \t]*\{", re.M)
+
+    @staticmethod
+    def _get(obj: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+        return next((obj[key] for key in keys if key in obj), None)
+
+    def parse(self, data, match, end: int) -> Tuple[Any, ...]:
+        text = data[match.start():end].decode("utf-8", "replace").rstrip("\r\n")
+        try:
+            # Messages are not escaped by the pattern, so control characters are accepted
+            obj = json.loads(text, strict=False)
+        except ValueError:
+            obj = None
+        if not isinstance(obj, dict):
+            return None, None, None, None, text
+
+        lvl = self._get(obj, self.LEVEL_KEYS)
+        if isinstance(lvl, int):
+            lvl = level(lvl) if 0 <= lvl <= level.off.value else None
+        elif lvl is not None:
+            lvl = _level_of(str(lvl))
+
+        thread = self._get(obj, self.THREAD_KEYS)
+        logger = self._get(obj, self.LOGGER_KEYS)
+        message = self._get(obj, self.MESSAGE_KEYS)
+
+        return (self._time(self._get(obj, self.TIME_KEYS)),
+                lvl,
+                str(logger) if logger is not None else None,
+                int(thread) if isinstance(thread, int) or (isinstance(thread, str) and thread.isdigit()) else None,
+                str(message) if message is not None else text)
+
+    def _time(self, value: Any) -> Optional[datetime]:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return _epoch_time(value, self.time_type)
+        if not isinstance(value, str):
+            return None
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+
+
+def _split_extension(name: str) -> Tuple[str, str]:
+    """Split a file name like spdlog does to name the rotated and daily files"""
+    dot = name.rfind(".")
+    if dot <= 0 or dot == len(name) - 1:
+        return name, ""
+    return name[:dot], name[dot:]
+
+
+def rotation_set(filename: str) -> List[str]:
+    """
+    Find the files of the log written to filename, oldest first.
+
+    Args:
+        filename: File name given to the basic, rotating or daily file sink
+
+    Returns:
+        The daily files by date, then the rotated files from the oldest, then filename
+    """
+    directory = os.path.dirname(filename)
+    base, ext = _split_extension(os.path.basename(filename))
+    rotated = re.compile(re.escape(base) + r"\.(\d+)" + re.escape(ext) + "$")
+    daily = re.compile(re.escape(base) + r"_(\d{4}-\d{2}-\d{2})" + re.escape(ext) + "$")
+
+    daily_files = []
+    rotated_files = []
+    try:
+        names = os.listdir(directory or ".")
+    except OSError:
+        names = []
+    for name in names:
+        match = daily.match(name)
+        if match:
+            daily_files.append((match.group(1), name))
+            continue
+        match = rotated.match(name)
+        if match:
+            rotated_files.append((-int(match.group(1)), name))
+
+    files = [os.path.join(directory, name) for _, name in sorted(daily_files) + sorted(rotated_files)]
+    if os.path.isfile(filename):
+        files.append(filename)
+    return files
+
+
+class _Index:
+    """Sparse index of a file, the time and offset of a record about every INDEX_STRIDE bytes"""
+
+    def __init__(self, identity: Tuple[int, int]):
+        self.identity = identity
+        self.times: List[datetime] = []
+        self.offsets: List[int] = []
+        self.next = 0
+
+
+class LogReader:
+    """
+    Reader of a text log, possibly rotated.
+
+    Args:
+        filename: File name given to the basic, rotating or daily file sink
+        pattern: Pattern of the records, None detects JSON lines or uses the default "%+" pattern
+        time_type: Time zone of the times without an offset (%z), for epoch times (%E)
+        level: Records below this level are skipped (default: trace)
+
+    Raises:
+        FileNotFoundError: If no file of the log exists
+    """
+
+    def __init__(self, filename: str, pattern: Optional[str] = None,
+                 time_type: pattern_time_type = pattern_time_type.local, level: level = level.trace):
+        self.filename = filename
+        self._min_level = level.value
+        self._indexes: Dict[str, _Index] = {}
+
+        files = self.files()
+        if not files:
+            raise FileNotFoundError(f"no log file found for {filename}")
+
+        if pattern is None and self._is_json(files[-1]):
+            self._format = _JsonFormat(time_type)
+        else:
+            self._format = _PatternFormat(DEFAULT_PATTERN if pattern is None else pattern, time_type)
+
+    @staticmethod
+    def _is_json(path: str) -> bool:
+        with open(path, "rb") as f:
+            return f.read(4096).lstrip().startswith(b"{")
+
+    def files(self) -> List[str]:
+        """Get the files of the log, oldest first"""
+        return rotation_set(self.filename)
+
+    @contextmanager
+    def _mapped(self, path: str):
+        """Map a file, yields its data, the end of its last complete line and its identity"""
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size == 0:
+                yield b"", 0, (stat.st_dev, stat.st_ino)
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                # A last line without end of line is still being written
+                yield data, data.rfind(b"\n") + 1, (stat.st_dev, stat.st_ino)
+
+    def _scan(self, path: str, data, start: int, end: int) -> Iterator[Record]:
+        """Records starting between start and end, above the level"""
+        min_level = self._min_level
+        parse = self._format.parse
+        previous = None
+
+        for match in self._format.regex.finditer(data, start, end):
+            if match.start() == end:
+                break
+            if previous is not None:
+                record = Record(*parse(data, previous, match.start()), path, previous.start())
+                if record.level is None or record.level.value >= min_level:
+                    yield record
+            previous = match
+
+        if previous is not None:
+            record = Record(*parse(data, previous, end), path, previous.start())
+            if record.level is None or record.level.value >= min_level:
+                yield record
+
+    def _index(self, path: str, data, end: int, identity: Tuple[int, int]) -> _Index:
+        """Get the index of a file, extended to the records written since the last call"""
+        index = self._indexes.get(path)
+        if index is None or index.identity != identity or index.next > end:
+            index = self._indexes[path] = _Index(identity)
+
+        regex = self._format.regex
+        position = index.next
+        while position < end:
+            match = regex.search(data, position, end)
+            if match is None:
+                break
+            following = regex.search(data, match.end(), end)
+            if following is None:
+                # The last record can still grow, index it later
+                break
+
+            time = self._format.parse(data, match, following.start())[0]
+            if time is not None and (not index.times or time >= index.times[-1]):
+                index.times.append(time)
+                index.offsets.append(match.start())
+            position = match.start() + INDEX_STRIDE
+
+        index.next = position
+        return index
+
+    def __iter__(self) -> Iterator[Record]:
+        return self.between()
+
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Record]:
+        """
+        Iterate over the records between two times, oldest first.
+
+        Files are seeked with their index, records are expected in about the order of their times.
+        The times are naive datetimes unless the pattern writes the time zone (%z).
+
+        Args:
+            start: First time included, None for the start of the log
+            end: Last time included, None for the end of the log
+
+        Raises:
+            ValueError: If a time is given and the pattern does not write the date
+        """
+        if (start is not None or end is not None) and not self._format.has_time:
+            raise ValueError("the pattern does not write the date, records cannot be found by time")
+
+        for path in self.files():
+            with ExitStack() as stack:
+                try:
+                    data, limit, identity = stack.enter_context(self._mapped(path))
+                except FileNotFoundError:
+                    # Removed by a rotation since the files were listed
+                    continue
+
+                first, last = 0, limit
+                if start is not None or end is not None:
+                    index = self._index(path, data, limit, identity)
+                    if end is not None and index.times and index.times[0] > end:
+                        return
+                    if start is not None and index.times:
+                        i = bisect.bisect_left(index.times, start)
+                        first = index.offsets[i - 1] if i > 0 else 0
+                    if end is not None:
+                        # Records are scanned one index entry further, for the ones slightly out of order
+                        i = bisect.bisect_right(index.times, end) + 1
+                        if i < len(index.offsets):
+                            last = index.offsets[i]
+                elif hasattr(mmap, "MADV_SEQUENTIAL") and isinstance(data, mmap.mmap):
+                    data.madvise(mmap.MADV_SEQUENTIAL)
+
+                for record in self._scan(path, data, first, last):
+                    if start is not None and (record.time is None or record.time < start):
+                        continue
+                    if end is not None and (record.time is None or record.time > end):
+                        continue
+                    yield record
+
+    def tail(self, n: int = 10) -> List[Record]:
+        """
+        Get the last records, oldest first.
+
+        The files are read backwards from their end, by growing chunks.
+
+        Args:
+            n: Number of records (default: 10)
+        """
+        records: List[Record] = []
+        if n <= 0:
+            return records
+
+        for path in reversed(self.files()):
+            try:
+                with self._mapped(path) as (data, end, _):
+                    chunk = INDEX_STRIDE
+                    while True:
+                        start = max(0, end - chunk)
+                        found = list(self._scan(path, data, start, end))
+                        if len(found) >= n - len(records) or start == 0:
+                            break
+                        chunk *= 4
+            except FileNotFoundError:
+                continue
+
+            records[:0] = found[len(records) - n:]
+            if len(records) >= n:
+                break
+
+        return records
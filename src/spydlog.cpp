@@ -3,6 +3,7 @@
 #include "nanobind/stl/vector.h"
 #include "nanobind/stl/shared_ptr.h"
 #include "nanobind/stl/function.h"
+#include "nanobind/stl/optional.h"
 
 #include "spdlog/spdlog.h"
 #include "spdlog/sinks/sink.h"
@@ -13,20 +14,3958 @@
 #include "spdlog/sinks/rotating_file_sink.h"
 #include "spdlog/sinks/daily_file_sink.h"
 #include "spdlog/sinks/null_sink.h"
+#include "spdlog/sinks/dist_sink.h"
 #include "spdlog/async.h"
 #include "spdlog/async_logger.h"
 #include "spdlog/common.h"
+#include "spdlog/cfg/env.h"
+#include "spdlog/cfg/helpers.h"
 
+#include <algorithm>
+#include <atomic>
 #include <chrono>
+#include <condition_variable>
+#include <cstdint>
+#include <cstdio>
+#include <cstring>
+#include <functional>
+#include <limits>
+#include <map>
 #include <memory>
+#include <mutex>
+#include <optional>
+#include <queue>
+#include <shared_mutex>
+#include <string>
+#include <thread>
+#include <unordered_map>
+#include <unordered_set>
+
+#ifdef _WIN32
+#include "spdlog/details/windows_include.h"
+#else
+#include <fcntl.h>
+#include <pthread.h>
+#include <signal.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+#ifdef __linux__
+#include <sched.h>
+#include <sys/resource.h>
+#include <sys/syscall.h>
+#endif
 
 namespace nb = nanobind;
 using namespace nb::literals;
 
-static spdlog::details::thread_pool g_thread_pool(spdlog::details::default_async_q_size, 1);
-static std::shared_ptr<spdlog::details::thread_pool> g_thread_pool_ptr{ &g_thread_pool, [](spdlog::details::thread_pool*){} };
+// Async thread pool options (init_thread_pool). Each worker applies them to itself when it
+// starts, and reports the result so init_thread_pool can raise if an option failed
+struct thread_pool_options {
+    size_t queue_size = spdlog::details::default_async_q_size;
+    size_t threads = 1;
+    std::vector<int> cpu_affinity;
+    std::optional<int> nice;
+    std::string thread_name = "spydlog-worker";
+};
+
+struct thread_pool_start {
+    std::mutex mutex;
+    std::condition_variable cv;
+    size_t started = 0;
+    std::string error;
+
+    void report(std::string worker_error) {
+        std::lock_guard<std::mutex> lock(this->mutex);
+
+        if(this->error.empty())
+            this->error = std::move(worker_error);
+
+        this->started++;
+        this->cv.notify_all();
+    }
+
+    // Returns the first error reported, once all the workers have started
+    std::string wait(size_t threads) {
+        std::unique_lock<std::mutex> lock(this->mutex);
+        this->cv.wait(lock, [&] { return this->started >= threads; });
+
+        return this->error;
+    }
+};
+
+// Returns an empty string, or the error of the option that could not be applied
+static std::string apply_thread_options(const thread_pool_options& options) {
+#ifdef __linux__
+    // Names are limited to 15 characters
+    if(!options.thread_name.empty())
+        pthread_setname_np(pthread_self(), options.thread_name.substr(0, 15).c_str());
+
+    if(!options.cpu_affinity.empty()) {
+        cpu_set_t cpus;
+        CPU_ZERO(&cpus);
+
+        for(int cpu : options.cpu_affinity)
+            CPU_SET(cpu, &cpus);
+
+        if(int error = pthread_setaffinity_np(pthread_self(), sizeof(cpus), &cpus))
+            return spdlog::spdlog_ex("failed to set the cpu_affinity of the async workers", error).what();
+    }
+
+    // The nice value of a thread (not of the process) on Linux
+    if(options.nice && setpriority(PRIO_PROCESS, static_cast<id_t>(syscall(SYS_gettid)), *options.nice) != 0)
+        return spdlog::spdlog_ex("failed to set the nice value of the async workers", errno).what();
+#elif defined(__APPLE__)
+    if(!options.thread_name.empty())
+        pthread_setname_np(options.thread_name.substr(0, 63).c_str());
+#endif
+
+    return {};
+}
+
+static thread_pool_options g_thread_pool_options;
+
+// on_thread_start callback of the pool workers
+static std::function<void()> thread_pool_worker_start(thread_pool_options options, std::shared_ptr<thread_pool_start> start = nullptr) {
+    return [options = std::move(options), start = std::move(start)] {
+        std::string error = apply_thread_options(options);
+
+        if(start)
+            start->report(std::move(error));
+    };
+}
+
+// Never destroyed, see shutdown (rebuilt in place by init_thread_pool and in forked children)
+static spdlog::details::thread_pool& g_thread_pool = *new spdlog::details::thread_pool(
+    g_thread_pool_options.queue_size, g_thread_pool_options.threads, thread_pool_worker_start(g_thread_pool_options));
+static std::shared_ptr<spdlog::details::thread_pool> g_thread_pool_ptr{ &g_thread_pool, [](spdlog::details::thread_pool*){} };
+
+// Posts to g_thread_pool (and reads of its counters) hold g_thread_pool_gate shared,
+// init_thread_pool holds it exclusively while rebuilding the pool in place, so no thread
+// uses a pool being destroyed. The rebuild releases the GIL (for the workers), so the gate
+// is only waited for with the GIL released. Rebuilt in forked children, like the pool
+static std::shared_mutex& g_thread_pool_gate = *new std::shared_mutex;
+
+class thread_pool_use {
+public:
+    explicit thread_pool_use(bool holds_gil = true) {
+        if(g_thread_pool_gate.try_lock_shared())
+            return;
+
+        if(holds_gil) {
+            nb::gil_scoped_release release;
+            g_thread_pool_gate.lock_shared();
+        }
+        else {
+            g_thread_pool_gate.lock_shared();
+        }
+    }
+
+    ~thread_pool_use() { g_thread_pool_gate.unlock_shared(); }
+
+    thread_pool_use(const thread_pool_use&) = delete;
+    thread_pool_use& operator=(const thread_pool_use&) = delete;
+};
+
+// Level gate attributes (logger.debug_enabled, ...), exposed as C getset descriptors so
+// `if logger.debug_enabled:` costs an attribute lookup rather than a bound method call.
+// They read the logger atomic level, so set_level (logger or global) is reflected at once
+static PyObject* logger_level_enabled(PyObject* self, void* closure) {
+    if(!nb::inst_ready(self)) {
+        PyErr_SetString(PyExc_RuntimeError, "logger is not initialized");
+        return nullptr;
+    }
+
+    const auto lvl = static_cast<spdlog::level::level_enum>(reinterpret_cast<intptr_t>(closure));
+
+    return PyBool_FromLong(nb::inst_ptr<spdlog::logger>(self)->should_log(lvl));
+}
+
+#define LEVEL_ENABLED_GETSET(name, lvl) \
+    { name, logger_level_enabled, nullptr, nullptr, reinterpret_cast<void*>(static_cast<intptr_t>(lvl)) }
+
+static PyGetSetDef logger_getset[] = {
+    LEVEL_ENABLED_GETSET("trace_enabled", spdlog::level::trace),
+    LEVEL_ENABLED_GETSET("debug_enabled", spdlog::level::debug),
+    LEVEL_ENABLED_GETSET("info_enabled", spdlog::level::info),
+    LEVEL_ENABLED_GETSET("warn_enabled", spdlog::level::warn),
+    LEVEL_ENABLED_GETSET("error_enabled", spdlog::level::err),
+    LEVEL_ENABLED_GETSET("critical_enabled", spdlog::level::critical),
+    { nullptr, nullptr, nullptr, nullptr, nullptr }
+};
+
+#undef LEVEL_ENABLED_GETSET
+
+// Message argument of the logging methods and sink.log: a str (viewed through its cached
+// UTF-8 representation) or any C-contiguous buffer (bytes, bytearray, memoryview...).
+// The message is viewed in place, never copied, and the buffer is held until the
+// message has been handed to spdlog (async loggers copy it into their queue)
+struct message_arg {
+    spdlog::string_view_t view;
+    Py_buffer buffer;
+    bool has_buffer = false;
+
+    message_arg() = default;
+    message_arg(const message_arg&) = delete;
+    message_arg& operator=(const message_arg&) = delete;
+
+    ~message_arg() {
+        if(this->has_buffer)
+            PyBuffer_Release(&this->buffer);
+    }
+
+    bool load(PyObject* obj) {
+        if(PyUnicode_Check(obj)) {
+            Py_ssize_t size;
+            const char* data = PyUnicode_AsUTF8AndSize(obj, &size);
+
+            if(data == nullptr)
+                return false;
+
+            this->view = spdlog::string_view_t(data, static_cast<size_t>(size));
+            return true;
+        }
+
+        if(PyBytes_Check(obj)) {
+            this->view = spdlog::string_view_t(PyBytes_AS_STRING(obj), static_cast<size_t>(PyBytes_GET_SIZE(obj)));
+            return true;
+        }
+
+        if(PyObject_CheckBuffer(obj)) {
+            if(PyObject_GetBuffer(obj, &this->buffer, PyBUF_SIMPLE) != 0)
+                return false;
+
+            this->has_buffer = true;
+            this->view = spdlog::string_view_t(static_cast<const char*>(this->buffer.buf),
+                                               static_cast<size_t>(this->buffer.len));
+            return true;
+        }
+
+        PyErr_Format(PyExc_TypeError, "expected str or bytes-like object, got %.200s", Py_TYPE(obj)->tp_name);
+        return false;
+    }
+};
+
+// Options adding work to the logging path (enable_source_location, enable_coarse_clock,
+// set_max_message_size, set_message_chunk_size, enable_sink_stats), in one word: with none
+// set, log_view checks them all with a single load
+enum log_option : unsigned {
+    log_source_location = 1u << 0,
+    log_coarse_clock = 1u << 1,
+    log_max_message_size = 1u << 2,
+    log_message_chunks = 1u << 3,
+    log_sink_stats = 1u << 4,
+};
+
+static std::atomic<unsigned> g_log_options{ 0 };
+
+static void set_log_option(log_option option, bool enabled) {
+    if(enabled)
+        g_log_options.fetch_or(option);
+    else
+        g_log_options.fetch_and(~static_cast<unsigned>(option));
+}
+
+static bool log_option_enabled(log_option option) {
+    return (g_log_options.load(std::memory_order_relaxed) & option) != 0;
+}
+
+// Source location capture (opt-in, see enable_source_location). The caller frame is read
+// through the C API and the file/function names are resolved once per code object, the
+// result being stored in an extra slot of the code object (freed along with it, so the
+// cache does not keep the code objects alive). spdlog::source_loc only stores pointers,
+// and async loggers keep them in their queue, so the names themselves are interned for
+// the lifetime of the module
+
+struct code_location {
+    const char* filename;
+    const char* funcname;  // qualified name where available, for %!
+    const char* name;      // co_name, for tracebacks (as printed by the traceback module)
+};
+
+// Stored in the extra slot of a code object: its location, and the source lines of the
+// tracebacks it appeared in (see source_line)
+struct code_info {
+    code_location location;
+    std::unordered_map<int, std::string> lines;
+};
+
+#if PY_VERSION_HEX >= 0x030C0000
+#define code_extra_index_request PyUnstable_Eval_RequestCodeExtraIndex
+#define code_extra_get PyUnstable_Code_GetExtra
+#define code_extra_set PyUnstable_Code_SetExtra
+#else
+#define code_extra_index_request _PyEval_RequestCodeExtraIndex
+#define code_extra_get _PyCode_GetExtra
+#define code_extra_set _PyCode_SetExtra
+#endif
+
+static nb::ft_mutex g_code_locations_mutex;
+static std::unordered_set<std::string> g_location_names;
+
+static const char* intern_location_name(PyObject* code, const char* attr, const char* fallback_attr) {
+    PyObject* name = PyObject_GetAttrString(code, attr);
+
+    if(name == nullptr && fallback_attr != nullptr) {
+        PyErr_Clear();
+        name = PyObject_GetAttrString(code, fallback_attr);
+    }
+
+    const char* utf8 = name != nullptr && PyUnicode_Check(name) ? PyUnicode_AsUTF8(name) : nullptr;
+    const char* interned = g_location_names.emplace(utf8 != nullptr ? utf8 : "").first->c_str();
+
+    Py_XDECREF(name);
+    PyErr_Clear();
+
+    return interned;
+}
+
+static Py_ssize_t code_info_index() {
+    static const Py_ssize_t index = code_extra_index_request([](void* extra) { delete static_cast<code_info*>(extra); });
+    return index;
+}
+
+// Returns the info stored in a code object, or nullptr. Called with g_code_locations_mutex held
+static code_info* find_code_info(PyObject* code_obj) {
+    const Py_ssize_t index = code_info_index();
+    void* extra = nullptr;
+
+    if(index >= 0 && code_extra_get(code_obj, index, &extra) == 0 && extra != nullptr)
+        return static_cast<code_info*>(extra);
+
+    PyErr_Clear();
+    return nullptr;
+}
+
+static code_location get_code_location(PyCodeObject* code) {
+    const Py_ssize_t index = code_info_index();
+
+    nb::ft_lock_guard lock(g_code_locations_mutex);
+    PyObject* code_obj = reinterpret_cast<PyObject*>(code);
+
+    if(const code_info* info = find_code_info(code_obj))
+        return info->location;
+
+    code_location location;
+    location.filename = intern_location_name(code_obj, "co_filename", nullptr);
+    location.funcname = intern_location_name(code_obj, "co_qualname", "co_name");
+    location.name = intern_location_name(code_obj, "co_name", nullptr);
+
+    // Without a slot (all the indexes taken by other extensions), resolved on every call
+    if(index >= 0) {
+        auto stored = std::make_unique<code_info>(code_info{ location, {} });
+
+        if(code_extra_set(code_obj, index, stored.get()) == 0)
+            stored.release();
+        else
+            PyErr_Clear();
+    }
+
+    return location;
+}
+
+static spdlog::source_loc caller_source_loc() {
+    if(!log_option_enabled(log_source_location))
+        return spdlog::source_loc{};
+
+    PyFrameObject* frame = PyEval_GetFrame();
+
+    if(frame == nullptr)
+        return spdlog::source_loc{};
+
+    PyCodeObject* code = PyFrame_GetCode(frame);
+    const code_location location = get_code_location(code);
+    Py_DECREF(code);
+
+    return spdlog::source_loc{ location.filename, PyFrame_GetLineNumber(frame), location.funcname };
+}
+
+// Record timestamps (opt-in coarse clock, see enable_coarse_clock). The coarse clock is
+// the kernel tick time, read without a syscall or a hardware counter, at the cost of a
+// resolution of a few milliseconds. It is only available on Linux and Windows, elsewhere
+// the precise clock is always used
+static spdlog::log_clock::time_point log_time() {
+#if defined(__linux__) && defined(CLOCK_REALTIME_COARSE)
+    if(log_option_enabled(log_coarse_clock)) {
+        timespec ts;
+        ::clock_gettime(CLOCK_REALTIME_COARSE, &ts);
+
+        return spdlog::log_clock::time_point(std::chrono::duration_cast<spdlog::log_clock::duration>(
+            std::chrono::seconds(ts.tv_sec) + std::chrono::nanoseconds(ts.tv_nsec)));
+    }
+#elif defined(_WIN32)
+    if(log_option_enabled(log_coarse_clock)) {
+        FILETIME ft;
+        ::GetSystemTimeAsFileTime(&ft);
+
+        // 100ns intervals since 1601-01-01
+        const int64_t ticks = static_cast<int64_t>((static_cast<uint64_t>(ft.dwHighDateTime) << 32) | ft.dwLowDateTime) - 116444736000000000LL;
+
+        return spdlog::log_clock::time_point(std::chrono::duration_cast<spdlog::log_clock::duration>(
+            std::chrono::duration<int64_t, std::ratio<1, 10000000>>(ticks)));
+    }
+#endif
+
+    return spdlog::details::os::now();
+}
+
+static const char* const log_method_names[] = { "trace", "debug", "info", "warn", "error", "critical", "off" };
+
+// Pattern formatters. set_pattern (global, logger or sink) interns the pattern by
+// (pattern, time type) and installs an interned_formatter: spdlog clones the formatter
+// for every sink (and the registry for every logger), and cloning an interned_formatter
+// only copies the interned key, where cloning a pattern_formatter parses the pattern
+// again. Each sink compiles its own pattern_formatter the first time it formats a
+// message, under the sink lock: a compiled formatter holds per-sink state (cached time
+// and buffers), and pattern_formatter::clone parses again, so compiling a shared
+// prototype and cloning it would not save the parse.
+// A pattern starting with date and time flags that only change every second
+// ("[%Y-%m-%d %H:%M:%S" in "[%Y-%m-%d %H:%M:%S.%e] %v") is compiled as two formatters,
+// and the formatted prefix is reused for all the messages logged within the same second
+struct pattern_key {
+    std::string pattern;
+    spdlog::pattern_time_type time_type;
+    size_t prefix_size;
+};
+
+// Returns the size of the leading part of the pattern made of literal text and flags
+// formatted from the seconds of the timestamp, or 0 if there is no such flag
+static size_t seconds_prefix_size(const std::string& pattern) {
+    static const std::string seconds_flags = "aAbhBcCYDxmdHIMSprRTXzE";
+
+    size_t size = 0;
+    bool has_flag = false;
+
+    for(size_t i = 0; i < pattern.size(); i++) {
+        if(pattern[i] != '%')
+            continue;
+
+        if(i + 1 >= pattern.size())
+            break;
+
+        const char flag = pattern[i + 1];
+
+        if(flag != '%' && seconds_flags.find(flag) == std::string::npos) {
+            size = i;
+            break;
+        }
+
+        has_flag |= flag != '%';
+        i++;
+        size = i + 1;
+    }
+
+    // Literal text after the last flag is part of the prefix if the pattern ends there
+    if(size != 0 && pattern.find('%', size) == std::string::npos)
+        size = pattern.size();
+
+    return has_flag ? size : 0;
+}
+
+static std::mutex g_patterns_mutex;
+static std::unordered_map<std::string, std::weak_ptr<const pattern_key>> g_patterns;
+static size_t g_patterns_purge_size = 64;
+
+static std::shared_ptr<const pattern_key> intern_pattern(const std::string& pattern, spdlog::pattern_time_type time_type) {
+    std::string name = pattern;
+    name.push_back(time_type == spdlog::pattern_time_type::utc ? 'u' : 'l');
+
+    std::lock_guard<std::mutex> lock(g_patterns_mutex);
+
+    std::weak_ptr<const pattern_key>& entry = g_patterns[name];
+    std::shared_ptr<const pattern_key> key = entry.lock();
+
+    if(key)
+        return key;
+
+    key = std::make_shared<const pattern_key>(pattern_key{ pattern, time_type, seconds_prefix_size(pattern) });
+    entry = key;
+
+    // Patterns no longer used by any formatter are dropped once the table has doubled
+    if(g_patterns.size() >= g_patterns_purge_size) {
+        for(auto it = g_patterns.begin(); it != g_patterns.end();)
+            it = it->second.expired() ? g_patterns.erase(it) : std::next(it);
+
+        g_patterns_purge_size = std::max<size_t>(64, g_patterns.size() * 2);
+    }
+
+    return key;
+}
+
+class interned_formatter final : public spdlog::formatter {
+public:
+    explicit interned_formatter(std::shared_ptr<const pattern_key> key) : key_(std::move(key)) {}
+
+    void format(const spdlog::details::log_msg& msg, spdlog::memory_buf_t& dest) override {
+        if(!formatter_)
+            compile();
+
+        if(prefix_formatter_) {
+            const auto seconds = std::chrono::duration_cast<std::chrono::seconds>(msg.time.time_since_epoch());
+
+            if(seconds != prefix_seconds_) {
+                prefix_.clear();
+                prefix_formatter_->format(msg, prefix_);
+                prefix_seconds_ = seconds;
+            }
+
+            dest.append(prefix_.data(), prefix_.data() + prefix_.size());
+        }
+
+        formatter_->format(msg, dest);
+    }
+
+    std::unique_ptr<spdlog::formatter> clone() const override {
+        return std::make_unique<interned_formatter>(key_);
+    }
+
+private:
+    void compile() {
+        if(key_->prefix_size == 0) {
+            formatter_ = std::make_unique<spdlog::pattern_formatter>(key_->pattern, key_->time_type);
+            return;
+        }
+
+        prefix_formatter_ = std::make_unique<spdlog::pattern_formatter>(key_->pattern.substr(0, key_->prefix_size), key_->time_type, "");
+        formatter_ = std::make_unique<spdlog::pattern_formatter>(key_->pattern.substr(key_->prefix_size), key_->time_type);
+        prefix_seconds_ = std::chrono::seconds::min();
+    }
+
+    std::shared_ptr<const pattern_key> key_;
+    std::unique_ptr<spdlog::pattern_formatter> formatter_;
+    std::unique_ptr<spdlog::pattern_formatter> prefix_formatter_;
+    spdlog::memory_buf_t prefix_;
+    std::chrono::seconds prefix_seconds_;
+};
+
+static std::unique_ptr<spdlog::formatter> make_formatter(const std::string& pattern, spdlog::pattern_time_type time_type) {
+    return std::make_unique<interned_formatter>(intern_pattern(pattern, time_type));
+}
+
+// Stats. Loggers created by the bindings (constructors, factories, async_logger, clone)
+// own a logger_record, whose message counters are updated by the logging entry points.
+// Each thread logging to a logger counts in counters of its own (thread_counters), which
+// only it writes, with a relaxed load and store rather than a locked read-modify-write,
+// so counting costs a few plain additions and threads never share a counter cache line.
+// stats adds up the counters of the threads, and a thread folds its counters into the
+// record when it stops using them (see logger_record_cache_entry). The per-sink counters,
+// a check of each sink level per message, are opt-in (see enable_sink_stats). spdlog loggers and sinks cannot be subclassed (async_logger and the sinks are
+// final), so records live in a table keyed by logger address, guarded by a mutex that is
+// never held while calling into Python. The shared_ptr deleter of a logger (which can
+// run on any thread, e.g. an async worker) marks its record dead and removes it before
+// deleting it. The logging entry points look records up through a small per-thread cache
+// of the records found: an entry stays valid while its record is alive (a dead record
+// means its address may now be another logger's), so the table is only searched on a miss
+static constexpr double flush_latency_bounds[] = { 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0 };
+static constexpr size_t flush_latency_buckets = sizeof(flush_latency_bounds) / sizeof(double) + 1;
+
+struct latency_histogram {
+    std::atomic<uint64_t> buckets[flush_latency_buckets] = {};
+    std::atomic<uint64_t> sum_ns{ 0 };
+    std::atomic<uint64_t> count{ 0 };
+
+    void record(std::chrono::nanoseconds elapsed) {
+        const double seconds = std::chrono::duration<double>(elapsed).count();
+        size_t bucket = 0;
+
+        while(bucket < flush_latency_buckets - 1 && seconds > flush_latency_bounds[bucket])
+            bucket++;
+
+        this->buckets[bucket].fetch_add(1, std::memory_order_relaxed);
+        this->sum_ns.fetch_add(static_cast<uint64_t>(elapsed.count()), std::memory_order_relaxed);
+        this->count.fetch_add(1, std::memory_order_relaxed);
+    }
+};
+
+// Adds to a counter with a single writer (or written under a mutex)
+static void add_to_counter(std::atomic<uint64_t>& counter, uint64_t value) {
+    counter.store(counter.load(std::memory_order_relaxed) + value, std::memory_order_relaxed);
+}
+
+struct sink_counters {
+    std::atomic<uint64_t> messages{ 0 };
+    std::atomic<uint64_t> bytes{ 0 };
+};
+
+struct alignas(64) thread_counters {
+    std::atomic<uint64_t> messages[spdlog::level::n_levels] = {};
+    std::atomic<uint64_t> bytes{ 0 };
+    std::atomic<uint64_t> truncated{ 0 };
+    size_t n_sinks;
+    std::unique_ptr<sink_counters[]> sinks;
+
+    explicit thread_counters(size_t n_sinks) : n_sinks(n_sinks), sinks(new sink_counters[n_sinks]) {}
+
+    void count(const spdlog::logger& logger, spdlog::level::level_enum lvl, size_t size, bool truncated, bool sinks) {
+        add_to_counter(this->messages[lvl], 1);
+        add_to_counter(this->bytes, size);
+
+        if(truncated)
+            add_to_counter(this->truncated, 1);
+
+        if(!sinks)
+            return;
+
+        const auto& logger_sinks = logger.sinks();
+        const size_t n_logger_sinks = std::min(logger_sinks.size(), this->n_sinks);
+
+        for(size_t i = 0; i < n_logger_sinks; i++) {
+            if(logger_sinks[i]->should_log(lvl)) {
+                add_to_counter(this->sinks[i].messages, 1);
+                add_to_counter(this->sinks[i].bytes, size);
+            }
+        }
+    }
+
+    void add(const thread_counters& other) {
+        for(int lvl = 0; lvl < spdlog::level::n_levels; lvl++)
+            add_to_counter(this->messages[lvl], other.messages[lvl].load(std::memory_order_relaxed));
+
+        add_to_counter(this->bytes, other.bytes.load(std::memory_order_relaxed));
+        add_to_counter(this->truncated, other.truncated.load(std::memory_order_relaxed));
+
+        for(size_t i = 0; i < std::min(this->n_sinks, other.n_sinks); i++) {
+            add_to_counter(this->sinks[i].messages, other.sinks[i].messages.load(std::memory_order_relaxed));
+            add_to_counter(this->sinks[i].bytes, other.sinks[i].bytes.load(std::memory_order_relaxed));
+        }
+    }
+};
+
+struct logger_record {
+    std::atomic<bool> alive{ true };
+    bool is_async;
+    size_t n_sinks;
+    latency_histogram flush_latency;
+
+    // Counters of the threads using the logger, and the sum of those of the threads that
+    // stopped using it
+    std::mutex counters_mutex;
+    std::vector<std::unique_ptr<thread_counters>> threads;
+    thread_counters retired;
+
+    logger_record(size_t n_sinks, bool is_async) : is_async(is_async), n_sinks(n_sinks), retired(n_sinks) {}
+
+    thread_counters* attach_thread() {
+        auto counters = std::make_unique<thread_counters>(this->n_sinks);
+
+        std::lock_guard<std::mutex> lock(this->counters_mutex);
+        this->threads.push_back(std::move(counters));
+
+        return this->threads.back().get();
+    }
+
+    // Called by the thread owning the counters
+    void detach_thread(thread_counters* counters) {
+        std::unique_ptr<thread_counters> detached;
+
+        std::lock_guard<std::mutex> lock(this->counters_mutex);
+        this->retired.add(*counters);
+
+        for(auto& entry : this->threads) {
+            if(entry.get() == counters) {
+                detached = std::move(entry);
+                entry = std::move(this->threads.back());
+                this->threads.pop_back();
+                break;
+            }
+        }
+    }
+
+    void sum(thread_counters& total) {
+        std::lock_guard<std::mutex> lock(this->counters_mutex);
+        total.add(this->retired);
+
+        for(const auto& counters : this->threads)
+            total.add(*counters);
+    }
+};
+
+// Each slot of the async queue holds its record (logger name and payload) in an inline
+// buffer of slot_capacity bytes, preallocated with the queue; larger records are copied
+// to the heap, counted by heap_fallback
+struct thread_pool_counters {
+    static inline const size_t slot_capacity = spdlog::memory_buf_t().capacity();
+
+    std::atomic<size_t> queue_high_water_mark{ 0 };
+    std::atomic<size_t> heap_fallback{ 0 };
+
+    void sample(size_t queue_size) {
+        size_t current = this->queue_high_water_mark.load(std::memory_order_relaxed);
+
+        while(queue_size > current && !this->queue_high_water_mark.compare_exchange_weak(current, queue_size, std::memory_order_relaxed));
+    }
+};
+
+static thread_pool_counters g_thread_pool_counters;
+
+static std::mutex g_logger_records_mutex;
+static std::unordered_map<const spdlog::logger*, std::shared_ptr<logger_record>> g_logger_records;
+
+struct logger_deleter {
+    std::shared_ptr<logger_record> record;
+
+    void operator()(spdlog::logger* logger) const {
+        this->record->alive.store(false);
+
+        {
+            std::lock_guard<std::mutex> lock(g_logger_records_mutex);
+            auto it = g_logger_records.find(logger);
+
+            if(it != g_logger_records.end() && it->second == this->record)
+                g_logger_records.erase(it);
+        }
+
+        delete logger;
+    }
+};
+
+template<typename Logger, typename... Args>
+static std::shared_ptr<Logger> make_logger(Args&&... args) {
+    Logger* logger = new Logger(std::forward<Args>(args)...);
+    auto record = std::make_shared<logger_record>(logger->sinks().size(), std::is_same<Logger, spdlog::async_logger>::value);
+
+    {
+        std::lock_guard<std::mutex> lock(g_logger_records_mutex);
+        g_logger_records[logger] = record;
+    }
+
+    return std::shared_ptr<Logger>(logger, logger_deleter{ record });
+}
+
+// Gives a record to a logger created outside the bindings (the default logger of spdlog).
+// Its deleter cannot remove the record, so the logger is kept alive for the lifetime of
+// the process and its address is never reused
+static void adopt_logger(std::shared_ptr<spdlog::logger> logger) {
+    auto record = std::make_shared<logger_record>(logger->sinks().size(), dynamic_cast<spdlog::async_logger*>(logger.get()) != nullptr);
+
+    std::lock_guard<std::mutex> lock(g_logger_records_mutex);
+
+    if(g_logger_records.emplace(logger.get(), record).second)
+        new std::shared_ptr<spdlog::logger>(std::move(logger));
+}
+
+// Per-thread cache of the records found. The entries are plain pointers, so the cache is a
+// constant-initialized thread_local read without an initialization guard. The records are
+// kept alive by the owner of the cache of the thread, created on the first miss, which
+// folds the counters of the thread into their records when an entry is replaced or the
+// thread exits: a record has counters for the threads that have it in their cache at most
+struct logger_record_cache_entry {
+    const spdlog::logger* logger;
+    logger_record* record;
+    thread_counters* counters;  // of the thread, created when it first logs to the logger
+
+    thread_counters& thread() {
+        if(this->counters == nullptr)
+            this->counters = this->record->attach_thread();
+
+        return *this->counters;
+    }
+};
+
+static constexpr size_t logger_record_cache_size = 16;
+static thread_local logger_record_cache_entry t_logger_record_cache[logger_record_cache_size];
+
+struct logger_record_cache_owner {
+    std::shared_ptr<logger_record> records[logger_record_cache_size];
+
+    ~logger_record_cache_owner() {
+        for(size_t index = 0; index < logger_record_cache_size; index++)
+            this->release(index);
+    }
+
+    void release(size_t index) {
+        logger_record_cache_entry& entry = t_logger_record_cache[index];
+
+        if(entry.counters != nullptr)
+            entry.record->detach_thread(entry.counters);
+
+        entry = logger_record_cache_entry{};
+        this->records[index].reset();
+    }
+};
+
+static logger_record_cache_entry* cache_logger_record(const spdlog::logger* logger, size_t index) {
+    thread_local logger_record_cache_owner owner;
+    std::shared_ptr<logger_record> record;
+
+    {
+        std::lock_guard<std::mutex> lock(g_logger_records_mutex);
+        auto it = g_logger_records.find(logger);
+
+        if(it == g_logger_records.end())
+            return nullptr;
+
+        record = it->second;
+    }
+
+    owner.release(index);
+    owner.records[index] = std::move(record);
+    t_logger_record_cache[index] = logger_record_cache_entry{ logger, owner.records[index].get(), nullptr };
+
+    return &t_logger_record_cache[index];
+}
+
+static logger_record_cache_entry* find_logger_record(const spdlog::logger* logger) {
+    // Fibonacci hashing, loggers of the same size are allocated at regular intervals
+    const size_t index = static_cast<size_t>((static_cast<uint64_t>(reinterpret_cast<uintptr_t>(logger)) * UINT64_C(0x9E3779B97F4A7C15)) >> 60);
+    logger_record_cache_entry& entry = t_logger_record_cache[index];
+
+    if(entry.logger == logger && entry.record != nullptr && entry.record->alive.load(std::memory_order_acquire))
+        return &entry;
+
+    return cache_logger_record(logger, index);
+}
+
+// Snapshot of the live records with their logger names, sorted by name
+static std::vector<std::pair<std::string, std::shared_ptr<logger_record>>> logger_records_by_name() {
+    std::vector<std::pair<std::string, std::shared_ptr<logger_record>>> records;
+
+    {
+        std::lock_guard<std::mutex> lock(g_logger_records_mutex);
+
+        for(const auto& entry : g_logger_records)
+            records.emplace_back(entry.first->name(), entry.second);
+    }
+
+    std::sort(records.begin(), records.end(), [](const auto& a, const auto& b) { return a.first < b.first; });
+
+    return records;
+}
+
+// Factory passed to the spdlog logger factories (stdout_color_mt...) so the loggers they
+// create and register have a logger_record
+struct record_factory {
+    template<typename Sink, typename... SinkArgs>
+    static std::shared_ptr<spdlog::logger> create(std::string logger_name, SinkArgs&&... args) {
+        auto sink = std::make_shared<Sink>(std::forward<SinkArgs>(args)...);
+        auto new_logger = make_logger<spdlog::logger>(std::move(logger_name), std::move(sink));
+        spdlog::details::registry::instance().initialize_logger(new_logger);
+        return new_logger;
+    }
+};
+
+// Defined with per_thread_logger, returns nullptr if self is not a per_thread_logger
+static std::shared_ptr<spdlog::logger> clone_per_thread_logger(spdlog::logger& self, const std::string& logger_name);
+
+// spdlog::logger::clone (overridden by async_logger) renames a copy without record, which
+// make_logger copies again. per_thread_logger::clone creates its copy with make_logger
+static std::shared_ptr<spdlog::logger> clone_logger(spdlog::logger& self, std::string logger_name) {
+    if(auto cloned = clone_per_thread_logger(self, logger_name))
+        return cloned;
+
+    std::shared_ptr<spdlog::logger> renamed = self.clone(std::move(logger_name));
+
+    if(const auto* async_renamed = dynamic_cast<const spdlog::async_logger*>(renamed.get()))
+        return make_logger<spdlog::async_logger>(*async_renamed);
+
+    return make_logger<spdlog::logger>(*renamed);
+}
+
+static nb::dict logger_record_stats(const std::string& name, logger_record& record) {
+    thread_counters counters(record.n_sinks);
+    record.sum(counters);
+
+    nb::dict messages;
+
+    for(int lvl = spdlog::level::trace; lvl < spdlog::level::off; lvl++)
+        messages[log_method_names[lvl]] = counters.messages[lvl].load();
+
+    nb::list sinks;
+
+    for(size_t i = 0; i < counters.n_sinks; i++) {
+        nb::dict sink;
+        sink["messages"] = counters.sinks[i].messages.load();
+        sink["bytes"] = counters.sinks[i].bytes.load();
+        sinks.append(sink);
+    }
+
+    nb::list buckets;
+    uint64_t cumulative = 0;
+
+    for(size_t i = 0; i < flush_latency_buckets; i++) {
+        cumulative += record.flush_latency.buckets[i].load();
+        const double bound = i < flush_latency_buckets - 1 ? flush_latency_bounds[i] : std::numeric_limits<double>::infinity();
+        buckets.append(nb::make_tuple(bound, cumulative));
+    }
+
+    nb::dict flush_latency;
+    flush_latency["buckets"] = buckets;
+    flush_latency["sum"] = static_cast<double>(record.flush_latency.sum_ns.load()) * 1e-9;
+    flush_latency["count"] = record.flush_latency.count.load();
+
+    nb::dict stats;
+    stats["name"] = name;
+    stats["async"] = record.is_async;
+    stats["messages"] = messages;
+    stats["bytes"] = counters.bytes.load();
+    stats["truncated"] = counters.truncated.load();
+    stats["sinks"] = sinks;
+    stats["flush_latency"] = flush_latency;
+
+    return stats;
+}
+
+// With reset, the high water mark starts over from the current queue size
+static nb::dict thread_pool_stats(bool reset) {
+    thread_pool_use use;
+
+    nb::dict stats;
+    stats["queue_size"] = g_thread_pool.queue_size();
+    stats["queue_capacity"] = g_thread_pool_options.queue_size;
+    stats["queue_high_water_mark"] = reset
+        ? g_thread_pool_counters.queue_high_water_mark.exchange(g_thread_pool.queue_size())
+        : g_thread_pool_counters.queue_high_water_mark.load();
+    stats["overrun"] = g_thread_pool.overrun_counter();
+    stats["slot_capacity"] = thread_pool_counters::slot_capacity;
+    stats["heap_fallback"] = g_thread_pool_counters.heap_fallback.load();
+
+    return stats;
+}
+
+static nb::dict all_stats() {
+    nb::list loggers;
+
+    for(const auto& record : logger_records_by_name())
+        loggers.append(logger_record_stats(record.first, *record.second));
+
+    nb::dict stats;
+    stats["loggers"] = loggers;
+    stats["thread_pool"] = thread_pool_stats(false);
+
+    return stats;
+}
+
+// Prometheus text exposition format (version 0.0.4)
+static std::string prometheus_label(const std::string& value) {
+    std::string escaped;
+    escaped.reserve(value.size());
+
+    for(const char c : value) {
+        if(c == '\\' || c == '"')
+            escaped.push_back('\\');
+
+        if(c == '\n')
+            escaped.append("\\n");
+        else
+            escaped.push_back(c);
+    }
+
+    return escaped;
+}
+
+static std::string prometheus_stats() {
+    spdlog::memory_buf_t buf;
+    auto out = std::back_inserter(buf);
+
+    auto loggers = logger_records_by_name();
+    std::vector<std::unique_ptr<thread_counters>> counters;
+
+    for(auto& logger : loggers) {
+        logger.first = prometheus_label(logger.first);
+        counters.push_back(std::make_unique<thread_counters>(logger.second->n_sinks));
+        logger.second->sum(*counters.back());
+    }
+
+    buf.append(spdlog::string_view_t("# HELP spydlog_messages_total Messages logged, by logger and level.\n"
+                                     "# TYPE spydlog_messages_total counter\n"));
+
+    for(size_t n = 0; n < loggers.size(); n++)
+        for(int lvl = spdlog::level::trace; lvl < spdlog::level::off; lvl++)
+            spdlog::fmt_lib::format_to(out, "spydlog_messages_total{{logger=\"{}\",level=\"{}\"}} {}\n",
+                                       loggers[n].first, log_method_names[lvl], counters[n]->messages[lvl].load());
+
+    buf.append(spdlog::string_view_t("# HELP spydlog_bytes_total Message payload bytes logged, by logger.\n"
+                                     "# TYPE spydlog_bytes_total counter\n"));
+
+    for(size_t n = 0; n < loggers.size(); n++)
+        spdlog::fmt_lib::format_to(out, "spydlog_bytes_total{{logger=\"{}\"}} {}\n", loggers[n].first, counters[n]->bytes.load());
+
+    buf.append(spdlog::string_view_t("# HELP spydlog_sink_messages_total Messages accepted by each sink of a logger.\n"
+                                     "# TYPE spydlog_sink_messages_total counter\n"));
+
+    for(size_t n = 0; n < loggers.size(); n++)
+        for(size_t i = 0; i < counters[n]->n_sinks; i++)
+            spdlog::fmt_lib::format_to(out, "spydlog_sink_messages_total{{logger=\"{}\",sink=\"{}\"}} {}\n",
+                                       loggers[n].first, i, counters[n]->sinks[i].messages.load());
+
+    buf.append(spdlog::string_view_t("# HELP spydlog_sink_bytes_total Message payload bytes accepted by each sink of a logger.\n"
+                                     "# TYPE spydlog_sink_bytes_total counter\n"));
+
+    for(size_t n = 0; n < loggers.size(); n++)
+        for(size_t i = 0; i < counters[n]->n_sinks; i++)
+            spdlog::fmt_lib::format_to(out, "spydlog_sink_bytes_total{{logger=\"{}\",sink=\"{}\"}} {}\n",
+                                       loggers[n].first, i, counters[n]->sinks[i].bytes.load());
+
+    buf.append(spdlog::string_view_t("# HELP spydlog_flush_duration_seconds Duration of logger flushes.\n"
+                                     "# TYPE spydlog_flush_duration_seconds histogram\n"));
+
+    for(const auto& logger : loggers) {
+        const latency_histogram& histogram = logger.second->flush_latency;
+        uint64_t cumulative = 0;
+
+        for(size_t i = 0; i < flush_latency_buckets - 1; i++) {
+            cumulative += histogram.buckets[i].load();
+            spdlog::fmt_lib::format_to(out, "spydlog_flush_duration_seconds_bucket{{logger=\"{}\",le=\"{}\"}} {}\n",
+                                       logger.first, flush_latency_bounds[i], cumulative);
+        }
+
+        spdlog::fmt_lib::format_to(out, "spydlog_flush_duration_seconds_bucket{{logger=\"{}\",le=\"+Inf\"}} {}\n",
+                                   logger.first, histogram.count.load());
+        spdlog::fmt_lib::format_to(out, "spydlog_flush_duration_seconds_sum{{logger=\"{}\"}} {}\n",
+                                   logger.first, static_cast<double>(histogram.sum_ns.load()) * 1e-9);
+        spdlog::fmt_lib::format_to(out, "spydlog_flush_duration_seconds_count{{logger=\"{}\"}} {}\n",
+                                   logger.first, histogram.count.load());
+    }
+
+    thread_pool_use use;
+
+    spdlog::fmt_lib::format_to(out,
+        "# HELP spydlog_thread_pool_queue_size Messages waiting in the async thread pool queue.\n"
+        "# TYPE spydlog_thread_pool_queue_size gauge\n"
+        "spydlog_thread_pool_queue_size {}\n"
+        "# HELP spydlog_thread_pool_queue_capacity Capacity of the async thread pool queue.\n"
+        "# TYPE spydlog_thread_pool_queue_capacity gauge\n"
+        "spydlog_thread_pool_queue_capacity {}\n"
+        "# HELP spydlog_thread_pool_queue_high_water_mark Highest queue size observed when posting a message.\n"
+        "# TYPE spydlog_thread_pool_queue_high_water_mark gauge\n"
+        "spydlog_thread_pool_queue_high_water_mark {}\n"
+        "# HELP spydlog_thread_pool_overrun_total Messages dropped because the queue was full.\n"
+        "# TYPE spydlog_thread_pool_overrun_total counter\n"
+        "spydlog_thread_pool_overrun_total {}\n"
+        "# HELP spydlog_thread_pool_heap_fallback_total Messages too large for the inline buffer of a queue slot.\n"
+        "# TYPE spydlog_thread_pool_heap_fallback_total counter\n"
+        "spydlog_thread_pool_heap_fallback_total {}\n",
+        g_thread_pool.queue_size(),
+        g_thread_pool_options.queue_size,
+        g_thread_pool_counters.queue_high_water_mark.load(),
+        g_thread_pool.overrun_counter(),
+        g_thread_pool_counters.heap_fallback.load());
+
+    return std::string(buf.data(), buf.size());
+}
+
+// Message size limits (set_max_message_size, set_message_chunk_size), 0 for no limit.
+// Longer messages are truncated to the maximum size. Messages longer than the chunk size
+// are logged as consecutive records of at most the chunk size, so neither the async
+// queue nor the sinks hold a copy of the whole message: a chunk ends after its last
+// newline (which is dropped, the sinks adding their own), or at the chunk size
+static nb::ft_mutex g_message_limits_mutex;
+static std::atomic<size_t> g_max_message_size{ 0 };
+static std::atomic<size_t> g_message_chunk_size{ 0 };
+static constexpr size_t min_message_chunk_size = 4;
+
+// Largest prefix of at most size bytes that does not end inside a UTF-8 sequence. A
+// message that is not UTF-8 (a bytes-like message) is cut at size
+static size_t utf8_prefix_size(spdlog::string_view_t msg, size_t size) {
+    if(size >= msg.size())
+        return msg.size();
+
+    const auto continuation = [&](size_t i) { return (static_cast<unsigned char>(msg.data()[i]) & 0xC0) == 0x80; };
+    size_t end = size;
+
+    while(end > 0 && size - end < 3 && continuation(end))
+        end--;
+
+    return continuation(end) ? size : end;
+}
+
+static void log_record(spdlog::logger* logger, logger_record* record, const spdlog::log_clock::time_point& time,
+                       const spdlog::source_loc& loc, spdlog::level::level_enum lvl, spdlog::string_view_t msg) {
+    if(record == nullptr || !record->is_async) {
+        logger->log(time, loc, lvl, msg);
+        return;
+    }
+
+#ifdef Py_GIL_DISABLED
+    // Posting to a full queue blocks (overflow_policy block); without a GIL the thread
+    // must be detached meanwhile, or a stop-the-world pause (fork, garbage collection)
+    // would wait for it forever
+    nb::gil_scoped_release release;
+    thread_pool_use use(false);
+#else
+    thread_pool_use use;
+#endif
+
+    logger->log(time, loc, lvl, msg);
+    g_thread_pool_counters.sample(g_thread_pool.queue_size());
+
+    if(logger->name().size() + msg.size() > thread_pool_counters::slot_capacity)
+        g_thread_pool_counters.heap_fallback.fetch_add(1, std::memory_order_relaxed);
+}
+
+// Logs a message longer than the chunk size as consecutive records, kept out of log_view
+static void log_chunks(spdlog::logger* logger, logger_record* record, spdlog::level::level_enum lvl,
+                       spdlog::string_view_t msg, size_t chunk_size) {
+    const spdlog::source_loc loc = caller_source_loc();
+    const spdlog::log_clock::time_point time = log_time();
+
+    while(msg.size() > chunk_size) {
+        const char* newline = nullptr;
+
+        for(size_t i = chunk_size; i > 0 && newline == nullptr; i--) {
+            if(msg.data()[i - 1] == '\n')
+                newline = msg.data() + i - 1;
+        }
+
+        const size_t size = newline != nullptr ? static_cast<size_t>(newline - msg.data()) : utf8_prefix_size(msg, chunk_size);
+        const size_t next = newline != nullptr ? size + 1 : size;
+
+        log_record(logger, record, time, loc, lvl, spdlog::string_view_t(msg.data(), size));
+        msg = spdlog::string_view_t(msg.data() + next, msg.size() - next);
+    }
+
+    log_record(logger, record, time, loc, lvl, msg);
+}
+
+// Logs a message that passed the level check, updating the logger stats if it has a record
+static void log_view(spdlog::logger* logger, spdlog::level::level_enum lvl, spdlog::string_view_t msg) {
+    logger_record_cache_entry* entry = find_logger_record(logger);
+    logger_record* record = entry != nullptr ? entry->record : nullptr;
+    const unsigned options = g_log_options.load(std::memory_order_relaxed);
+
+    if(options == 0) {
+        if(entry != nullptr)
+            entry->thread().count(*logger, lvl, msg.size(), false, false);
+
+        log_record(logger, record, spdlog::details::os::now(), spdlog::source_loc{}, lvl, msg);
+        return;
+    }
+
+    const size_t max_size = (options & log_max_message_size) != 0 ? g_max_message_size.load(std::memory_order_relaxed) : 0;
+    const bool truncated = max_size > 0 && msg.size() > max_size;
+
+    if(truncated)
+        msg = spdlog::string_view_t(msg.data(), utf8_prefix_size(msg, max_size));
+
+    if(entry != nullptr)
+        entry->thread().count(*logger, lvl, msg.size(), truncated, (options & log_sink_stats) != 0);
+
+    const size_t chunk_size = (options & log_message_chunks) != 0 ? g_message_chunk_size.load(std::memory_order_relaxed) : 0;
+
+    if(chunk_size > 0 && msg.size() > chunk_size)
+        log_chunks(logger, record, lvl, msg, chunk_size);
+    else
+        log_record(logger, record, log_time(), caller_source_loc(), lvl, msg);
+}
+
+// Fast logging entry points. The hot logging methods are plain METH_FASTCALL functions
+// rather than nanobind overloads: the level is checked before anything else, and the
+// message is passed to spdlog as a view (see message_arg), so no argument tuple,
+// overload resolution or std::string copy is involved
+static PyObject* log_message(spdlog::logger* logger, spdlog::level::level_enum lvl, PyObject* obj) {
+    if(logger == nullptr || !logger->should_log(lvl))
+        Py_RETURN_NONE;
+
+    message_arg msg;
+
+    if(!msg.load(obj))
+        return nullptr;
+
+    try {
+        log_view(logger, lvl, msg.view);
+    } catch(nb::python_error& e) {
+        // Raised by the sink factory of a per_thread_logger
+        e.restore();
+        return nullptr;
+    } catch(const std::exception& e) {
+        PyErr_SetString(PyExc_RuntimeError, e.what());
+        return nullptr;
+    }
+
+    Py_RETURN_NONE;
+}
+
+static bool check_nargs(const char* name, Py_ssize_t nargs, Py_ssize_t expected) {
+    if(nargs == expected)
+        return true;
+
+    PyErr_Format(PyExc_TypeError, "%s() takes exactly %zd argument(s) (%zd given)", name, expected, nargs);
+    return false;
+}
+
+static spdlog::logger* logger_from_self(PyObject* self) {
+    if(!nb::inst_ready(self)) {
+        PyErr_SetString(PyExc_RuntimeError, "logger is not initialized");
+        return nullptr;
+    }
+
+    return nb::inst_ptr<spdlog::logger>(self);
+}
+
+template<spdlog::level::level_enum Lvl>
+static PyObject* logger_log_at(PyObject* self, PyObject* const* args, Py_ssize_t nargs) {
+    if(!check_nargs(log_method_names[Lvl], nargs, 1))
+        return nullptr;
+
+    spdlog::logger* logger = logger_from_self(self);
+
+    if(logger == nullptr)
+        return nullptr;
+
+    return log_message(logger, Lvl, args[0]);
+}
+
+static PyObject* logger_log(PyObject* self, PyObject* const* args, Py_ssize_t nargs) {
+    if(!check_nargs("log", nargs, 2))
+        return nullptr;
+
+    spdlog::logger* logger = logger_from_self(self);
+
+    if(logger == nullptr)
+        return nullptr;
+
+    spdlog::level::level_enum lvl;
+
+    if(!nb::try_cast(nb::handle(args[0]), lvl)) {
+        PyErr_Format(PyExc_TypeError, "expected spydlog.level, got %.200s", Py_TYPE(args[0])->tp_name);
+        return nullptr;
+    }
+
+    return log_message(logger, lvl, args[1]);
+}
+
+template<spdlog::level::level_enum Lvl>
+static PyObject* global_log_at(PyObject*, PyObject* const* args, Py_ssize_t nargs) {
+    if(!check_nargs(log_method_names[Lvl], nargs, 1))
+        return nullptr;
+
+    return log_message(spdlog::default_logger_raw(), Lvl, args[0]);
+}
+
+#define FASTCALL_METHOD(name, func, doc) \
+    { name, reinterpret_cast<PyCFunction>(reinterpret_cast<void(*)(void)>(func)), METH_FASTCALL, doc }
+
+static PyMethodDef logger_methods[] = {
+    FASTCALL_METHOD("trace", logger_log_at<spdlog::level::trace>, "trace($self, msg, /)\n--\n\nLog a trace message."),
+    FASTCALL_METHOD("debug", logger_log_at<spdlog::level::debug>, "debug($self, msg, /)\n--\n\nLog a debug message."),
+    FASTCALL_METHOD("info", logger_log_at<spdlog::level::info>, "info($self, msg, /)\n--\n\nLog an info message."),
+    FASTCALL_METHOD("warn", logger_log_at<spdlog::level::warn>, "warn($self, msg, /)\n--\n\nLog a warning message."),
+    FASTCALL_METHOD("error", logger_log_at<spdlog::level::err>, "error($self, msg, /)\n--\n\nLog an error message."),
+    FASTCALL_METHOD("critical", logger_log_at<spdlog::level::critical>, "critical($self, msg, /)\n--\n\nLog a critical message."),
+    FASTCALL_METHOD("log", logger_log, "log($self, lvl, msg, /)\n--\n\nLog a message with the specified level."),
+    { nullptr, nullptr, 0, nullptr }
+};
+
+static PyMethodDef global_log_methods[] = {
+    FASTCALL_METHOD("trace", global_log_at<spdlog::level::trace>, "trace(msg, /)\n--\n\nLog a global trace message."),
+    FASTCALL_METHOD("debug", global_log_at<spdlog::level::debug>, "debug(msg, /)\n--\n\nLog a global debug message."),
+    FASTCALL_METHOD("info", global_log_at<spdlog::level::info>, "info(msg, /)\n--\n\nLog a global info message."),
+    FASTCALL_METHOD("warn", global_log_at<spdlog::level::warn>, "warn(msg, /)\n--\n\nLog a global warning message."),
+    FASTCALL_METHOD("error", global_log_at<spdlog::level::err>, "error(msg, /)\n--\n\nLog a global error message."),
+    FASTCALL_METHOD("critical", global_log_at<spdlog::level::critical>, "critical(msg, /)\n--\n\nLog a global critical message."),
+    { nullptr, nullptr, 0, nullptr }
+};
+
+// Logger lookup cache (get). A dict maps the names found in the registry to weak references
+// to their Python logger objects, so a repeated get is a dict hit while the object is in
+// use: no registry lock, no shared_ptr cast, and the same object every time. The cache
+// keeps no logger object alive, a dead reference is a miss. Unknown names are not cached,
+// so only the registry changes that remove or replace a logger (drop, drop_all,
+// set_default_logger, shutdown) clear the cache. Misses and clears are serialized, so a
+// miss cannot cache a logger dropped meanwhile
+static PyObject* g_logger_cache = nullptr;
+static nb::ft_mutex g_logger_cache_mutex;
+
+static void clear_logger_cache() {
+    nb::ft_lock_guard lock(g_logger_cache_mutex);
+    PyDict_Clear(g_logger_cache);
+}
+
+static PyObject* registry_get(PyObject*, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames) {
+    const Py_ssize_t nkw = kwnames != nullptr ? PyTuple_GET_SIZE(kwnames) : 0;
+
+    if(nkw == 1 && nargs == 0) {
+        if(PyUnicode_CompareWithASCIIString(PyTuple_GET_ITEM(kwnames, 0), "name") != 0) {
+            PyErr_Format(PyExc_TypeError, "get() got an unexpected keyword argument '%U'", PyTuple_GET_ITEM(kwnames, 0));
+            return nullptr;
+        }
+    } else if(nkw != 0 || !check_nargs("get", nargs, 1)) {
+        if(nkw != 0)
+            PyErr_Format(PyExc_TypeError, "get() takes exactly 1 argument(s) (%zd given)", nargs + nkw);
+
+        return nullptr;
+    }
+
+    PyObject* name = args[0];
+
+    if(!PyUnicode_Check(name)) {
+        PyErr_Format(PyExc_TypeError, "expected str, got %.200s", Py_TYPE(name)->tp_name);
+        return nullptr;
+    }
+
+    // A str subclass may override __hash__ and __eq__, so only exact str names use the cache
+    const bool cacheable = PyUnicode_CheckExact(name);
+
+    if(cacheable) {
+        PyObject* cached;
+
+#if PY_VERSION_HEX >= 0x030D0000
+        PyObject* ref;
+
+        if(PyDict_GetItemRef(g_logger_cache, name, &ref) < 0)
+            return nullptr;
+
+        if(ref != nullptr) {
+            const int alive = PyWeakref_GetRef(ref, &cached);
+            Py_DECREF(ref);
+
+            if(alive != 0)
+                return cached;
+        }
+#else
+        PyObject* ref = PyDict_GetItemWithError(g_logger_cache, name);
+
+        if(ref == nullptr && PyErr_Occurred())
+            return nullptr;
+
+        if(ref != nullptr && (cached = PyWeakref_GET_OBJECT(ref)) != Py_None) {
+            Py_INCREF(cached);
+            return cached;
+        }
+#endif
+    }
+
+    Py_ssize_t size;
+    const char* utf8 = PyUnicode_AsUTF8AndSize(name, &size);
+
+    if(utf8 == nullptr)
+        return nullptr;
+
+    try {
+        nb::ft_lock_guard lock(g_logger_cache_mutex);
+        std::shared_ptr<spdlog::logger> logger = spdlog::get(std::string(utf8, static_cast<size_t>(size)));
+
+        if(!logger)
+            Py_RETURN_NONE;
+
+        nb::object obj = nb::cast(std::move(logger));
+
+        if(cacheable) {
+            nb::object weak = nb::steal(PyWeakref_NewRef(obj.ptr(), nullptr));
+
+            if(!weak.is_valid() || PyDict_SetItem(g_logger_cache, name, weak.ptr()) != 0)
+                return nullptr;
+        }
+
+        return obj.release().ptr();
+    } catch(nb::python_error& e) {
+        e.restore();
+        return nullptr;
+    } catch(const std::exception& e) {
+        PyErr_SetString(PyExc_RuntimeError, e.what());
+        return nullptr;
+    }
+}
+
+static PyMethodDef registry_get_method = {
+    "get", reinterpret_cast<PyCFunction>(reinterpret_cast<void(*)(void)>(registry_get)), METH_FASTCALL | METH_KEYWORDS,
+    "get(name)\n--\n\nGet a registered logger by name, or None."
+};
+
+#undef FASTCALL_METHOD
+
+// Hierarchical loggers (get_logger). Dotted names form a tree: "app.db.pool" is a child of
+// "app.db", itself a child of "app", a child of the default logger. get_logger creates the
+// missing ancestors of a logger (or adopts the registered loggers of their names), and a
+// new logger shares the sinks of its parent and inherits its level and flush level.
+// A logger whose level was not set explicitly follows its parent: set_level updates the
+// cached level of the descendants that follow it at once, so should_log stays a single
+// atomic load. Nodes live in a map ordered by name, where the descendants of a logger are
+// the contiguous range of the names starting with its name and a dot, each after its
+// parent ("app.db" < "app.db.pool")
+namespace hierarchy {
+
+struct node {
+    std::shared_ptr<spdlog::logger> logger;
+    bool explicit_level = false;
+};
+
+static std::mutex g_mutex;
+static std::map<std::string, node> g_nodes;
+
+// Level of the nearest ancestor of name, or of the default logger, called with g_mutex held
+static spdlog::level::level_enum parent_level(const std::string& name) {
+    for(size_t dot = name.rfind('.'); dot != std::string::npos; dot = dot > 0 ? name.rfind('.', dot - 1) : std::string::npos) {
+        auto it = g_nodes.find(name.substr(0, dot));
+
+        if(it != g_nodes.end())
+            return it->second.logger->level();
+    }
+
+    const spdlog::logger* root = spdlog::default_logger_raw();
+
+    return root != nullptr ? root->level() : spdlog::get_level();
+}
+
+// Updates the loggers under name (the whole tree if empty) that follow their parent
+static void propagate(const std::string& name) {
+    const std::string prefix = name.empty() ? name : name + ".";
+
+    for(auto it = g_nodes.lower_bound(prefix); it != g_nodes.end() && it->first.compare(0, prefix.size(), prefix) == 0; ++it) {
+        if(!it->second.explicit_level)
+            it->second.logger->set_level(parent_level(it->first));
+    }
+}
+
+static std::shared_ptr<spdlog::logger> get_logger(const std::string& name) {
+    if(name.empty())
+        return spdlog::default_logger();
+
+    if(name.front() == '.' || name.back() == '.' || name.find("..") != std::string::npos)
+        throw nb::value_error(("invalid logger name '" + name + "'").c_str());
+
+    std::lock_guard<std::mutex> lock(g_mutex);
+    std::shared_ptr<spdlog::logger> parent = spdlog::default_logger();
+
+    for(size_t end = name.find('.'); ; end = name.find('.', end + 1)) {
+        const std::string ancestor = name.substr(0, end);
+        auto it = g_nodes.find(ancestor);
+
+        if(it == g_nodes.end()) {
+            node ancestor_node;
+
+            if((ancestor_node.logger = spdlog::get(ancestor))) {
+                ancestor_node.explicit_level = true;
+            } else {
+                const std::vector<spdlog::sink_ptr> sinks = parent ? parent->sinks() : std::vector<spdlog::sink_ptr>{};
+                ancestor_node.logger = make_logger<spdlog::logger>(ancestor, sinks.begin(), sinks.end());
+                ancestor_node.logger->set_level(parent ? parent->level() : spdlog::get_level());
+
+                if(parent)
+                    ancestor_node.logger->flush_on(parent->flush_level());
+
+                spdlog::register_logger(ancestor_node.logger);
+            }
+
+            it = g_nodes.emplace(ancestor, std::move(ancestor_node)).first;
+        }
+
+        parent = it->second.logger;
+
+        if(end == std::string::npos)
+            return parent;
+    }
+}
+
+// logger.set_level, None makes a logger of the tree follow its parent again
+static void set_level(spdlog::logger& logger, std::optional<spdlog::level::level_enum> lvl) {
+    std::lock_guard<std::mutex> lock(g_mutex);
+    auto it = g_nodes.find(logger.name());
+
+    if(it != g_nodes.end() && it->second.logger.get() == &logger) {
+        it->second.explicit_level = lvl.has_value();
+        logger.set_level(lvl ? *lvl : parent_level(it->first));
+        propagate(it->first);
+    } else if(lvl) {
+        logger.set_level(*lvl);
+    } else {
+        throw nb::value_error("only the loggers created by get_logger can inherit their level");
+    }
+
+    if(&logger == spdlog::default_logger_raw())
+        propagate("");
+}
+
+// After set_default_logger, the top level loggers follow the new default logger
+static void root_changed() {
+    std::lock_guard<std::mutex> lock(g_mutex);
+    propagate("");
+}
+
+// The global set_level and load_levels set the level of every registered logger. In the
+// tree, the loggers named by the change get an explicit level, the other explicit levels
+// are restored and the loggers that follow their parent take its new level
+template<typename Apply>
+static void set_levels(Apply&& apply, const std::vector<std::string>& named) {
+    std::lock_guard<std::mutex> lock(g_mutex);
+    std::vector<std::pair<spdlog::logger*, spdlog::level::level_enum>> kept;
+
+    for(auto& [name, entry] : g_nodes) {
+        if(std::find(named.begin(), named.end(), name) != named.end())
+            entry.explicit_level = true;
+        else if(entry.explicit_level)
+            kept.emplace_back(entry.logger.get(), entry.logger->level());
+    }
+
+    apply();
+
+    for(const auto& [logger, lvl] : kept)
+        logger->set_level(lvl);
+
+    propagate("");
+}
+
+// load_levels and load_env_levels, the loggers named by the "logger=level" pairs of a
+// SPDLOG_LEVEL string (trimmed as spdlog does) keep their level
+static void load_levels(const std::string& levels) {
+    static constexpr const char* spaces = " \t\r\n";
+    std::vector<std::string> named;
+
+    for(size_t begin = 0; begin <= levels.size(); ) {
+        size_t end = levels.find(',', begin);
+
+        if(end == std::string::npos)
+            end = levels.size();
+
+        const size_t eq = levels.find('=', begin);
+
+        if(eq < end) {
+            const size_t first = levels.find_first_not_of(spaces, begin);
+
+            if(first < eq)
+                named.push_back(levels.substr(first, levels.find_last_not_of(spaces, eq - 1) - first + 1));
+        }
+
+        begin = end + 1;
+    }
+
+    set_levels([&levels]() { spdlog::cfg::helpers::load_levels(levels); }, named);
+}
+
+// drop, drop_all and shutdown remove the loggers from the tree. The loggers are released
+// after the lock (with the GIL, their sinks may have been created from Python)
+static void forget(const std::string& name) {
+    node forgotten;
+
+    std::lock_guard<std::mutex> lock(g_mutex);
+    auto it = g_nodes.find(name);
+
+    if(it != g_nodes.end()) {
+        forgotten = std::move(it->second);
+        g_nodes.erase(it);
+    }
+}
+
+static void forget_all() {
+    std::map<std::string, node> forgotten;
+
+    std::lock_guard<std::mutex> lock(g_mutex);
+    forgotten.swap(g_nodes);
+}
+
+// replace_loggers (configure) registers loggers in place of the registered loggers of the
+// same names in one step: get (its misses hold the cache mutex) and get_logger (the tree
+// mutex) see either all the old loggers or all the new ones, never a missing name
+static void replace(const std::vector<std::shared_ptr<spdlog::logger>>& loggers) {
+    std::vector<std::shared_ptr<spdlog::logger>> replaced;
+    std::vector<node> forgotten;
+
+    for(size_t i = 0; i < loggers.size(); i++) {
+        if(!loggers[i])
+            throw nb::value_error("replace_loggers() got None");
+
+        for(size_t j = 0; j < i; j++) {
+            if(loggers[j]->name() == loggers[i]->name())
+                throw spdlog::spdlog_ex(spdlog::fmt_lib::format("logger with name '{}' given twice", loggers[i]->name()));
+        }
+    }
+
+    nb::ft_lock_guard cache_lock(g_logger_cache_mutex);
+    std::lock_guard<std::mutex> lock(g_mutex);
+
+    for(const auto& logger : loggers) {
+        if(auto old = spdlog::get(logger->name())) {
+            replaced.push_back(std::move(old));
+            spdlog::drop(logger->name());
+        }
+
+        auto it = g_nodes.find(logger->name());
+
+        if(it != g_nodes.end()) {
+            forgotten.push_back(std::move(it->second));
+            g_nodes.erase(it);
+        }
+    }
+
+    for(const auto& logger : loggers)
+        spdlog::register_logger(logger);
+
+    PyDict_Clear(g_logger_cache);
+}
+
+} // namespace hierarchy
+
+// Exception logging (logger.exception). The traceback is walked through the C API and
+// each frame is captured as its interned code location (see get_code_location), line
+// number and source line, so the traceback module is not involved. The source lines are
+// read through linecache, like the traceback module does, once per code object and line.
+// Only the traceback_limit most recent frames are kept to bound the message size: the
+// traceback is counted first, following tb_next only, and the frames omitted are skipped
+// without being looked at. Chained exceptions (__cause__, and __context__ unless
+// suppressed) are rendered before the exception, like the traceback module does
+static std::atomic<int> g_traceback_limit{ 64 };
+
+struct traceback_frame {
+    code_location location;
+    int line;
+    std::string source;
+};
+
+// Returns a source line stripped of its indentation, as printed by the traceback module,
+// or an empty string if it is not available
+static std::string source_line(PyCodeObject* code, PyObject* frame, const char* filename, int line) {
+    PyObject* code_obj = reinterpret_cast<PyObject*>(code);
+
+    {
+        nb::ft_lock_guard lock(g_code_locations_mutex);
+        const code_info* info = find_code_info(code_obj);
+
+        if(info != nullptr) {
+            auto it = info->lines.find(line);
+
+            if(it != info->lines.end())
+                return it->second;
+        }
+    }
+
+    // The frame globals let linecache get the source of a module from its loader (zipimport)
+    PyObject* globals = PyObject_GetAttrString(frame, "f_globals");
+    PyObject* linecache = PyImport_ImportModule("linecache");
+    PyObject* text = linecache != nullptr && globals != nullptr
+        ? PyObject_CallMethod(linecache, "getline", "siO", filename, line, globals) : nullptr;
+    const char* data = text != nullptr && PyUnicode_Check(text) ? PyUnicode_AsUTF8(text) : nullptr;
+    std::string source = data != nullptr ? data : "";
+
+    Py_XDECREF(text);
+    Py_XDECREF(linecache);
+    Py_XDECREF(globals);
+    PyErr_Clear();
+
+    const char* whitespace = " \t\n\r\f\v";
+    const size_t begin = source.find_first_not_of(whitespace);
+    source = begin == std::string::npos ? std::string() : source.substr(begin, source.find_last_not_of(whitespace) + 1 - begin);
+
+    nb::ft_lock_guard lock(g_code_locations_mutex);
+
+    if(code_info* info = find_code_info(code_obj))
+        info->lines.emplace(line, source);
+
+    return source;
+}
+
+static bool capture_traceback(PyObject* tb, std::vector<traceback_frame>& frames, size_t& omitted) {
+    size_t depth = 0;
+
+    for(PyObject* it = tb; it != nullptr && it != Py_None; it = reinterpret_cast<PyObject*>(reinterpret_cast<PyTracebackObject*>(it)->tb_next))
+        depth++;
+
+    const size_t limit = static_cast<size_t>(std::max(g_traceback_limit.load(std::memory_order_relaxed), 0));
+    omitted = depth > limit ? depth - limit : 0;
+
+    for(size_t i = 0; i < omitted; i++)
+        tb = reinterpret_cast<PyObject*>(reinterpret_cast<PyTracebackObject*>(tb)->tb_next);
+
+    frames.reserve(depth - omitted);
+
+    while(tb != nullptr && tb != Py_None) {
+        PyObject* lineno = PyObject_GetAttrString(tb, "tb_lineno");
+
+        if(lineno == nullptr)
+            return false;
+
+        PyFrameObject* frame = reinterpret_cast<PyTracebackObject*>(tb)->tb_frame;
+        PyCodeObject* code = PyFrame_GetCode(frame);
+        const code_location location = get_code_location(code);
+        const int line = static_cast<int>(PyLong_AsLong(lineno));
+        frames.push_back({ location, line, source_line(code, reinterpret_cast<PyObject*>(frame), location.filename, line) });
+        Py_DECREF(code);
+        Py_DECREF(lineno);
+
+        tb = reinterpret_cast<PyObject*>(reinterpret_cast<PyTracebackObject*>(tb)->tb_next);
+    }
+
+    return true;
+}
+
+static void format_exception_type(spdlog::memory_buf_t& buf, PyObject* exc) {
+    PyTypeObject* type = Py_TYPE(exc);
+    PyObject* module = PyObject_GetAttrString(reinterpret_cast<PyObject*>(type), "__module__");
+    const char* module_name = module != nullptr && PyUnicode_Check(module) ? PyUnicode_AsUTF8(module) : nullptr;
+
+    if(module_name != nullptr && std::strcmp(module_name, "builtins") != 0 && std::strcmp(module_name, "__main__") != 0)
+        spdlog::fmt_lib::format_to(std::back_inserter(buf), "{}.", module_name);
+
+    Py_XDECREF(module);
+    PyErr_Clear();
+
+    const char* name = std::strrchr(type->tp_name, '.');
+    spdlog::fmt_lib::format_to(std::back_inserter(buf), "{}", name != nullptr ? name + 1 : type->tp_name);
+
+    PyObject* str = PyObject_Str(exc);
+    Py_ssize_t size = 0;
+    const char* data = str != nullptr ? PyUnicode_AsUTF8AndSize(str, &size) : nullptr;
+
+    if(data == nullptr)
+        buf.append(spdlog::string_view_t(": <exception str() failed>"));
+    else if(size > 0)
+        spdlog::fmt_lib::format_to(std::back_inserter(buf), ": {}", spdlog::string_view_t(data, static_cast<size_t>(size)));
+
+    Py_XDECREF(str);
+    PyErr_Clear();
+}
+
+static void format_exception(spdlog::memory_buf_t& buf, PyObject* exc) {
+    std::vector<traceback_frame> frames;
+    size_t omitted = 0;
+
+    PyObject* tb = PyException_GetTraceback(exc);
+    const bool captured = capture_traceback(tb, frames, omitted);
+    Py_XDECREF(tb);
+
+    if(!captured)
+        throw nb::python_error();
+
+    if(!frames.empty() || omitted > 0)
+        buf.append(spdlog::string_view_t("\nTraceback (most recent call last):"));
+
+    if(omitted > 0)
+        spdlog::fmt_lib::format_to(std::back_inserter(buf), "\n  ... ({} frames omitted)", omitted);
+
+    for(const traceback_frame& frame : frames) {
+        spdlog::fmt_lib::format_to(std::back_inserter(buf), "\n  File \"{}\", line {}, in {}",
+                                   frame.location.filename, frame.line, frame.location.name);
+
+        if(!frame.source.empty())
+            spdlog::fmt_lib::format_to(std::back_inserter(buf), "\n    {}", frame.source);
+    }
+
+    buf.push_back('\n');
+    format_exception_type(buf, exc);
+}
+
+// An exception of the chain, with the sentence printed before it, after its cause or context
+struct chained_exception {
+    nb::object exc;
+    const char* relation;
+};
+
+// Returns the chain of an exception, the exception first, stopping at a cycle
+static std::vector<chained_exception> exception_chain(nb::object exc) {
+    std::vector<chained_exception> chain;
+
+    while(exc.is_valid() && !exc.is_none()) {
+        for(const chained_exception& seen : chain)
+            if(seen.exc.is(exc))
+                return chain;
+
+        nb::object cause = nb::steal(PyException_GetCause(exc.ptr()));
+        nb::object context = nb::steal(PyException_GetContext(exc.ptr()));
+        const bool suppressed = PyObject_IsTrue(nb::getattr(exc, "__suppress_context__", nb::bool_(false)).ptr()) == 1;
+        PyErr_Clear();
+
+        chain.push_back({ std::move(exc), nullptr });
+
+        if(cause.is_valid()) {
+            chain.back().relation = "The above exception was the direct cause of the following exception:";
+            exc = std::move(cause);
+        } else if(context.is_valid() && !suppressed) {
+            chain.back().relation = "During handling of the above exception, another exception occurred:";
+            exc = std::move(context);
+        } else {
+            break;
+        }
+    }
+
+    return chain;
+}
+
+static void log_exception(spdlog::logger* logger, nb::handle msg, nb::handle exc) {
+    if(logger == nullptr || !logger->should_log(spdlog::level::err))
+        return;
+
+    message_arg arg;
+
+    if(!arg.load(msg.ptr()))
+        throw nb::python_error();
+
+    nb::object value;
+
+    if(exc.is_none()) {
+        PyObject *type, *current, *tb;
+        PyErr_GetExcInfo(&type, &current, &tb);
+        Py_XDECREF(type);
+        Py_XDECREF(tb);
+        value = nb::steal(current);
+    } else {
+        if(!PyExceptionInstance_Check(exc.ptr()))
+            throw nb::type_error("exc must be an exception instance or None");
+
+        value = nb::borrow(exc);
+    }
+
+    spdlog::memory_buf_t buf;
+    buf.append(arg.view);
+
+    if(value.is_valid() && !value.is_none()) {
+        std::vector<chained_exception> chain = exception_chain(value);
+
+        for(size_t i = chain.size(); i-- > 0;) {
+            format_exception(buf, chain[i].exc.ptr());
+
+            if(i > 0)
+                spdlog::fmt_lib::format_to(std::back_inserter(buf), "\n\n{}\n", chain[i - 1].relation);
+        }
+    }
+
+    log_view(logger, spdlog::level::err, spdlog::string_view_t(buf.data(), buf.size()));
+}
+
+static PyType_Slot logger_slots[] = {
+    { Py_tp_getset, logger_getset },
+    { Py_tp_methods, logger_methods },
+    { 0, nullptr }
+};
+
+// Multi-process logging. shm_queue_sink serializes each record into a ring of fixed size
+// slots in a named shared memory segment, and a shm_collector (one per segment, which
+// creates it) drains the ring on a background thread into real sinks. The ring is a
+// bounded multi-producer queue (D. Vyukov) whose per-slot sequence numbers live in the
+// segment, so producers in any number of processes only use atomics; a record larger
+// than a slot spans consecutive slots. Formatting happens in the collector process,
+// from the logger name, level, time, thread id and source location of the record.
+// The process ids of the collector and of each claim are kept in the segment, so a
+// crashed process does not block the others: producers stop waiting for a dead collector,
+// the collector releases the slots claimed by a dead producer, and a new collector
+// replaces the segment left by a dead one
+namespace shm {
+
+static constexpr uint64_t queue_magic = 0x51474f4c44595053;  // "SPYDLOGQ"
+static constexpr uint32_t queue_version = 2;
+static constexpr size_t cache_line = 64;
+static constexpr uint64_t no_claim = std::numeric_limits<uint64_t>::max();
+
+// Producers blocked on a full ring check that the collector is alive every liveness_check waits
+static constexpr int liveness_check = 256;
+
+static_assert(std::atomic<uint64_t>::is_always_lock_free, "shared memory queue needs lock free 64 bit atomics");
+
+struct queue_header {
+    std::atomic<uint64_t> magic;
+    uint32_t version;
+    uint32_t slot_size;
+    uint64_t slot_count;
+    int64_t owner_pid;
+    alignas(cache_line) std::atomic<uint64_t> enqueue_pos;
+    alignas(cache_line) std::atomic<uint64_t> dequeue_pos;
+    alignas(cache_line) std::atomic<uint64_t> dropped;
+    std::atomic<uint32_t> closed;
+};
+
+// Each slot starts with its sequence number. The first slot of a record also holds the
+// claim of the producer writing it: its position (published last), process and length
+struct slot_header {
+    std::atomic<uint64_t> sequence;
+    std::atomic<uint64_t> claim_pos;
+    std::atomic<int64_t> claim_pid;
+    std::atomic<uint64_t> claim_slots;
+};
+
+static constexpr size_t header_size = (sizeof(queue_header) + cache_line - 1) / cache_line * cache_line;
+static constexpr size_t slot_data_offset = sizeof(slot_header);
+
+#ifdef _WIN32
+static int64_t current_pid() {
+    return static_cast<int64_t>(GetCurrentProcessId());
+}
+#else
+// Cached to keep system calls out of push, and read again in a forked child
+static std::atomic<int64_t> g_current_pid{ 0 };
+
+static int64_t current_pid() {
+    int64_t pid = g_current_pid.load(std::memory_order_relaxed);
+
+    if(pid == 0) {
+        static const int registered = pthread_atfork(nullptr, nullptr, [] { g_current_pid.store(0, std::memory_order_relaxed); });
+        (void)registered;
+
+        pid = static_cast<int64_t>(getpid());
+        g_current_pid.store(pid, std::memory_order_relaxed);
+    }
+
+    return pid;
+}
+#endif
+
+// A process that cannot be signaled (or opened) for lack of permission is alive
+static bool process_alive(int64_t pid) {
+#ifdef _WIN32
+    HANDLE process = OpenProcess(SYNCHRONIZE, FALSE, static_cast<DWORD>(pid));
+
+    if(process == nullptr)
+        return GetLastError() != ERROR_INVALID_PARAMETER;
+
+    const bool alive = WaitForSingleObject(process, 0) == WAIT_TIMEOUT;
+    CloseHandle(process);
+
+    return alive;
+#else
+    return kill(static_cast<pid_t>(pid), 0) == 0 || errno != ESRCH;
+#endif
+}
+
+// Serialized record, followed by the logger name, source filename, function name and payload
+struct record_header {
+    uint32_t size;
+    int32_t level;
+    int64_t time;
+    uint64_t thread_id;
+    int32_t line;
+    uint16_t logger_name_size;
+    uint16_t filename_size;
+    uint32_t funcname_size;
+    uint32_t payload_size;
+};
+
+class segment {
+public:
+    segment(const segment&) = delete;
+    segment& operator=(const segment&) = delete;
+
+    // Returns nullptr if the segment already exists
+    static std::unique_ptr<segment> create(const std::string& name, size_t size) {
+        std::unique_ptr<segment> seg(new segment(name, true));
+#ifdef _WIN32
+        seg->handle_ = CreateFileMappingA(INVALID_HANDLE_VALUE, nullptr, PAGE_READWRITE,
+                                          static_cast<DWORD>(static_cast<uint64_t>(size) >> 32),
+                                          static_cast<DWORD>(size & 0xFFFFFFFF), name.c_str());
+
+        if(seg->handle_ != nullptr && GetLastError() == ERROR_ALREADY_EXISTS) {
+            seg->owner_ = false;
+            return nullptr;
+        }
+
+        if(seg->handle_ == nullptr)
+            throw spdlog::spdlog_ex("shared memory segment cannot be created: " + name);
+#else
+        const int fd = shm_open(seg->name_.c_str(), O_CREAT | O_EXCL | O_RDWR, 0600);
+
+        if(fd == -1 && errno == EEXIST) {
+            seg->owner_ = false;
+            return nullptr;
+        }
+
+        if(fd == -1)
+            throw spdlog::spdlog_ex("failed to create shared memory segment " + name, errno);
+
+        seg->fd_ = fd;
+
+        if(ftruncate(fd, static_cast<off_t>(size)) == -1)
+            throw spdlog::spdlog_ex("failed to size shared memory segment " + name, errno);
+#endif
+        seg->map(size);
+
+        return seg;
+    }
+
+    static std::unique_ptr<segment> open(const std::string& name) {
+        std::unique_ptr<segment> seg(new segment(name, false));
+#ifdef _WIN32
+        seg->handle_ = OpenFileMappingA(FILE_MAP_ALL_ACCESS, FALSE, name.c_str());
+
+        if(seg->handle_ == nullptr)
+            throw spdlog::spdlog_ex("shared memory segment not found: " + name);
+
+        seg->map(0);
+#else
+        const int fd = shm_open(seg->name_.c_str(), O_RDWR, 0600);
+
+        if(fd == -1)
+            throw spdlog::spdlog_ex("failed to open shared memory segment " + name, errno);
+
+        seg->fd_ = fd;
+
+        struct stat st;
+
+        if(fstat(fd, &st) == -1)
+            throw spdlog::spdlog_ex("failed to stat shared memory segment " + name, errno);
+
+        seg->map(static_cast<size_t>(st.st_size));
+#endif
+        return seg;
+    }
+
+    ~segment() {
+#ifdef _WIN32
+        if(data_ != nullptr)
+            UnmapViewOfFile(data_);
+
+        if(handle_ != nullptr)
+            CloseHandle(handle_);
+#else
+        if(data_ != nullptr)
+            munmap(data_, size_);
+
+        if(fd_ != -1)
+            close(fd_);
+
+        // A forked child inherits the collector, only its creator process removes the name
+        if(owner_ && getpid() == owner_pid_)
+            shm_unlink(name_.c_str());
+#endif
+    }
+
+    char* data() const { return static_cast<char*>(data_); }
+    size_t size() const { return size_; }
+
+    // Removes the name of a segment left behind by a dead collector. The mappings of the
+    // processes still attached to it stay valid. Windows removes a mapping along with its
+    // last handle, so there is nothing to remove there
+    void unlink() const {
+#ifndef _WIN32
+        shm_unlink(name_.c_str());
+#endif
+    }
+
+private:
+    segment(const std::string& name, bool owner)
+        : owner_(owner)
+    {
+#ifdef _WIN32
+        name_ = name;
+#else
+        name_ = name.empty() || name[0] != '/' ? "/" + name : name;
+        owner_pid_ = getpid();
+#endif
+    }
+
+    void map(size_t size) {
+#ifdef _WIN32
+        data_ = MapViewOfFile(handle_, FILE_MAP_ALL_ACCESS, 0, 0, size);
+
+        if(data_ == nullptr)
+            throw spdlog::spdlog_ex("failed to map shared memory segment " + name_);
+
+        MEMORY_BASIC_INFORMATION info;
+        VirtualQuery(data_, &info, sizeof(info));
+        size_ = size != 0 ? size : static_cast<size_t>(info.RegionSize);
+#else
+        void* data = mmap(nullptr, size, PROT_READ | PROT_WRITE, MAP_SHARED, fd_, 0);
+
+        if(data == MAP_FAILED)
+            throw spdlog::spdlog_ex("failed to map shared memory segment " + name_, errno);
+
+        data_ = data;
+        size_ = size;
+#endif
+    }
+
+    std::string name_;
+    bool owner_;
+    void* data_ = nullptr;
+    size_t size_ = 0;
+#ifdef _WIN32
+    HANDLE handle_ = nullptr;
+#else
+    int fd_ = -1;
+    pid_t owner_pid_ = 0;
+#endif
+};
+
+class queue {
+public:
+    // Creates the segment and its ring (collector side), replacing the segment of a dead collector
+    queue(const std::string& name, size_t slot_count, size_t slot_size) {
+        if(slot_count < 2 || (slot_count & (slot_count - 1)) != 0)
+            throw spdlog::spdlog_ex("slot_count must be a power of two greater than 1");
+
+        if(slot_size < 128 || slot_size % cache_line != 0 || slot_size > std::numeric_limits<uint32_t>::max())
+            throw spdlog::spdlog_ex("slot_size must be a multiple of 64, at least 128");
+
+        segment_ = segment::create(name, header_size + slot_count * slot_size);
+
+        if(!segment_ && remove_stale(name))
+            segment_ = segment::create(name, header_size + slot_count * slot_size);
+
+        if(!segment_)
+            throw spdlog::spdlog_ex("shared memory segment already exists: " + name);
+
+        header_ = new(segment_->data()) queue_header();
+        header_->version = queue_version;
+        header_->slot_size = static_cast<uint32_t>(slot_size);
+        header_->slot_count = slot_count;
+        header_->owner_pid = current_pid();
+        header_->enqueue_pos.store(0, std::memory_order_relaxed);
+        header_->dequeue_pos.store(0, std::memory_order_relaxed);
+        header_->dropped.store(0, std::memory_order_relaxed);
+        header_->closed.store(0, std::memory_order_relaxed);
+
+        init_slots();
+
+        for(size_t i = 0; i < slot_count; i++) {
+            slot(i).sequence.store(i, std::memory_order_relaxed);
+            slot(i).claim_pos.store(no_claim, std::memory_order_relaxed);
+        }
+
+        header_->magic.store(queue_magic, std::memory_order_release);
+    }
+
+    // Attaches to an existing ring (sink side)
+    explicit queue(const std::string& name) {
+        segment_ = segment::open(name);
+
+        if(segment_->size() < header_size)
+            throw spdlog::spdlog_ex("invalid shared memory queue " + name);
+
+        header_ = reinterpret_cast<queue_header*>(segment_->data());
+
+        if(header_->magic.load(std::memory_order_acquire) != queue_magic || header_->version != queue_version)
+            throw spdlog::spdlog_ex("invalid shared memory queue " + name);
+
+        init_slots();
+    }
+
+    size_t slot_count() const { return slot_count_; }
+    size_t slot_size() const { return slot_size_; }
+    size_t capacity() const { return slot_count_ * slot_data_size(); }
+    uint64_t dropped() const { return header_->dropped.load(std::memory_order_relaxed); }
+
+    uint64_t size() const {
+        const uint64_t dequeue_pos = header_->dequeue_pos.load(std::memory_order_relaxed);
+        const uint64_t enqueue_pos = header_->enqueue_pos.load(std::memory_order_relaxed);
+
+        return enqueue_pos > dequeue_pos ? enqueue_pos - dequeue_pos : 0;
+    }
+
+    // Set when the collector stops, producers then never wait for room
+    void close() { header_->closed.store(1, std::memory_order_relaxed); }
+
+    // Copies a serialized record into the ring. When the ring is full, either waits for the
+    // collector (block) or drops the record and counts it. A collector found dead while
+    // waiting closes the queue
+    bool push(const char* record, size_t size, bool block) {
+        const size_t data_size = slot_data_size();
+        const uint64_t n_slots = (size + data_size - 1) / data_size;
+
+        uint64_t pos = header_->enqueue_pos.load(std::memory_order_relaxed);
+        int waits = 0;
+
+        for(;;) {
+            // The slots are released in order, so the last slot being free means they all are
+            const uint64_t last = pos + n_slots - 1;
+            const uint64_t seq = slot(last & mask_).sequence.load(std::memory_order_acquire);
+            const int64_t diff = static_cast<int64_t>(seq - last);
+
+            if(diff == 0) {
+                if(header_->enqueue_pos.compare_exchange_weak(pos, pos + n_slots, std::memory_order_relaxed))
+                    break;
+            }
+            else if(diff < 0) {
+                if(block && ++waits % liveness_check == 0 && !process_alive(header_->owner_pid))
+                    close();
+
+                if(!block || header_->closed.load(std::memory_order_relaxed) != 0) {
+                    header_->dropped.fetch_add(1, std::memory_order_relaxed);
+                    return false;
+                }
+
+                std::this_thread::sleep_for(std::chrono::microseconds(50));
+                pos = header_->enqueue_pos.load(std::memory_order_relaxed);
+            }
+            else {
+                pos = header_->enqueue_pos.load(std::memory_order_relaxed);
+            }
+        }
+
+        // The claim lets the collector release the slots if this process dies before
+        // publishing them (except within these three stores)
+        slot_header& first = slot(pos & mask_);
+        first.claim_slots.store(n_slots, std::memory_order_relaxed);
+        first.claim_pid.store(current_pid(), std::memory_order_relaxed);
+        first.claim_pos.store(pos, std::memory_order_release);
+
+        for(uint64_t i = 0; i < n_slots; i++) {
+            const size_t offset = static_cast<size_t>(i) * data_size;
+            std::memcpy(slot_data((pos + i) & mask_), record + offset, std::min(data_size, size - offset));
+        }
+
+        // The first slot is published last, the collector reads the record once it sees it
+        for(uint64_t i = n_slots; i-- > 0;)
+            slot((pos + i) & mask_).sequence.store(pos + i + 1, std::memory_order_release);
+
+        return true;
+    }
+
+    // Copies the next published record into buf (single consumer)
+    bool pop(spdlog::memory_buf_t& buf) {
+        const uint64_t pos = header_->dequeue_pos.load(std::memory_order_relaxed);
+        const char* first = slot_data(pos & mask_);
+
+        if(slot(pos & mask_).sequence.load(std::memory_order_acquire) != pos + 1)
+            return false;
+
+        record_header header;
+        std::memcpy(&header, first, sizeof(header));
+
+        const size_t data_size = slot_data_size();
+        const uint64_t n_slots = (header.size + data_size - 1) / data_size;
+
+        buf.clear();
+
+        for(uint64_t i = 0; i < n_slots; i++) {
+            const size_t offset = static_cast<size_t>(i) * data_size;
+            const char* data = slot_data((pos + i) & mask_);
+            buf.append(data, data + std::min<size_t>(data_size, header.size - offset));
+        }
+
+        release(pos, n_slots);
+
+        return true;
+    }
+
+    // When the next record is claimed but not published, and the producer that claimed it
+    // is dead, releases its slots and counts the record as dropped (single consumer).
+    // Returns true if slots were released
+    bool release_abandoned() {
+        const uint64_t pos = header_->dequeue_pos.load(std::memory_order_relaxed);
+
+        if(header_->enqueue_pos.load(std::memory_order_relaxed) <= pos)
+            return false;
+
+        const slot_header& first = slot(pos & mask_);
+
+        if(first.sequence.load(std::memory_order_acquire) == pos + 1 || first.claim_pos.load(std::memory_order_acquire) != pos)
+            return false;
+
+        const uint64_t n_slots = first.claim_slots.load(std::memory_order_relaxed);
+
+        if(n_slots == 0 || n_slots > slot_count_ || process_alive(first.claim_pid.load(std::memory_order_relaxed)))
+            return false;
+
+        release(pos, n_slots);
+        header_->dropped.fetch_add(1, std::memory_order_relaxed);
+
+        return true;
+    }
+
+private:
+    // Returns the slots of a record to the producers of the next lap
+    void release(uint64_t pos, uint64_t n_slots) {
+        for(uint64_t i = 0; i < n_slots; i++)
+            slot((pos + i) & mask_).sequence.store(pos + i + slot_count_, std::memory_order_release);
+
+        header_->dequeue_pos.store(pos + n_slots, std::memory_order_relaxed);
+    }
+
+    // Removes the segment of a dead collector, whose header is complete and of this version
+    static bool remove_stale(const std::string& name) {
+        std::unique_ptr<segment> seg;
+
+        try {
+            seg = segment::open(name);
+        }
+        catch(const spdlog::spdlog_ex&) {
+            return false;
+        }
+
+        if(seg->size() < header_size)
+            return false;
+
+        const queue_header* header = reinterpret_cast<const queue_header*>(seg->data());
+
+        if(header->magic.load(std::memory_order_acquire) != queue_magic || header->version != queue_version
+           || process_alive(header->owner_pid))
+            return false;
+
+        seg->unlink();
+
+        return true;
+    }
+
+    void init_slots() {
+        slot_count_ = static_cast<size_t>(header_->slot_count);
+        slot_size_ = header_->slot_size;
+        mask_ = slot_count_ - 1;
+        slots_ = segment_->data() + header_size;
+
+        if(header_size + slot_count_ * slot_size_ > segment_->size())
+            throw spdlog::spdlog_ex("invalid shared memory queue size");
+    }
+
+    size_t slot_data_size() const { return slot_size_ - slot_data_offset; }
+
+    slot_header& slot(size_t index) const {
+        return *reinterpret_cast<slot_header*>(slots_ + index * slot_size_);
+    }
+
+    char* slot_data(size_t index) const {
+        return slots_ + index * slot_size_ + slot_data_offset;
+    }
+
+    std::unique_ptr<segment> segment_;
+    queue_header* header_ = nullptr;
+    char* slots_ = nullptr;
+    size_t slot_count_ = 0;
+    size_t slot_size_ = 0;
+    size_t mask_ = 0;
+};
+
+} // namespace shm
+
+class shm_queue_sink final : public spdlog::sinks::sink {
+public:
+    shm_queue_sink(const std::string& name, bool block)
+        : queue_(name), block_(block) {}
+
+    void log(const spdlog::details::log_msg& msg) override {
+        thread_local spdlog::memory_buf_t buf;
+
+        const size_t logger_name_size = std::min<size_t>(msg.logger_name.size(), std::numeric_limits<uint16_t>::max());
+        const size_t filename_size = msg.source.filename != nullptr ? std::min<size_t>(std::strlen(msg.source.filename), std::numeric_limits<uint16_t>::max()) : 0;
+        const size_t funcname_size = msg.source.funcname != nullptr ? std::strlen(msg.source.funcname) : 0;
+        const size_t fixed_size = sizeof(shm::record_header) + logger_name_size + filename_size + funcname_size;
+
+        // Records larger than the ring are truncated rather than never fitting
+        size_t payload_size = msg.payload.size();
+
+        if(fixed_size + payload_size > queue_.capacity())
+            payload_size = queue_.capacity() > fixed_size ? queue_.capacity() - fixed_size : 0;
+
+        shm::record_header header{};
+        header.size = static_cast<uint32_t>(fixed_size + payload_size);
+        header.level = static_cast<int32_t>(msg.level);
+        header.time = std::chrono::duration_cast<std::chrono::nanoseconds>(msg.time.time_since_epoch()).count();
+        header.thread_id = msg.thread_id;
+        header.line = msg.source.line;
+        header.logger_name_size = static_cast<uint16_t>(logger_name_size);
+        header.filename_size = static_cast<uint16_t>(filename_size);
+        header.funcname_size = static_cast<uint32_t>(funcname_size);
+        header.payload_size = static_cast<uint32_t>(payload_size);
+
+        buf.clear();
+        buf.append(reinterpret_cast<const char*>(&header), reinterpret_cast<const char*>(&header) + sizeof(header));
+        buf.append(msg.logger_name.data(), msg.logger_name.data() + logger_name_size);
+        buf.append(msg.source.filename, msg.source.filename + filename_size);
+        buf.append(msg.source.funcname, msg.source.funcname + funcname_size);
+        buf.append(msg.payload.data(), msg.payload.data() + payload_size);
+
+        queue_.push(buf.data(), buf.size(), block_);
+    }
+
+    // Records are formatted and flushed by the collector sinks
+    void flush() override {}
+    void set_pattern(const std::string&) override {}
+    void set_formatter(std::unique_ptr<spdlog::formatter>) override {}
+
+    uint64_t dropped() const { return queue_.dropped(); }
+
+private:
+    shm::queue queue_;
+    bool block_;
+};
+
+class shm_collector;
+
+// The sink errors of a collector go through the spdlog logger error handler (rate limited
+// report on stderr), under the collector name
+struct error_reporter : spdlog::logger {
+    explicit error_reporter(std::string name)
+        : spdlog::logger(std::move(name)) {}
+
+    void report(const std::string& msg) { err_handler_(msg); }
+};
+
+// Live collectors
+static nb::ft_mutex g_collectors_mutex;
+static std::vector<shm_collector*> g_collectors;
+
+class shm_collector {
+public:
+    shm_collector(const std::string& name, std::vector<spdlog::sink_ptr> sinks, size_t slot_count, size_t slot_size, int poll_interval_ms)
+        : name_(name), sinks_(std::move(sinks)), queue_(name, slot_count, slot_size), errors_(name),
+          poll_interval_(std::chrono::milliseconds(std::max(poll_interval_ms, 1)))
+    {
+#ifndef _WIN32
+        owner_pid_ = getpid();
+#endif
+        worker_.reset(new std::thread([this] { worker_loop(); }));
+
+        nb::ft_lock_guard lock(g_collectors_mutex);
+        g_collectors.push_back(this);
+    }
+
+    ~shm_collector() {
+        {
+            nb::ft_lock_guard lock(g_collectors_mutex);
+            g_collectors.erase(std::find(g_collectors.begin(), g_collectors.end(), this));
+        }
+
+        stop();
+    }
+
+    const std::string& name() const { return name_; }
+    const std::vector<spdlog::sink_ptr>& sinks() const { return sinks_; }
+    uint64_t dropped() const { return queue_.dropped(); }
+    uint64_t queue_size() const { return queue_.size(); }
+    size_t slot_count() const { return queue_.slot_count(); }
+    size_t slot_size() const { return queue_.slot_size(); }
+
+    // Writes all the published records to the sinks and flushes them
+    size_t flush() {
+        std::lock_guard<std::mutex> lock(mutex_);
+        const size_t count = drain();
+        flush_sinks();
+        return count;
+    }
+
+    // Around a fork, keeps the worker thread out of the sinks and flushes their buffers
+    // (they would otherwise be written again by the child)
+    void before_fork() {
+        mutex_.lock();
+        flush_sinks();
+    }
+
+    void after_fork() {
+        mutex_.unlock();
+    }
+
+    void stop() {
+        if(!worker_)
+            return;
+
+#ifndef _WIN32
+        // The worker thread does not exist in a forked child
+        if(getpid() != owner_pid_) {
+            worker_.release();
+            return;
+        }
+#endif
+        queue_.close();
+        stop_.store(true);
+        worker_->join();
+        worker_.reset();
+
+        flush();
+    }
+
+private:
+    size_t drain() {
+        size_t count = 0;
+
+        // A record claimed by a dead producer would otherwise block the ring
+        while(queue_.pop(buf_) || (queue_.release_abandoned() && queue_.pop(buf_))) {
+            shm::record_header header;
+            std::memcpy(&header, buf_.data(), sizeof(header));
+
+            const char* data = buf_.data() + sizeof(header);
+            const spdlog::string_view_t logger_name(data, header.logger_name_size);
+            data += header.logger_name_size;
+
+            filename_.assign(data, header.filename_size);
+            data += header.filename_size;
+
+            funcname_.assign(data, header.funcname_size);
+            data += header.funcname_size;
+
+            const spdlog::source_loc loc = header.filename_size != 0
+                ? spdlog::source_loc(filename_.c_str(), header.line, funcname_.c_str())
+                : spdlog::source_loc();
+
+            const auto time = spdlog::log_clock::time_point(std::chrono::duration_cast<spdlog::log_clock::duration>(std::chrono::nanoseconds(header.time)));
+            const auto lvl = static_cast<spdlog::level::level_enum>(header.level);
+
+            spdlog::details::log_msg msg(time, loc, logger_name, lvl, spdlog::string_view_t(data, header.payload_size));
+            msg.thread_id = static_cast<size_t>(header.thread_id);
+
+            for(auto& sink : sinks_) {
+                if(!sink->should_log(lvl))
+                    continue;
+
+                try {
+                    sink->log(msg);
+                }
+                catch(const std::exception& ex) {
+                    report_error(ex.what());
+                }
+            }
+
+            count++;
+        }
+
+        return count;
+    }
+
+    void flush_sinks() {
+        for(auto& sink : sinks_) {
+            try {
+                sink->flush();
+            }
+            catch(const std::exception& ex) {
+                report_error(ex.what());
+            }
+        }
+    }
+
+    void report_error(const char* what) {
+        errors_.report(what);
+    }
+
+    // Drains the ring while records come in, and flushes the sinks once it goes idle
+    void worker_loop() {
+        bool pending_flush = false;
+
+        while(!stop_.load()) {
+            size_t count;
+
+            {
+                std::lock_guard<std::mutex> lock(mutex_);
+                count = drain();
+
+                if(count == 0 && pending_flush)
+                    flush_sinks();
+            }
+
+            pending_flush = count != 0;
+
+            if(count == 0)
+                std::this_thread::sleep_for(poll_interval_);
+        }
+    }
+
+    std::string name_;
+    std::vector<spdlog::sink_ptr> sinks_;
+    shm::queue queue_;
+    error_reporter errors_;
+    std::chrono::milliseconds poll_interval_;
+    std::mutex mutex_;
+    spdlog::memory_buf_t buf_;
+    std::string filename_;
+    std::string funcname_;
+    std::atomic<bool> stop_{ false };
+    std::unique_ptr<std::thread> worker_;
+#ifndef _WIN32
+    pid_t owner_pid_ = 0;
+#endif
+};
+
+// Binary log files (binary_file_sink, decode). Records are written unformatted, as
+// little-endian length-prefixed records: a record_header followed by a payload. Each
+// time a sink opens a file it writes a session record (magic payload, format version in
+// logger_id), then a logger record (name payload) the first time a logger name is seen
+// in the session, message records referring to loggers by id. The decoder maps the
+// file and formats the records with any pattern
+namespace binlog {
+
+static constexpr char session_magic[] = "spydlog-binary-log";
+static constexpr uint32_t format_version = 1;
+
+enum record_kind : uint8_t { session = 0, logger = 1, message = 2 };
+
+#pragma pack(push, 1)
+struct record_header {
+    uint32_t size;       // bytes following this field
+    uint8_t kind;
+    uint8_t level;
+    uint16_t reserved;
+    uint32_t logger_id;
+    int64_t time;        // nanoseconds since the epoch
+    uint64_t thread_id;
+};
+#pragma pack(pop)
+
+static constexpr uint32_t header_payload_offset = sizeof(record_header) - sizeof(uint32_t);
+
+static void append_record(spdlog::memory_buf_t& buf, record_kind kind, uint8_t level, uint32_t logger_id,
+                          int64_t time, uint64_t thread_id, spdlog::string_view_t payload) {
+    record_header header{};
+    header.size = header_payload_offset + static_cast<uint32_t>(payload.size());
+    header.kind = kind;
+    header.level = level;
+    header.logger_id = logger_id;
+    header.time = time;
+    header.thread_id = thread_id;
+
+    const char* data = reinterpret_cast<const char*>(&header);
+    buf.append(data, data + sizeof(header));
+    buf.append(payload.data(), payload.data() + payload.size());
+}
+
+template<typename Mutex>
+class binary_file_sink final : public spdlog::sinks::base_sink<Mutex> {
+public:
+    binary_file_sink(const spdlog::filename_t& filename, bool truncate) {
+        file_helper_.open(filename, truncate);
+
+        spdlog::memory_buf_t buf;
+        append_record(buf, session, 0, format_version, 0, 0, spdlog::string_view_t(session_magic, sizeof(session_magic) - 1));
+        file_helper_.write(buf);
+    }
+
+    const spdlog::filename_t& filename() const { return file_helper_.filename(); }
+
+protected:
+    void sink_it_(const spdlog::details::log_msg& msg) override {
+        buf_.clear();
+
+        const uint32_t id = logger_id(msg.logger_name);
+        const int64_t time = std::chrono::duration_cast<std::chrono::nanoseconds>(msg.time.time_since_epoch()).count();
+
+        append_record(buf_, message, static_cast<uint8_t>(msg.level), id, time, msg.thread_id, msg.payload);
+        file_helper_.write(buf_);
+    }
+
+    void flush_() override { file_helper_.flush(); }
+
+private:
+    // The name of a message points into its logger, so the last name address is checked
+    // first (and its content compared, the address may have been reused)
+    uint32_t logger_id(spdlog::string_view_t name) {
+        if(name.data() == last_name_data_ && name.size() == last_name_->size() &&
+           std::memcmp(name.data(), last_name_->data(), name.size()) == 0)
+            return last_id_;
+
+        auto it = logger_ids_.find(std::string(name.data(), name.size()));
+
+        if(it == logger_ids_.end()) {
+            const uint32_t id = static_cast<uint32_t>(logger_ids_.size());
+            it = logger_ids_.emplace(std::string(name.data(), name.size()), id).first;
+            append_record(buf_, logger, 0, id, 0, 0, name);
+        }
+
+        last_name_data_ = name.data();
+        last_name_ = &it->first;
+        last_id_ = it->second;
+
+        return last_id_;
+    }
+
+    spdlog::details::file_helper file_helper_;
+    spdlog::memory_buf_t buf_;
+    std::unordered_map<std::string, uint32_t> logger_ids_;
+    const char* last_name_data_ = nullptr;
+    const std::string* last_name_ = nullptr;
+    uint32_t last_id_ = 0;
+};
+
+// Read-only mapping of a whole file
+class mapped_file {
+public:
+    explicit mapped_file(const std::string& filename) {
+#ifdef _WIN32
+        file_ = CreateFileA(filename.c_str(), GENERIC_READ, FILE_SHARE_READ | FILE_SHARE_WRITE | FILE_SHARE_DELETE,
+                            nullptr, OPEN_EXISTING, FILE_ATTRIBUTE_NORMAL, nullptr);
+
+        if(file_ == INVALID_HANDLE_VALUE)
+            throw spdlog::spdlog_ex("failed to open binary log " + filename);
+
+        LARGE_INTEGER size;
+
+        if(!GetFileSizeEx(file_, &size))
+            throw spdlog::spdlog_ex("failed to stat binary log " + filename);
+
+        size_ = static_cast<size_t>(size.QuadPart);
+
+        if(size_ == 0)
+            return;
+
+        mapping_ = CreateFileMappingA(file_, nullptr, PAGE_READONLY, 0, 0, nullptr);
+
+        if(mapping_ == nullptr)
+            throw spdlog::spdlog_ex("failed to map binary log " + filename);
+
+        data_ = static_cast<const char*>(MapViewOfFile(mapping_, FILE_MAP_READ, 0, 0, 0));
+
+        if(data_ == nullptr)
+            throw spdlog::spdlog_ex("failed to map binary log " + filename);
+#else
+        fd_ = ::open(filename.c_str(), O_RDONLY);
+
+        if(fd_ == -1)
+            throw spdlog::spdlog_ex("failed to open binary log " + filename, errno);
+
+        struct stat st;
+
+        if(fstat(fd_, &st) == -1)
+            throw spdlog::spdlog_ex("failed to stat binary log " + filename, errno);
+
+        size_ = static_cast<size_t>(st.st_size);
+
+        if(size_ == 0)
+            return;
+
+        void* data = mmap(nullptr, size_, PROT_READ, MAP_SHARED, fd_, 0);
+
+        if(data == MAP_FAILED)
+            throw spdlog::spdlog_ex("failed to map binary log " + filename, errno);
+
+        data_ = static_cast<const char*>(data);
+        madvise(data, size_, MADV_SEQUENTIAL);
+#endif
+    }
+
+    mapped_file(const mapped_file&) = delete;
+    mapped_file& operator=(const mapped_file&) = delete;
+
+    ~mapped_file() {
+#ifdef _WIN32
+        if(data_ != nullptr)
+            UnmapViewOfFile(data_);
+
+        if(mapping_ != nullptr)
+            CloseHandle(mapping_);
+
+        if(file_ != INVALID_HANDLE_VALUE)
+            CloseHandle(file_);
+#else
+        if(data_ != nullptr)
+            munmap(const_cast<char*>(data_), size_);
+
+        if(fd_ != -1)
+            close(fd_);
+#endif
+    }
+
+    const char* data() const { return data_; }
+    size_t size() const { return size_; }
+
+private:
+#ifdef _WIN32
+    HANDLE file_ = INVALID_HANDLE_VALUE;
+    HANDLE mapping_ = nullptr;
+#else
+    int fd_ = -1;
+#endif
+    const char* data_ = nullptr;
+    size_t size_ = 0;
+};
+
+// Iterator returned by decode. Yields (time_ns, level, logger_name, thread_id, payload)
+// tuples, or the formatted records (without line ending) if a pattern is given. A
+// record cut short at the end of the file (still being written) ends the iteration
+class reader {
+public:
+    reader(const std::string& filename, std::optional<std::string> pattern, spdlog::pattern_time_type time_type,
+           spdlog::level::level_enum min_level)
+        : file_(filename), filename_(filename), min_level_(min_level) {
+        if(pattern)
+            formatter_ = make_formatter(*pattern, time_type);
+
+        record_header header;
+
+        if(!read_header(header) || header.kind != session ||
+           spdlog::string_view_t(file_.data() + offset_ + sizeof(header), header.size - header_payload_offset) !=
+           spdlog::string_view_t(session_magic, sizeof(session_magic) - 1))
+            throw spdlog::spdlog_ex("not a spydlog binary log: " + filename);
+    }
+
+    nb::object next() {
+        record_header header;
+
+        while(read_header(header)) {
+            const char* payload = file_.data() + offset_ + sizeof(header);
+            const size_t payload_size = header.size - header_payload_offset;
+            const size_t offset = offset_;
+            offset_ += sizeof(uint32_t) + header.size;
+
+            switch(header.kind) {
+            case session:
+                if(header.logger_id > format_version)
+                    throw spdlog::spdlog_ex(spdlog::fmt_lib::format("unsupported binary log version {} at offset {} of {}", header.logger_id, offset, filename_));
+
+                loggers_.clear();
+                break;
+            case logger:
+                if(header.logger_id != loggers_.size())
+                    throw spdlog::spdlog_ex(spdlog::fmt_lib::format("corrupted binary log record at offset {} of {}", offset, filename_));
+
+                loggers_.emplace_back(payload, payload_size);
+                break;
+            case message:
+                if(header.logger_id >= loggers_.size() || header.level >= spdlog::level::n_levels)
+                    throw spdlog::spdlog_ex(spdlog::fmt_lib::format("corrupted binary log record at offset {} of {}", offset, filename_));
+
+                if(header.level < min_level_)
+                    break;
+
+                return make_record(header, spdlog::string_view_t(payload, payload_size));
+            default:
+                throw spdlog::spdlog_ex(spdlog::fmt_lib::format("corrupted binary log record at offset {} of {}", offset, filename_));
+            }
+        }
+
+        throw nb::stop_iteration();
+    }
+
+private:
+    bool read_header(record_header& header) {
+        if(file_.size() - offset_ < sizeof(header))
+            return false;
+
+        std::memcpy(&header, file_.data() + offset_, sizeof(header));
+
+        if(header.size < header_payload_offset)
+            throw spdlog::spdlog_ex(spdlog::fmt_lib::format("corrupted binary log record at offset {} of {}", offset_, filename_));
+
+        return file_.size() - offset_ - sizeof(uint32_t) >= header.size;
+    }
+
+    nb::object make_record(const record_header& header, spdlog::string_view_t payload) {
+        const std::string& name = loggers_[header.logger_id];
+        const auto level = static_cast<spdlog::level::level_enum>(header.level);
+
+        if(!formatter_) {
+            return nb::make_tuple(header.time, level, name, header.thread_id,
+                                  nb::bytes(payload.data(), payload.size()));
+        }
+
+        const spdlog::log_clock::time_point time(std::chrono::duration_cast<spdlog::log_clock::duration>(std::chrono::nanoseconds(header.time)));
+        spdlog::details::log_msg msg(time, spdlog::source_loc{}, name, level, payload);
+        msg.thread_id = static_cast<size_t>(header.thread_id);
+
+        buf_.clear();
+        formatter_->format(msg, buf_);
+
+        size_t size = buf_.size();
+        const size_t eol_size = std::strlen(spdlog::details::os::default_eol);
+
+        if(size >= eol_size && std::memcmp(buf_.data() + size - eol_size, spdlog::details::os::default_eol, eol_size) == 0)
+            size -= eol_size;
+
+        return nb::steal(PyUnicode_DecodeUTF8(buf_.data(), static_cast<Py_ssize_t>(size), "replace"));
+    }
+
+    mapped_file file_;
+    std::string filename_;
+    spdlog::level::level_enum min_level_;
+    std::unique_ptr<spdlog::formatter> formatter_;
+    std::vector<std::string> loggers_;
+    spdlog::memory_buf_t buf_;
+    size_t offset_ = 0;
+};
+
+} // namespace binlog
+
+using binary_file_sink_mt = binlog::binary_file_sink<std::mutex>;
+using binary_file_sink_st = binlog::binary_file_sink<spdlog::details::null_mutex>;
+
+// Raw file sink. While its formatter writes the payload and the end of line only ("%v",
+// the default), the payload of each record is written to the file as is, without being
+// formatted into a buffer first: a multi-MB record is not copied again. The formatter
+// is checked when it is set, on a probe message. Other patterns are formatted as by
+// basic_file_sink
+static bool formats_payload_only(spdlog::formatter& formatter) {
+    static constexpr char probe[] = "spydlog-probe";
+
+    const spdlog::details::log_msg msg("probe", spdlog::level::info, spdlog::string_view_t(probe, sizeof(probe) - 1));
+    spdlog::memory_buf_t buf;
+    formatter.format(msg, buf);
+
+    const size_t eol_size = std::strlen(spdlog::details::os::default_eol);
+
+    return buf.size() == sizeof(probe) - 1 + eol_size &&
+           std::memcmp(buf.data(), probe, sizeof(probe) - 1) == 0 &&
+           std::memcmp(buf.data() + sizeof(probe) - 1, spdlog::details::os::default_eol, eol_size) == 0;
+}
+
+template<typename Mutex>
+class raw_file_sink final : public spdlog::sinks::base_sink<Mutex> {
+public:
+    raw_file_sink(const spdlog::filename_t& filename, bool truncate) : filename_(filename) {
+        spdlog::details::os::create_dir(spdlog::details::os::dir_name(filename));
+
+        if(spdlog::details::os::fopen_s(&file_, filename, truncate ? SPDLOG_FILENAME_T("wb") : SPDLOG_FILENAME_T("ab")))
+            throw spdlog::spdlog_ex("failed to open raw log " + filename, errno);
+
+        raw_file_sink::set_pattern_("%v");
+    }
+
+    ~raw_file_sink() override {
+        if(file_ != nullptr)
+            std::fclose(file_);
+    }
+
+    const spdlog::filename_t& filename() const { return filename_; }
+
+protected:
+    void sink_it_(const spdlog::details::log_msg& msg) override {
+        if(raw_) {
+            write(msg.payload.data(), msg.payload.size());
+            write(spdlog::details::os::default_eol, std::strlen(spdlog::details::os::default_eol));
+            return;
+        }
+
+        spdlog::memory_buf_t formatted;
+        this->formatter_->format(msg, formatted);
+        write(formatted.data(), formatted.size());
+    }
+
+    void flush_() override {
+        if(std::fflush(file_) != 0)
+            throw spdlog::spdlog_ex("failed to flush raw log " + filename_, errno);
+    }
+
+    void set_pattern_(const std::string& pattern) override {
+        set_formatter_(make_formatter(pattern, spdlog::pattern_time_type::local));
+    }
+
+    void set_formatter_(std::unique_ptr<spdlog::formatter> formatter) override {
+        raw_ = formats_payload_only(*formatter);
+        this->formatter_ = std::move(formatter);
+    }
+
+private:
+    void write(const char* data, size_t size) {
+        if(std::fwrite(data, 1, size, file_) != size)
+            throw spdlog::spdlog_ex("failed to write raw log " + filename_, errno);
+    }
+
+    spdlog::filename_t filename_;
+    std::FILE* file_ = nullptr;
+    bool raw_ = false;
+};
+
+using raw_file_sink_mt = raw_file_sink<std::mutex>;
+using raw_file_sink_st = raw_file_sink<spdlog::details::null_mutex>;
+
+// Per-thread loggers. A per_thread_logger gives each thread logging to it a state of its
+// own, found through a thread_local cache, so the threads never share a sink:
+// - with a sink factory, the state holds the sinks the factory created for the thread
+//   (e.g. one _st file sink per thread), written by the thread itself
+// - with shared sinks, the state buffers copies of the records of the thread, and a merge
+//   thread writes the buffers of all the threads to the sinks in timestamp order, every
+//   merge interval or as soon as a buffer is full (the thread logging then waits)
+// The mutex of a state is only contended by flush, set_pattern and the merge thread.
+// States of exited threads are dropped by the merge thread, or by the next thread that
+// starts logging (with the GIL, sinks created from Python being released)
+namespace per_thread {
+
+struct state {
+    std::mutex mutex;
+    std::condition_variable space;
+    std::vector<spdlog::sink_ptr> sinks;
+    std::vector<spdlog::details::log_msg_buffer> pending;
+    std::vector<spdlog::details::log_msg_buffer> batch;
+    std::thread::id owner = std::this_thread::get_id();
+    std::atomic<bool> exited{ false };
+};
+
+// States of the current thread by logger id, marked exited when the thread ends
+struct thread_states {
+    std::unordered_map<uint64_t, std::weak_ptr<state>> states;
+    uint64_t cached_id = 0;
+    state* cached = nullptr;
+
+    ~thread_states() {
+        for(const auto& entry : states) {
+            if(auto s = entry.second.lock())
+                s->exited.store(true);
+        }
+    }
+};
+
+static thread_local thread_states t_states;
+static std::atomic<uint64_t> g_next_id{ 1 };
+
+}  // namespace per_thread
+
+class per_thread_logger;
+
+// Live per-thread loggers, paused around forks and stopped at shutdown
+static nb::ft_mutex g_per_thread_loggers_mutex;
+static std::vector<per_thread_logger*> g_per_thread_loggers;
+
+class per_thread_logger final : public spdlog::logger {
+public:
+    // Each thread logs to the sinks returned by sink_factory, called from the thread
+    per_thread_logger(std::string name, nb::object sink_factory)
+        : spdlog::logger(std::move(name)), sink_factory_(std::move(sink_factory))
+    {
+        register_logger();
+    }
+
+    // The records of all the threads are merged into sinks
+    per_thread_logger(std::string name, std::vector<spdlog::sink_ptr> sinks, size_t buffer_size, int merge_interval_ms)
+        : spdlog::logger(std::move(name), sinks.begin(), sinks.end()), merged_(true),
+          buffer_size_(std::max<size_t>(buffer_size, 1)),
+          merge_interval_(std::chrono::milliseconds(std::max(merge_interval_ms, 1)))
+    {
+        start_merging();
+        register_logger();
+    }
+
+    per_thread_logger(const per_thread_logger& other)
+        : spdlog::logger(other), sink_factory_(other.sink_factory_), merged_(other.merged_),
+          buffer_size_(other.buffer_size_), merge_interval_(other.merge_interval_)
+    {
+        {
+            std::lock_guard<std::mutex> lock(other.states_mutex_);
+
+            if(other.formatter_)
+                formatter_ = other.formatter_->clone();
+        }
+
+        if(merged_)
+            start_merging();
+
+        register_logger();
+    }
+
+    ~per_thread_logger() override {
+        {
+            nb::ft_lock_guard lock(g_per_thread_loggers_mutex);
+            g_per_thread_loggers.erase(std::find(g_per_thread_loggers.begin(), g_per_thread_loggers.end(), this));
+        }
+
+        stop_merging();
+
+        // Release the sinks created from Python here, rather than from a thread ending later
+        std::lock_guard<std::mutex> lock(states_mutex_);
+
+        for(const auto& state : states_) {
+            std::lock_guard<std::mutex> state_lock(state->mutex);
+            state->sinks.clear();
+        }
+    }
+
+    // Like async_logger::clone, and with a record
+    std::shared_ptr<spdlog::logger> clone(std::string logger_name) override {
+        auto cloned = make_logger<per_thread_logger>(*this);
+        cloned->name_ = std::move(logger_name);
+        return cloned;
+    }
+
+    // set_pattern applies to the sinks of every thread, and of the threads to come
+    void set_thread_formatter(std::unique_ptr<spdlog::formatter> formatter) {
+        if(merged_) {
+            std::lock_guard<std::mutex> lock(merge_mutex_);
+            set_formatter(std::move(formatter));
+            return;
+        }
+
+        std::lock_guard<std::mutex> lock(states_mutex_);
+
+        for(const auto& state : states_) {
+            std::lock_guard<std::mutex> state_lock(state->mutex);
+
+            for(auto& sink : state->sinks)
+                sink->set_formatter(formatter->clone());
+        }
+
+        formatter_ = std::move(formatter);
+    }
+
+    // Writes the buffered records and stops the merge thread, the threads logging
+    // afterwards write the records of all the threads themselves
+    void stop_merging() {
+        if(!merger_)
+            return;
+
+        stopped_.store(true);
+
+        {
+            std::lock_guard<std::mutex> lock(wake_mutex_);
+            stop_ = true;
+        }
+
+        wake_cv_.notify_one();
+        merger_->join();
+        merger_.reset();
+
+        std::lock_guard<std::mutex> lock(merge_mutex_);
+        merge(spdlog::log_clock::time_point::max());
+        flush_sinks();
+    }
+
+    // Around a fork, keeps the merge thread and the other threads out of the sinks and
+    // flushes their buffers (they would otherwise be written again by the child)
+    void before_fork() {
+        if(merged_) {
+            merge_mutex_.lock();
+            merge(spdlog::log_clock::time_point::max());
+            flush_sinks();
+        } else {
+            flush_();
+        }
+
+        states_mutex_.lock();
+        wake_mutex_.lock();
+    }
+
+    void after_fork_parent() {
+        wake_mutex_.unlock();
+        states_mutex_.unlock();
+
+        if(merged_)
+            merge_mutex_.unlock();
+    }
+
+    // Only the forking thread exists in the child. The states of the other threads, which
+    // they may have left locked, are leaked: their records were written before the fork
+    void after_fork_child() {
+        const auto owner = std::this_thread::get_id();
+        std::vector<std::shared_ptr<per_thread::state>> kept;
+        auto* leaked = new std::vector<std::shared_ptr<per_thread::state>>();
+
+        for(auto& state : states_)
+            (state->owner == owner ? kept : *leaked).push_back(std::move(state));
+
+        states_.swap(kept);
+
+        wake_mutex_.unlock();
+        states_mutex_.unlock();
+
+        if(merged_) {
+            merge_mutex_.unlock();
+
+            // The merge thread does not exist in the child
+            if(merger_) {
+                merger_.release();
+                start_merging();
+            }
+        }
+    }
+
+protected:
+    void sink_it_(const spdlog::details::log_msg& msg) override {
+        per_thread::state& state = this_thread_state();
+
+        if(!merged_) {
+            std::lock_guard<std::mutex> lock(state.mutex);
+
+            for(auto& sink : state.sinks) {
+                if(sink->should_log(msg.level)) {
+                    try {
+                        sink->log(msg);
+                    }
+                    catch(const std::exception& ex) {
+                        err_handler_(ex.what());
+                    }
+                }
+            }
+        } else if(stopped_.load(std::memory_order_relaxed)) {
+            {
+                std::lock_guard<std::mutex> lock(state.mutex);
+                state.pending.emplace_back(msg);
+            }
+
+            std::lock_guard<std::mutex> lock(merge_mutex_);
+            merge(spdlog::log_clock::time_point::max());
+        } else {
+            std::unique_lock<std::mutex> lock(state.mutex);
+
+            if(state.pending.size() >= buffer_size_) {
+                wake();
+                state.space.wait(lock, [&] { return state.pending.size() < buffer_size_ || stopped_.load(); });
+            }
+
+            state.pending.emplace_back(msg);
+            state.pending.back().time = log_time();
+        }
+
+        if(should_flush_(msg))
+            flush_();
+    }
+
+    void flush_() override {
+        if(merged_) {
+            std::lock_guard<std::mutex> lock(merge_mutex_);
+            merge(log_time());
+            flush_sinks();
+            return;
+        }
+
+        std::lock_guard<std::mutex> lock(states_mutex_);
+
+        for(const auto& state : states_) {
+            std::lock_guard<std::mutex> state_lock(state->mutex);
+
+            for(auto& sink : state->sinks) {
+                try {
+                    sink->flush();
+                }
+                catch(const std::exception& ex) {
+                    err_handler_(ex.what());
+                }
+            }
+        }
+    }
+
+private:
+    void register_logger() {
+        nb::ft_lock_guard lock(g_per_thread_loggers_mutex);
+        g_per_thread_loggers.push_back(this);
+    }
+
+    per_thread::state& this_thread_state() {
+        per_thread::thread_states& local = per_thread::t_states;
+
+        if(local.cached_id == id_)
+            return *local.cached;
+
+        auto it = local.states.find(id_);
+        std::shared_ptr<per_thread::state> state = it != local.states.end() ? it->second.lock() : nullptr;
+
+        if(!state)
+            state = add_thread_state();
+
+        local.cached_id = id_;
+        local.cached = state.get();
+        return *state;
+    }
+
+    std::shared_ptr<per_thread::state> add_thread_state() {
+        per_thread::thread_states& local = per_thread::t_states;
+        auto state = std::make_shared<per_thread::state>();
+
+        // Forget the states of destroyed loggers
+        if(local.states.size() >= 16) {
+            for(auto it = local.states.begin(); it != local.states.end();)
+                it = it->second.expired() ? local.states.erase(it) : std::next(it);
+        }
+
+        // Published before calling the sink factory, which could log to this logger
+        local.states[id_] = state;
+
+        {
+            std::lock_guard<std::mutex> lock(states_mutex_);
+            states_.push_back(state);
+        }
+
+        if(merged_)
+            return state;
+
+        try {
+            nb::gil_scoped_acquire gil;
+            drop_exited();
+
+            auto sink = nb::cast<spdlog::sink_ptr>(sink_factory_());
+
+            std::lock_guard<std::mutex> lock(states_mutex_);
+            std::lock_guard<std::mutex> state_lock(state->mutex);
+
+            if(formatter_)
+                sink->set_formatter(formatter_->clone());
+
+            state->sinks.push_back(std::move(sink));
+        } catch(...) {
+            // Called again by the next message of the thread
+            local.states.erase(id_);
+
+            std::lock_guard<std::mutex> lock(states_mutex_);
+            states_.erase(std::find(states_.begin(), states_.end(), state));
+            throw;
+        }
+
+        return state;
+    }
+
+    // Flushes and releases the sinks of the exited threads, called with the GIL. The sinks
+    // are released once the locks are, as releasing a sink created from Python runs Python
+    void drop_exited() {
+        std::vector<spdlog::sink_ptr> released;
+        std::lock_guard<std::mutex> lock(states_mutex_);
+
+        states_.erase(std::remove_if(states_.begin(), states_.end(), [&](const std::shared_ptr<per_thread::state>& state) {
+            if(!state->exited.load())
+                return false;
+
+            std::lock_guard<std::mutex> state_lock(state->mutex);
+
+            for(auto& sink : state->sinks) {
+                try {
+                    sink->flush();
+                }
+                catch(const std::exception& ex) {
+                    err_handler_(ex.what());
+                }
+            }
+
+            std::move(state->sinks.begin(), state->sinks.end(), std::back_inserter(released));
+            state->sinks.clear();
+            return true;
+        }), states_.end());
+    }
+
+    void start_merging() {
+        stop_ = false;
+        stopped_.store(false);
+        merger_.reset(new std::thread([this] { merge_loop(); }));
+    }
+
+    void wake() {
+        {
+            std::lock_guard<std::mutex> lock(wake_mutex_);
+            wake_ = true;
+        }
+
+        wake_cv_.notify_one();
+    }
+
+    // Writes the buffered records of all the threads older than cutoff to the sinks in
+    // timestamp order, called with merge_mutex_ held. Records are stamped when buffered,
+    // under the lock of their state, so all the records older than a cutoff taken before
+    // the buffers are collected are collected. Returns the number of records written
+    size_t merge(spdlog::log_clock::time_point cutoff) {
+        {
+            std::lock_guard<std::mutex> lock(states_mutex_);
+            merging_ = states_;
+        }
+
+        using cursor = std::pair<spdlog::log_clock::time_point, size_t>;
+        std::priority_queue<cursor, std::vector<cursor>, std::greater<cursor>> next;
+        positions_.assign(merging_.size(), 0);
+
+        for(size_t i = 0; i < merging_.size(); i++) {
+            per_thread::state& state = *merging_[i];
+
+            {
+                std::lock_guard<std::mutex> lock(state.mutex);
+                const bool full = state.pending.size() >= buffer_size_;
+
+                // The batch keeps the records newer than the last cutoff
+                if(state.batch.empty()) {
+                    state.pending.swap(state.batch);
+                } else {
+                    std::move(state.pending.begin(), state.pending.end(), std::back_inserter(state.batch));
+                    state.pending.clear();
+                }
+
+                if(full)
+                    state.space.notify_all();
+            }
+
+            if(!state.batch.empty() && state.batch.front().time <= cutoff)
+                next.emplace(state.batch.front().time, i);
+        }
+
+        size_t count = 0;
+
+        while(!next.empty()) {
+            const size_t i = next.top().second;
+            next.pop();
+
+            auto& batch = merging_[i]->batch;
+            const spdlog::details::log_msg& msg = batch[positions_[i]++];
+
+            for(auto& sink : sinks_) {
+                if(sink->should_log(msg.level)) {
+                    try {
+                        sink->log(msg);
+                    }
+                    catch(const std::exception& ex) {
+                        err_handler_(ex.what());
+                    }
+                }
+            }
+
+            if(positions_[i] < batch.size() && batch[positions_[i]].time <= cutoff)
+                next.emplace(batch[positions_[i]].time, i);
+
+            count++;
+        }
+
+        bool exited = false;
+
+        for(size_t i = 0; i < merging_.size(); i++) {
+            auto& batch = merging_[i]->batch;
+            batch.erase(batch.begin(), batch.begin() + static_cast<std::ptrdiff_t>(positions_[i]));
+            exited = exited || merging_[i]->exited.load();
+        }
+
+        merging_.clear();
+
+        // An exited thread does not log anymore, drop it once all its records are written
+        if(exited) {
+            std::lock_guard<std::mutex> lock(states_mutex_);
+
+            states_.erase(std::remove_if(states_.begin(), states_.end(), [](const std::shared_ptr<per_thread::state>& state) {
+                if(!state->exited.load() || !state->batch.empty())
+                    return false;
+
+                std::lock_guard<std::mutex> state_lock(state->mutex);
+                return state->pending.empty();
+            }), states_.end());
+        }
+
+        return count;
+    }
+
+    void flush_sinks() {
+        for(auto& sink : sinks_) {
+            try {
+                sink->flush();
+            }
+            catch(const std::exception& ex) {
+                err_handler_(ex.what());
+            }
+        }
+    }
+
+    // Merges every interval or when a buffer is full, and flushes the sinks once idle
+    void merge_loop() {
+        bool pending_flush = false;
+
+        while(true) {
+            {
+                std::unique_lock<std::mutex> lock(wake_mutex_);
+                wake_cv_.wait_for(lock, merge_interval_, [&] { return wake_ || stop_; });
+
+                if(stop_)
+                    return;
+
+                wake_ = false;
+            }
+
+            std::lock_guard<std::mutex> lock(merge_mutex_);
+            const size_t count = merge(log_time());
+
+            if(count == 0 && pending_flush)
+                flush_sinks();
+
+            pending_flush = count != 0;
+        }
+    }
+
+    const uint64_t id_ = per_thread::g_next_id.fetch_add(1);
+    nb::object sink_factory_;
+    const bool merged_ = false;
+    const size_t buffer_size_ = 0;
+    const std::chrono::milliseconds merge_interval_{ 0 };
+
+    mutable std::mutex states_mutex_;
+    std::vector<std::shared_ptr<per_thread::state>> states_;
+    std::unique_ptr<spdlog::formatter> formatter_;
+
+    std::mutex merge_mutex_;
+    std::vector<std::shared_ptr<per_thread::state>> merging_;
+    std::vector<size_t> positions_;
+
+    std::mutex wake_mutex_;
+    std::condition_variable wake_cv_;
+    bool wake_ = false;
+    bool stop_ = false;
+    std::atomic<bool> stopped_{ false };
+    std::unique_ptr<std::thread> merger_;
+};
+
+static std::shared_ptr<spdlog::logger> clone_per_thread_logger(spdlog::logger& self, const std::string& logger_name) {
+    if(auto* per_thread_self = dynamic_cast<per_thread_logger*>(&self))
+        return per_thread_self->clone(logger_name);
+
+    return nullptr;
+}
+
+// Thread pool barrier, used around forks and at shutdown. One flush message per worker is
+// posted to a barrier logger: once every worker has reached it, all the messages posted
+// before have been written and the workers are parked in the barrier, holding no sink or
+// queue lock, until release(). Workers reaching the barrier after a timed out park (or
+// after release) go through, or stay parked if a new park started
+
+class thread_pool_barrier final : public spdlog::sinks::sink, public std::enable_shared_from_this<thread_pool_barrier> {
+public:
+    void log(const spdlog::details::log_msg&) override {}
+    void set_pattern(const std::string&) override {}
+    void set_formatter(std::unique_ptr<spdlog::formatter>) override {}
+
+    // Called by the pool workers
+    void flush() override {
+        std::unique_lock<std::mutex> lock(mutex_);
+
+        if(!parking_)
+            return;
+
+        const uint64_t generation = generation_;
+
+        arrived_++;
+        cv_.notify_all();
+        cv_.wait(lock, [&] { return generation_ != generation; });
+    }
+
+    // Returns false if the workers did not all reach the barrier before the deadline. Called
+    // with the GIL held, which is released while waiting: a worker releasing the last
+    // reference to a sink created from Python acquires the GIL
+    bool park(std::chrono::steady_clock::time_point deadline) {
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            parking_ = true;
+        }
+
+        if(!logger_)
+            logger_ = std::make_shared<spdlog::async_logger>("", shared_from_this(), g_thread_pool_ptr);
+
+        nb::gil_scoped_release release;
+
+        for(size_t i = 0; i < g_thread_pool_options.threads; i++)
+            g_thread_pool.post_flush(std::shared_ptr<spdlog::async_logger>(logger_), spdlog::async_overflow_policy::block);
+
+        std::unique_lock<std::mutex> lock(mutex_);
+        return cv_.wait_until(lock, deadline, [&] { return arrived_ >= g_thread_pool_options.threads; });
+    }
+
+    void release() {
+        std::lock_guard<std::mutex> lock(mutex_);
+        parking_ = false;
+        arrived_ = 0;
+        generation_++;
+        cv_.notify_all();
+    }
+
+private:
+    std::mutex mutex_;
+    std::condition_variable cv_;
+    bool parking_ = false;
+    size_t arrived_ = 0;
+    uint64_t generation_ = 0;
+    std::shared_ptr<spdlog::async_logger> logger_;
+};
+
+static std::shared_ptr<thread_pool_barrier> g_thread_pool_barrier = std::make_shared<thread_pool_barrier>();
+
+// Flush completion, for logger.flush(timeout) and logger.flush_async(). A flush message is
+// posted to a completion logger behind the records already queued by the async logger:
+// the worker reaching it flushes the sinks of the logger, then completes the flush_state.
+// The future of flush_async is completed on the worker, with the GIL, and its reference
+// released there (or leaked if the interpreter is finalizing). The flush messages are
+// posted by the flush_poster thread, so a full queue (e.g. behind a stuck sink) never
+// blocks the callers: the wait for the deadline includes the wait for a queue slot.
+// With several workers, another worker can take the flush message while one is still
+// writing an earlier record of the logger, the flush then completes before it
+
+struct flush_state {
+    std::mutex mutex;
+    std::condition_variable cv;
+    bool done = false;
+    std::exception_ptr error;
+    nb::object future;
+};
+
+class flush_completion_sink final : public spdlog::sinks::sink {
+public:
+    flush_completion_sink(std::shared_ptr<spdlog::logger> logger, std::shared_ptr<flush_state> state)
+        : logger_(std::move(logger)), state_(std::move(state)) {}
+
+    void log(const spdlog::details::log_msg&) override {}
+    void set_pattern(const std::string&) override {}
+    void set_formatter(std::unique_ptr<spdlog::formatter>) override {}
+
+    // Called by a pool worker
+    void flush() override {
+        std::exception_ptr error;
+
+        try {
+            for(const auto& sink : logger_->sinks())
+                sink->flush();
+        }
+        catch(...) {
+            error = std::current_exception();
+        }
+
+        nb::object future;
+
+        {
+            std::lock_guard<std::mutex> lock(state_->mutex);
+            state_->done = true;
+            state_->error = error;
+            future = std::move(state_->future);
+            state_->cv.notify_all();
+        }
+
+        if(!future.is_valid())
+            return;
+
+        if(!nb::is_alive()) {
+            future.release();
+            return;
+        }
+
+        nb::gil_scoped_acquire acquire;
+
+        try {
+            if(error) {
+                try {
+                    std::rethrow_exception(error);
+                }
+                catch(const std::exception& e) {
+                    future.attr("set_exception")(nb::handle(PyExc_RuntimeError)(e.what()));
+                }
+            }
+            else {
+                future.attr("set_result")(nb::none());
+            }
+        }
+        catch(nb::python_error& e) {
+            // Cancelled futures raise InvalidStateError
+            e.discard_as_unraisable("spydlog.flush_async");
+        }
+
+        future.reset();
+    }
+
+private:
+    std::shared_ptr<spdlog::logger> logger_;
+    std::shared_ptr<flush_state> state_;
+};
+
+// Called with the GIL held
+// Started on first use. Leaked and rebuilt in forked children, dropping the pending
+// flushes of the parent
+class flush_poster {
+public:
+    void post(std::shared_ptr<spdlog::async_logger> completion) {
+        std::lock_guard<std::mutex> lock(mutex_);
+        pending_.push(std::move(completion));
+
+        if(!started_) {
+            started_ = true;
+            std::thread([this] { run(); }).detach();
+        }
+
+        cv_.notify_one();
+    }
+
+private:
+    void run() {
+        std::unique_lock<std::mutex> lock(mutex_);
+
+        for(;;) {
+            cv_.wait(lock, [&] { return !pending_.empty(); });
+
+            std::shared_ptr<spdlog::async_logger> completion = std::move(pending_.front());
+            pending_.pop();
+            lock.unlock();
+
+            {
+                thread_pool_use use(false);
+                g_thread_pool.post_flush(std::move(completion), spdlog::async_overflow_policy::block);
+            }
+
+            lock.lock();
+        }
+    }
+
+    std::mutex mutex_;
+    std::condition_variable cv_;
+    std::queue<std::shared_ptr<spdlog::async_logger>> pending_;
+    bool started_ = false;
+};
+
+static flush_poster& g_flush_poster = *new flush_poster;
+
+static std::shared_ptr<flush_state> post_flush_completion(spdlog::async_logger& self, nb::object future) {
+    auto state = std::make_shared<flush_state>();
+    state->future = std::move(future);
+
+    auto sink = std::make_shared<flush_completion_sink>(self.shared_from_this(), state);
+    g_flush_poster.post(std::make_shared<spdlog::async_logger>("", std::move(sink), g_thread_pool_ptr));
+
+    return state;
+}
+
+// Returns false if the sinks of an async logger were not flushed before the timeout. The
+// flush of an async logger still completes after a timeout
+static bool flush_logger(spdlog::logger& self, std::optional<double> timeout) {
+    logger_record_cache_entry* entry = find_logger_record(&self);
+    logger_record* record = entry != nullptr ? entry->record : nullptr;
+    const auto start = std::chrono::steady_clock::now();
+
+    auto* async_self = dynamic_cast<spdlog::async_logger*>(&self);
+
+    if(async_self == nullptr) {
+        self.flush();
+    }
+    else {
+        const auto deadline = timeout
+            ? start + std::chrono::duration_cast<std::chrono::steady_clock::duration>(std::chrono::duration<double>(std::max(*timeout, 0.0)))
+            : std::chrono::steady_clock::time_point::max();
+
+        std::shared_ptr<flush_state> state = post_flush_completion(*async_self, nb::object());
+
+        {
+            nb::gil_scoped_release release;
+            std::unique_lock<std::mutex> lock(state->mutex);
+
+            if(!state->cv.wait_until(lock, deadline, [&] { return state->done; }))
+                return false;
+        }
+
+        if(state->error)
+            std::rethrow_exception(state->error);
+    }
+
+    if(record != nullptr)
+        record->flush_latency.record(std::chrono::steady_clock::now() - start);
+
+    return true;
+}
+
+static nb::object flush_logger_async(spdlog::logger& self) {
+    nb::object future = nb::module_::import_("concurrent.futures").attr("Future")();
+
+    auto* async_self = dynamic_cast<spdlog::async_logger*>(&self);
+
+    if(async_self == nullptr) {
+        try {
+            self.flush();
+        }
+        catch(const std::exception& e) {
+            future.attr("set_exception")(nb::handle(PyExc_RuntimeError)(e.what()));
+            return future;
+        }
+
+        future.attr("set_result")(nb::none());
+        return future;
+    }
+
+    future.attr("set_running_or_notify_cancel")();
+    post_flush_completion(*async_self, future);
+
+    return future;
+}
+
+// A logger cannot be deleted while its record is in the table and the lock is held
+static void flush_all_sinks(bool include_async) {
+    std::lock_guard<std::mutex> lock(g_logger_records_mutex);
+
+    for(const auto& entry : g_logger_records) {
+        if(entry.second->is_async && !include_async)
+            continue;
+
+        // Their sinks are only written by their threads, see per_thread_logger::before_fork
+        if(dynamic_cast<const per_thread_logger*>(entry.first) != nullptr)
+            continue;
+
+        for(const auto& sink : entry.first->sinks()) {
+            try {
+                sink->flush();
+            }
+            catch(const std::exception&) {}
+        }
+    }
+}
+
+// flush_every interval, the flush_every thread is stopped before a fork and restarted after
+static std::atomic<int64_t> g_flush_every_ms{ 0 };
+
+static void restart_flush_every() {
+    const int64_t milliseconds = g_flush_every_ms.load();
+
+    if(milliseconds > 0)
+        spdlog::flush_every(std::chrono::milliseconds(milliseconds));
+}
+
+// Fork safety. The worker threads of g_thread_pool do not exist in a child process, so
+// its async loggers would never be written. Before a fork the workers are parked, and the
+// sinks of all the loggers are flushed so the child does not inherit (and write again)
+// buffered records. The parent releases the workers, and the child builds a new pool in
+// place (async loggers only hold the pool address), the old one and its threads being
+// leaked. The flush_every thread is stopped first, so it cannot hold the registry lock
+// in the child. g_fork_mutex (held from before to after the fork) serializes the fork
+// hooks, shutdown and init_thread_pool. Its holders release the GIL (parking the workers,
+// rebuilding the pool), so it is a real mutex even with a GIL, only waited for with the
+// GIL released. The collectors are locked once the workers are parked
+static std::mutex g_fork_mutex;
+
+static void lock_fork_mutex() {
+    if(g_fork_mutex.try_lock())
+        return;
+
+    nb::gil_scoped_release release;
+    g_fork_mutex.lock();
+}
+
+static void thread_pool_before_fork() {
+    lock_fork_mutex();
+
+    if(g_flush_every_ms.load() > 0)
+        spdlog::flush_every(std::chrono::milliseconds(0));
+
+    g_thread_pool_barrier->park(std::chrono::steady_clock::time_point::max());
+    g_collectors_mutex.lock();
+    flush_all_sinks(true);
+
+    for(shm_collector* collector : g_collectors)
+        collector->before_fork();
+
+    g_per_thread_loggers_mutex.lock();
+
+    for(per_thread_logger* logger : g_per_thread_loggers)
+        logger->before_fork();
+}
+
+static void thread_pool_after_fork_parent() {
+    for(per_thread_logger* logger : g_per_thread_loggers)
+        logger->after_fork_parent();
+
+    g_per_thread_loggers_mutex.unlock();
+
+    for(shm_collector* collector : g_collectors)
+        collector->after_fork();
+
+    g_thread_pool_barrier->release();
+    restart_flush_every();
+
+    g_collectors_mutex.unlock();
+    g_fork_mutex.unlock();
+}
+
+static void thread_pool_after_fork_child() {
+    for(per_thread_logger* logger : g_per_thread_loggers)
+        logger->after_fork_child();
+
+    g_per_thread_loggers_mutex.unlock();
+
+    for(shm_collector* collector : g_collectors)
+        collector->after_fork();
+
+    // The barrier and gate states refer to the parent threads, leak them as well
+    new(&g_thread_pool_barrier) std::shared_ptr<thread_pool_barrier>(std::make_shared<thread_pool_barrier>());
+    new(&g_thread_pool_gate) std::shared_mutex();
+    new(&g_flush_poster) flush_poster();
+
+    new(&g_thread_pool) spdlog::details::thread_pool(g_thread_pool_options.queue_size, g_thread_pool_options.threads,
+                                                     thread_pool_worker_start(g_thread_pool_options));
+    g_thread_pool_counters.queue_high_water_mark.store(0);
+    g_thread_pool_counters.heap_fallback.store(0);
+
+    restart_flush_every();
+
+    g_collectors_mutex.unlock();
+    g_fork_mutex.unlock();
+}
+
+// dist_sink::sinks returns the sink list without taking the sink lock, copy it under the lock
+template<typename Mutex>
+struct dist_sink_access : spdlog::sinks::dist_sink<Mutex> {
+    static std::vector<spdlog::sink_ptr> sinks(spdlog::sinks::dist_sink<Mutex>& sink) {
+        std::lock_guard<Mutex> lock(sink.*(&dist_sink_access::mutex_));
+        return sink.sinks();
+    }
+};
+
+// Shutdown, also registered with atexit (with exit_shutdown_timeout, so a stuck sink does
+// not hang the interpreter exit). The thread pool is never destroyed (its worker is left
+// running at exit), so records still queued after the deadline are dropped rather than
+// delaying the exit. The default logger is kept so the module level functions still log.
+// Returns the number of records dropped since the last shutdown: still queued at the
+// deadline, or overwritten under overrun_oldest
+static constexpr double exit_shutdown_timeout = 5.0;
+static size_t g_reported_overrun = 0;
+
+static size_t shutdown(std::optional<double> timeout) {
+    lock_fork_mutex();
+    std::lock_guard<std::mutex> lock(g_fork_mutex, std::adopt_lock);
+
+    const auto deadline = timeout
+        ? std::chrono::steady_clock::now() + std::chrono::duration_cast<std::chrono::steady_clock::duration>(std::chrono::duration<double>(std::max(*timeout, 0.0)))
+        : std::chrono::steady_clock::time_point::max();
+
+    const bool drained = g_thread_pool_barrier->park(deadline);
+    const size_t pending = drained ? 0 : g_thread_pool.queue_size();
+
+    // The sinks of async loggers are only safe to flush while the workers are parked
+    flush_all_sinks(drained);
+    g_thread_pool_barrier->release();
+
+    {
+        nb::ft_lock_guard collectors_lock(g_collectors_mutex);
+
+        for(shm_collector* collector : g_collectors)
+            collector->stop();
+    }
+
+    {
+        nb::ft_lock_guard per_thread_lock(g_per_thread_loggers_mutex);
+
+        for(per_thread_logger* logger : g_per_thread_loggers) {
+            logger->stop_merging();
+            logger->flush();
+        }
+    }
+
+    g_flush_every_ms.store(0);
+    auto default_logger = spdlog::default_logger();
+    spdlog::shutdown();
+
+    if(default_logger)
+        spdlog::set_default_logger(std::move(default_logger));
+
+    clear_logger_cache();
+    hierarchy::forget_all();
+
+    const size_t overrun = g_thread_pool.overrun_counter();
+    const size_t dropped = pending + overrun - std::min(overrun, g_reported_overrun);
+    g_reported_overrun = overrun;
+
+    return dropped;
+}
+
+// Rebuilds the thread pool in place with new options: the old pool writes its queued
+// records and joins its workers when destroyed. Async loggers only hold the pool address,
+// so they keep working; threads logging to them meanwhile wait for the rebuild at the
+// gate. The flush_every thread (which posts flushes to the pool) is stopped first
+static void init_thread_pool(size_t queue_size, size_t thread_count, std::optional<std::vector<int>> cpu_affinity,
+                             std::optional<int> nice, std::string thread_name) {
+    if(queue_size == 0)
+        throw spdlog::spdlog_ex("queue_size must be at least 1");
+
+    if(thread_count == 0 || thread_count > 1000)
+        throw spdlog::spdlog_ex("thread_count must be between 1 and 1000");
+
+#ifdef __linux__
+    if(cpu_affinity) {
+        for(int cpu : *cpu_affinity) {
+            if(cpu < 0 || cpu >= CPU_SETSIZE)
+                throw spdlog::spdlog_ex(spdlog::fmt_lib::format("invalid cpu {} in cpu_affinity", cpu));
+        }
+    }
+
+    if(nice && (*nice < -20 || *nice > 19))
+        throw spdlog::spdlog_ex("nice must be between -20 and 19");
+#else
+    if(cpu_affinity || nice)
+        throw spdlog::spdlog_ex("cpu_affinity and nice are only supported on Linux");
+#endif
+
+    thread_pool_options options;
+    options.queue_size = queue_size;
+    options.threads = thread_count;
+    options.cpu_affinity = cpu_affinity.value_or(std::vector<int>{});
+    options.nice = nice;
+    options.thread_name = std::move(thread_name);
+
+    lock_fork_mutex();
+    std::lock_guard<std::mutex> lock(g_fork_mutex, std::adopt_lock);
+
+    if(g_flush_every_ms.load() > 0)
+        spdlog::flush_every(std::chrono::milliseconds(0));
+
+    auto start = std::make_shared<thread_pool_start>();
+    std::string error;
+
+    {
+        // Workers releasing the last reference to a sink created from Python acquire the GIL
+        nb::gil_scoped_release release;
+        std::unique_lock<std::shared_mutex> gate(g_thread_pool_gate);
+
+        g_thread_pool.~thread_pool();
+        g_thread_pool_options = options;
+        new(&g_thread_pool) spdlog::details::thread_pool(options.queue_size, options.threads,
+                                                         thread_pool_worker_start(options, start));
+
+        error = start->wait(options.threads);
+    }
+
+    g_thread_pool_counters.queue_high_water_mark.store(0);
+    g_thread_pool_counters.heap_fallback.store(0);
+    g_reported_overrun = 0;
+
+    restart_flush_every();
+
+    if(!error.empty())
+        throw spdlog::spdlog_ex(error);
+}
 
 NB_MODULE(spydlog, m) {
+    // The default logger (created by spdlog, or set by the application embedding Python) is
+    // kept, with a logger_record so the global logging functions are accounted for in the stats
+    if(auto default_logger = spdlog::default_logger())
+        adopt_logger(std::move(default_logger));
+
+    // The registry formatter is cloned for every logger created by a factory, intern the
+    // default pattern so these clones do not parse it
+    spdlog::set_formatter(make_formatter("%+", spdlog::pattern_time_type::local));
+
     // Log level enum
     nb::enum_<spdlog::level::level_enum>(m, "level")
         .value("trace", spdlog::level::trace)
@@ -54,13 +3993,21 @@ NB_MODULE(spydlog, m) {
 
     // Sink base class
     nb::class_<spdlog::sinks::sink>(m, "sink")
-        .def("log", [](spdlog::sinks::sink& self, spdlog::level::level_enum lvl, const std::string& msg) {
-            spdlog::details::log_msg log_msg(spdlog::source_loc{}, "", lvl, msg);
+        .def("log", [](spdlog::sinks::sink& self, spdlog::level::level_enum lvl, nb::handle msg) {
+            message_arg arg;
+
+            if(!arg.load(msg.ptr()))
+                throw nb::python_error();
+
+            spdlog::details::log_msg log_msg(log_time(), caller_source_loc(), "", lvl, arg.view);
             self.log(log_msg);
-        })
+        }, "lvl"_a, "msg"_a)
+        .def("flush", &spdlog::sinks::sink::flush)
         .def("set_level", &spdlog::sinks::sink::set_level)
         .def("level", &spdlog::sinks::sink::level)
-        .def("set_pattern", &spdlog::sinks::sink::set_pattern);
+        .def("set_pattern", [](spdlog::sinks::sink& self, const std::string& pattern) {
+            self.set_formatter(make_formatter(pattern, spdlog::pattern_time_type::local));
+        }, "pattern"_a);
 
     // Console sinks
     nb::class_<spdlog::sinks::stdout_color_sink_mt, spdlog::sinks::sink>(m, "stdout_color_sink_mt")
@@ -122,129 +4069,315 @@ NB_MODULE(spydlog, m) {
              "filename"_a, "hour"_a = 0, "minute"_a = 0)
     .def("filename", [](spdlog::sinks::daily_file_sink_st& self) {return self.filename(); });
 
+    // Binary file sink
+    nb::class_<binary_file_sink_mt, spdlog::sinks::sink>(m, "binary_file_sink_mt")
+        .def(nb::init<const std::string&, bool>(),
+             "filename"_a, "truncate"_a = false)
+        .def("filename", &binary_file_sink_mt::filename);
+
+    nb::class_<binary_file_sink_st, spdlog::sinks::sink>(m, "binary_file_sink_st")
+        .def(nb::init<const std::string&, bool>(),
+             "filename"_a, "truncate"_a = false)
+        .def("filename", &binary_file_sink_st::filename);
+
+    // Raw file sink
+    nb::class_<raw_file_sink_mt, spdlog::sinks::sink>(m, "raw_file_sink_mt")
+        .def(nb::init<const std::string&, bool>(),
+             "filename"_a, "truncate"_a = false)
+        .def("filename", &raw_file_sink_mt::filename);
+
+    nb::class_<raw_file_sink_st, spdlog::sinks::sink>(m, "raw_file_sink_st")
+        .def(nb::init<const std::string&, bool>(),
+             "filename"_a, "truncate"_a = false)
+        .def("filename", &raw_file_sink_st::filename);
+
+    nb::class_<binlog::reader>(m, "_binary_log_reader")
+        .def("__iter__", [](nb::handle self) { return self; })
+        .def("__next__", &binlog::reader::next);
+
+    m.def("decode", [](const std::string& filename, std::optional<std::string> pattern,
+                       spdlog::pattern_time_type time_type, spdlog::level::level_enum level) {
+        return new binlog::reader(filename, std::move(pattern), time_type, level);
+    }, "filename"_a, "pattern"_a = nb::none(), "time_type"_a = spdlog::pattern_time_type::local,
+       "level"_a = spdlog::level::trace);
+
     // Null sink (no need to register null_sink_mt since they are the same sink)
     nb::class_<spdlog::sinks::null_sink_st, spdlog::sinks::sink>(m, "null_sink_st")
         .def(nb::init<>());
 
+    // Dist sink, dispatches to a list of sinks that can be changed while logging
+    nb::class_<spdlog::sinks::dist_sink_mt, spdlog::sinks::sink>(m, "dist_sink_mt")
+        .def(nb::init<>())
+        .def(nb::init<std::vector<spdlog::sink_ptr>>(), "sinks"_a)
+        .def("add_sink", &spdlog::sinks::dist_sink_mt::add_sink, "sink"_a)
+        .def("remove_sink", &spdlog::sinks::dist_sink_mt::remove_sink, "sink"_a)
+        .def("set_sinks", &spdlog::sinks::dist_sink_mt::set_sinks, "sinks"_a)
+        .def("sinks", &dist_sink_access<std::mutex>::sinks);
+
+    nb::class_<spdlog::sinks::dist_sink_st, spdlog::sinks::sink>(m, "dist_sink_st")
+        .def(nb::init<>())
+        .def(nb::init<std::vector<spdlog::sink_ptr>>(), "sinks"_a)
+        .def("add_sink", &spdlog::sinks::dist_sink_st::add_sink, "sink"_a)
+        .def("remove_sink", &spdlog::sinks::dist_sink_st::remove_sink, "sink"_a)
+        .def("set_sinks", &spdlog::sinks::dist_sink_st::set_sinks, "sinks"_a)
+        .def("sinks", &dist_sink_access<spdlog::details::null_mutex>::sinks);
+
+    // Shared memory queue sink and its collector, for logging from several processes
+    nb::class_<shm_queue_sink, spdlog::sinks::sink>(m, "shm_queue_sink")
+        .def(nb::init<const std::string&, bool>(), "name"_a, "block"_a = true)
+        .def("dropped", &shm_queue_sink::dropped);
+
+    nb::class_<shm_collector>(m, "collector")
+        .def(nb::init<const std::string&, std::vector<spdlog::sink_ptr>, size_t, size_t, int>(),
+             "name"_a, "sinks"_a, "slot_count"_a = spdlog::details::default_async_q_size,
+             "slot_size"_a = 256, "poll_interval_ms"_a = 1)
+        .def("name", &shm_collector::name)
+        .def("sinks", &shm_collector::sinks)
+        .def("flush", &shm_collector::flush, nb::call_guard<nb::gil_scoped_release>())
+        .def("stop", &shm_collector::stop, nb::call_guard<nb::gil_scoped_release>())
+        .def("dropped", &shm_collector::dropped)
+        .def("queue_size", &shm_collector::queue_size)
+        .def("slot_count", &shm_collector::slot_count)
+        .def("slot_size", &shm_collector::slot_size);
+
     // Logger class
-    nb::class_<spdlog::logger>(m, "logger")
-        .def(nb::init<const std::string&>())
-        .def(nb::init<const std::string&, spdlog::sink_ptr>(),
-             "name"_a, "sink"_a)
-        .def("__init__", [](spdlog::logger* logger, const std::string& name, const std::vector<spdlog::sink_ptr>& sinks) {
-            new (logger) spdlog::logger(name, sinks.begin(), sinks.end());
-        }, "name"_a, "sinks"_a)
-        .def("trace", [](spdlog::logger& self, const std::string& msg) { self.trace(msg); })
-        .def("debug", [](spdlog::logger& self, const std::string& msg) { self.debug(msg); })
-        .def("info", [](spdlog::logger& self, const std::string& msg) { self.info(msg); })
-        .def("warn", [](spdlog::logger& self, const std::string& msg) { self.warn(msg); })
-        .def("error", [](spdlog::logger& self, const std::string& msg) { self.error(msg); })
-        .def("critical", [](spdlog::logger& self, const std::string& msg) { self.critical(msg); })
-        .def("log", [](spdlog::logger& self, spdlog::level::level_enum lvl, const std::string& msg) {
-            self.log(lvl, msg);
-        })
-        .def("set_level", &spdlog::logger::set_level)
+    nb::class_<spdlog::logger>(m, "logger", nb::type_slots(logger_slots), nb::is_weak_referenceable())
+        .def(nb::new_([](const std::string& name) {
+            return make_logger<spdlog::logger>(name);
+        }), "name"_a)
+        .def(nb::new_([](const std::string& name, spdlog::sink_ptr sink) {
+            return make_logger<spdlog::logger>(name, std::move(sink));
+        }), "name"_a, "sink"_a)
+        .def(nb::new_([](const std::string& name, const std::vector<spdlog::sink_ptr>& sinks) {
+            return make_logger<spdlog::logger>(name, sinks.begin(), sinks.end());
+        }), "name"_a, "sinks"_a)
+        .def("exception", [](spdlog::logger& self, nb::handle msg, nb::handle exc) {
+            log_exception(&self, msg, exc);
+        }, "msg"_a, "exc"_a = nb::none())
+        .def("set_level", &hierarchy::set_level, nb::arg().none())
         .def("level", &spdlog::logger::level)
         .def("name", &spdlog::logger::name)
-        .def("set_pattern", &spdlog::logger::set_pattern, "pattern"_a, "time_type"_a = spdlog::pattern_time_type::local)
-        .def("flush", &spdlog::logger::flush)
+        .def("set_pattern", [](spdlog::logger& self, const std::string& pattern, spdlog::pattern_time_type time_type) {
+            self.set_formatter(make_formatter(pattern, time_type));
+        }, "pattern"_a, "time_type"_a = spdlog::pattern_time_type::local)
+        .def("flush", &flush_logger, "timeout"_a = nb::none())
+        .def("flush_async", &flush_logger_async)
         .def("flush_on", &spdlog::logger::flush_on)
         .def("sinks", [](spdlog::logger& self) { return self.sinks(); }, nb::rv_policy::reference_internal)
         .def("should_log", &spdlog::logger::should_log)
-        .def("clone", &spdlog::logger::clone);
+        .def("clone", &clone_logger, "logger_name"_a)
+        .def("stats", [](spdlog::logger& self) -> nb::object {
+            logger_record_cache_entry* entry = find_logger_record(&self);
+
+            if(entry == nullptr)
+                return nb::none();
+
+            return logger_record_stats(self.name(), *entry->record);
+        });
 
     // Async logger
     nb::class_<spdlog::async_logger, spdlog::logger>(m, "_async_logger");
 
-    m.def("async_logger", [](const std::string& name, spdlog::sink_ptr& sink) {
-        return std::make_shared<spdlog::async_logger>(name, sink, g_thread_pool_ptr, spdlog::async_overflow_policy::block);
-    }, "name"_a, "sink"_a);
+    // Async overflow policy enum
+    nb::enum_<spdlog::async_overflow_policy>(m, "async_overflow_policy")
+        .value("block", spdlog::async_overflow_policy::block)
+        .value("overrun_oldest", spdlog::async_overflow_policy::overrun_oldest);
+
+    m.def("async_logger", [](const std::string& name, spdlog::sink_ptr& sink, spdlog::async_overflow_policy overflow_policy) {
+        return make_logger<spdlog::async_logger>(name, sink, g_thread_pool_ptr, overflow_policy);
+    }, "name"_a, "sink"_a, "overflow_policy"_a = spdlog::async_overflow_policy::block);
 
     m.def("async_logger", [](const std::string& name,
-                             const std::vector<spdlog::sink_ptr>& sinks) {
-        return std::make_shared<spdlog::async_logger>(name, sinks.begin(), sinks.end(), g_thread_pool_ptr, spdlog::async_overflow_policy::block);
-    }, "name"_a, "sinks"_a);
+                             const std::vector<spdlog::sink_ptr>& sinks,
+                             spdlog::async_overflow_policy overflow_policy) {
+        return make_logger<spdlog::async_logger>(name, sinks.begin(), sinks.end(), g_thread_pool_ptr, overflow_policy);
+    }, "name"_a, "sinks"_a, "overflow_policy"_a = spdlog::async_overflow_policy::block);
+
+    // Per-thread logger
+    nb::class_<per_thread_logger, spdlog::logger>(m, "_per_thread_logger")
+        .def("set_pattern", [](per_thread_logger& self, const std::string& pattern, spdlog::pattern_time_type time_type) {
+            self.set_thread_formatter(make_formatter(pattern, time_type));
+        }, "pattern"_a, "time_type"_a = spdlog::pattern_time_type::local);
+
+    m.def("per_thread_logger", [](const std::string& name, nb::callable sink_factory) {
+        return make_logger<per_thread_logger>(name, nb::object(sink_factory));
+    }, "name"_a, "sink_factory"_a);
+
+    m.def("per_thread_logger", [](const std::string& name, spdlog::sink_ptr sink, size_t buffer_size, int merge_interval_ms) {
+        return make_logger<per_thread_logger>(name, std::vector<spdlog::sink_ptr>{ std::move(sink) }, buffer_size, merge_interval_ms);
+    }, "name"_a, "sink"_a, "buffer_size"_a = spdlog::details::default_async_q_size, "merge_interval_ms"_a = 10);
+
+    m.def("per_thread_logger", [](const std::string& name, std::vector<spdlog::sink_ptr> sinks, size_t buffer_size, int merge_interval_ms) {
+        return make_logger<per_thread_logger>(name, std::move(sinks), buffer_size, merge_interval_ms);
+    }, "name"_a, "sinks"_a, "buffer_size"_a = spdlog::details::default_async_q_size, "merge_interval_ms"_a = 10);
+
+    // Keep the thread pool working in children forked by os.fork, multiprocessing...
+    nb::module_ os = nb::module_::import_("os");
+
+    if(nb::hasattr(os, "register_at_fork"))
+        os.attr("register_at_fork")("before"_a = nb::cpp_function(&thread_pool_before_fork),
+                                    "after_in_parent"_a = nb::cpp_function(&thread_pool_after_fork_parent),
+                                    "after_in_child"_a = nb::cpp_function(&thread_pool_after_fork_child));
+
+    m.def("init_thread_pool", &init_thread_pool, "queue_size"_a = spdlog::details::default_async_q_size, "thread_count"_a = 1,
+          "cpu_affinity"_a = nb::none(), "nice"_a = nb::none(), "thread_name"_a = "spydlog-worker");
+    m.def("shutdown", &shutdown, "timeout"_a = nb::none());
+    nb::module_::import_("atexit").attr("register")(nb::cpp_function([]() { shutdown(exit_shutdown_timeout); }));
 
     // Global logger functions
-    m.def("set_level", &spdlog::set_level);
+    m.def("set_level", [](spdlog::level::level_enum lvl) { hierarchy::set_levels([lvl]() { spdlog::set_level(lvl); }, {}); }, "lvl"_a);
     m.def("get_level", &spdlog::get_level);
+    m.def("load_levels", &hierarchy::load_levels, "levels"_a);
+    m.def("load_env_levels", []() {
+        const std::string levels = spdlog::details::os::getenv("SPDLOG_LEVEL");
+
+        if(!levels.empty())
+            hierarchy::load_levels(levels);
+    });
     m.def("flush_on", &spdlog::flush_on);
     m.def("flush_every", [](int milliseconds) {
+        g_flush_every_ms.store(milliseconds);
         spdlog::flush_every(std::chrono::milliseconds(milliseconds));
     }, "milliseconds"_a);
-    m.def("set_pattern", &spdlog::set_pattern, "pattern"_a, "time_type"_a = spdlog::pattern_time_type::local);
+    m.def("set_max_message_size", [](size_t size) {
+        nb::ft_lock_guard lock(g_message_limits_mutex);
+        g_max_message_size.store(size);
+        set_log_option(log_max_message_size, size > 0);
+    }, "size"_a);
+    m.def("set_message_chunk_size", [](size_t size) {
+        if(size > 0 && size < min_message_chunk_size)
+            throw nb::value_error("chunk size must be 0 or at least 4 bytes");
+
+        nb::ft_lock_guard lock(g_message_limits_mutex);
+        g_message_chunk_size.store(size);
+        set_log_option(log_message_chunks, size > 0);
+    }, "size"_a);
+    m.def("set_pattern", [](const std::string& pattern, spdlog::pattern_time_type time_type) {
+        auto formatter = make_formatter(pattern, time_type);
+
+        {
+            nb::ft_lock_guard lock(g_per_thread_loggers_mutex);
+
+            for(auto* logger : g_per_thread_loggers)
+                logger->set_thread_formatter(formatter->clone());
+        }
 
-    // Global logging functions
-    m.def("trace", [](const std::string& msg) { spdlog::trace(msg); });
-    m.def("debug", [](const std::string& msg) { spdlog::debug(msg); });
-    m.def("info", [](const std::string& msg) { spdlog::info(msg); });
-    m.def("warn", [](const std::string& msg) { spdlog::warn(msg); });
-    m.def("error", [](const std::string& msg) { spdlog::error(msg); });
-    m.def("critical", [](const std::string& msg) { spdlog::critical(msg); });
+        spdlog::set_formatter(std::move(formatter));
+    }, "pattern"_a, "time_type"_a = spdlog::pattern_time_type::local);
+
+    m.def("enable_source_location", []() { set_log_option(log_source_location, true); });
+    m.def("disable_source_location", []() { set_log_option(log_source_location, false); });
+    m.def("source_location_enabled", []() { return log_option_enabled(log_source_location); });
+
+    m.def("enable_coarse_clock", []() { set_log_option(log_coarse_clock, true); });
+    m.def("disable_coarse_clock", []() { set_log_option(log_coarse_clock, false); });
+    m.def("coarse_clock_enabled", []() { return log_option_enabled(log_coarse_clock); });
+
+    // Global logging functions (see global_log_methods)
+    for(PyMethodDef* def = global_log_methods; def->ml_name != nullptr; def++)
+        m.attr(def->ml_name) = nb::steal(PyCFunction_NewEx(def, nullptr, m.attr("__name__").ptr()));
+
+    m.def("exception", [](nb::handle msg, nb::handle exc) {
+        log_exception(spdlog::default_logger_raw(), msg, exc);
+    }, "msg"_a, "exc"_a = nb::none());
+
+    m.def("set_traceback_limit", [](int limit) { g_traceback_limit.store(limit); }, "limit"_a);
+    m.def("get_traceback_limit", []() { return g_traceback_limit.load(); });
 
     // Logger registry
-    m.def("set_default_logger", &spdlog::set_default_logger);
+    g_logger_cache = PyDict_New();
+    m.attr("get") = nb::steal(PyCFunction_NewEx(&registry_get_method, nullptr, m.attr("__name__").ptr()));
+
+    m.def("set_default_logger", [](std::shared_ptr<spdlog::logger> logger) {
+        spdlog::set_default_logger(std::move(logger));
+        clear_logger_cache();
+        hierarchy::root_changed();
+    });
     m.def("default_logger", &spdlog::default_logger);
-    m.def("get", &spdlog::get, "name"_a);
-    m.def("drop", &spdlog::drop, "name"_a);
-    m.def("drop_all", &spdlog::drop_all);
+    m.def("drop", [](const std::string& name) {
+        spdlog::drop(name);
+        clear_logger_cache();
+        hierarchy::forget(name);
+    }, "name"_a);
+    m.def("drop_all", []() {
+        spdlog::drop_all();
+        clear_logger_cache();
+        hierarchy::forget_all();
+    });
+    m.def("get_logger", &hierarchy::get_logger, "name"_a = "");
     m.def("register_logger", &spdlog::register_logger);
+    m.def("replace_loggers", &hierarchy::replace, "loggers"_a);
     m.def("apply_all", [](const std::function<void(std::shared_ptr<spdlog::logger>)>& fun) {
-        spdlog::apply_all(fun);
+        // The function is called outside the registry lock, it may use the registry
+        std::vector<std::shared_ptr<spdlog::logger>> loggers;
+        spdlog::apply_all([&loggers](std::shared_ptr<spdlog::logger> logger) { loggers.push_back(std::move(logger)); });
+
+        for(const auto& logger : loggers)
+            fun(logger);
     });
 
-    // Async overflow policy enum
-    nb::enum_<spdlog::async_overflow_policy>(m, "async_overflow_policy")
-        .value("block", spdlog::async_overflow_policy::block)
-        .value("overrun_oldest", spdlog::async_overflow_policy::overrun_oldest);
+    // Stats
+    m.def("stats", &all_stats);
+    m.def("enable_sink_stats", []() { set_log_option(log_sink_stats, true); });
+    m.def("disable_sink_stats", []() { set_log_option(log_sink_stats, false); });
+    m.def("sink_stats_enabled", []() { return log_option_enabled(log_sink_stats); });
+    m.def("thread_pool_stats", &thread_pool_stats, "reset"_a = false);
+    m.def("stats_prometheus", &prometheus_stats);
 
     // Factory functions for common logger types
     m.def("stdout_color_mt", [](const std::string& logger_name, spdlog::color_mode mode) {
-        return spdlog::stdout_color_mt(logger_name, mode);
+        return spdlog::stdout_color_mt<record_factory>(logger_name, mode);
     }, "logger_name"_a, "mode"_a = spdlog::color_mode::automatic);
 
     m.def("stdout_color_st", [](const std::string& logger_name, spdlog::color_mode mode) {
-        return spdlog::stdout_color_st(logger_name, mode);
+        return spdlog::stdout_color_st<record_factory>(logger_name, mode);
     }, "logger_name"_a, "mode"_a = spdlog::color_mode::automatic);
 
     m.def("stderr_color_mt", [](const std::string& logger_name, spdlog::color_mode mode) {
-        return spdlog::stderr_color_mt(logger_name, mode);
+        return spdlog::stderr_color_mt<record_factory>(logger_name, mode);
     }, "logger_name"_a, "mode"_a = spdlog::color_mode::automatic);
 
     m.def("stderr_color_st", [](const std::string& logger_name, spdlog::color_mode mode) {
-        return spdlog::stderr_color_st(logger_name, mode);
+        return spdlog::stderr_color_st<record_factory>(logger_name, mode);
     }, "logger_name"_a, "mode"_a = spdlog::color_mode::automatic);
 
-    m.def("stdout_logger_mt", [](const std::string& logger_name) { return spdlog::stdout_logger_mt(logger_name); });
-    m.def("stdout_logger_st", [](const std::string& logger_name) { return spdlog::stdout_logger_st(logger_name); });
-    m.def("stderr_logger_mt", [](const std::string& logger_name) { return spdlog::stderr_logger_mt(logger_name); });
-    m.def("stderr_logger_st", [](const std::string& logger_name) { return spdlog::stderr_logger_st(logger_name); });
+    m.def("stdout_logger_mt", [](const std::string& logger_name) { return spdlog::stdout_logger_mt<record_factory>(logger_name); });
+    m.def("stdout_logger_st", [](const std::string& logger_name) { return spdlog::stdout_logger_st<record_factory>(logger_name); });
+    m.def("stderr_logger_mt", [](const std::string& logger_name) { return spdlog::stderr_logger_mt<record_factory>(logger_name); });
+    m.def("stderr_logger_st", [](const std::string& logger_name) { return spdlog::stderr_logger_st<record_factory>(logger_name); });
 
     m.def("basic_logger_mt", [](const std::string& logger_name, const std::string& filename, bool truncate) {
-        return spdlog::basic_logger_mt(logger_name, filename, truncate);
+        return spdlog::basic_logger_mt<record_factory>(logger_name, filename, truncate);
     }, "logger_name"_a, "filename"_a, "truncate"_a = false);
 
     m.def("basic_logger_st", [](const std::string& logger_name, const std::string& filename, bool truncate) {
-        return spdlog::basic_logger_st(logger_name, filename, truncate);
+        return spdlog::basic_logger_st<record_factory>(logger_name, filename, truncate);
     }, "logger_name"_a, "filename"_a, "truncate"_a = false);
 
     m.def("rotating_logger_mt", [](const std::string& logger_name, const std::string& filename,
                                     size_t max_size, size_t max_files) {
-        return spdlog::rotating_logger_mt(logger_name, filename, max_size, max_files);
+        return spdlog::rotating_logger_mt<record_factory>(logger_name, filename, max_size, max_files);
     }, "logger_name"_a, "filename"_a, "max_size"_a, "max_files"_a);
 
     m.def("rotating_logger_st", [](const std::string& logger_name, const std::string& filename,
                                     size_t max_size, size_t max_files) {
-        return spdlog::rotating_logger_st(logger_name, filename, max_size, max_files);
+        return spdlog::rotating_logger_st<record_factory>(logger_name, filename, max_size, max_files);
     }, "logger_name"_a, "filename"_a, "max_size"_a, "max_files"_a);
 
     m.def("daily_logger_mt", [](const std::string& logger_name, const std::string& filename,
                                  int hour, int minute) {
-        return spdlog::daily_logger_mt(logger_name, filename, hour, minute);
+        return spdlog::daily_logger_mt<record_factory>(logger_name, filename, hour, minute);
     }, "logger_name"_a, "filename"_a, "hour"_a = 0, "minute"_a = 0);
 
     m.def("daily_logger_st", [](const std::string& logger_name, const std::string& filename,
                                  int hour, int minute) {
-        return spdlog::daily_logger_st(logger_name, filename, hour, minute);
+        return spdlog::daily_logger_st<record_factory>(logger_name, filename, hour, minute);
     }, "logger_name"_a, "filename"_a, "hour"_a = 0, "minute"_a = 0);
+
+    m.def("binary_logger_mt", [](const std::string& logger_name, const std::string& filename, bool truncate) {
+        return record_factory::create<binary_file_sink_mt>(logger_name, filename, truncate);
+    }, "logger_name"_a, "filename"_a, "truncate"_a = false);
+    m.def("binary_logger_st", [](const std::string& logger_name, const std::string& filename, bool truncate) {
+        return record_factory::create<binary_file_sink_st>(logger_name, filename, truncate);
+    }, "logger_name"_a, "filename"_a, "truncate"_a = false);
 }
@@ -1,7 +1,9 @@
 # spydlog stubs
 
 from __future__ import annotations
-from typing import Any, List, Optional, Union, Callable, overload
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, Callable, overload
+import concurrent.futures
+import os
 import sys
 
 if sys.version_info >= (3, 10):
@@ -9,6 +11,9 @@ if sys.version_info >= (3, 10):
 else:
     from typing_extensions import TypeAlias
 
+# Message payload accepted by the logging methods: str or any C-contiguous bytes-like object
+Message: TypeAlias = Union[str, bytes, bytearray, memoryview]
+
 class level:
     """Log level enumeration."""
 
@@ -47,10 +52,14 @@ class async_overflow_policy:
 class sink:
     """Base class for all sinks."""
 
-    def log(self, lvl: level, msg: str) -> None:
+    def log(self, lvl: level, msg: Message) -> None:
         """Log a message with the given level."""
         ...
 
+    def flush(self) -> None:
+        """Flush any buffered messages."""
+        ...
+
     def set_level(self, lvl: level) -> None:
         """Set the log level for this sink."""
         ...
@@ -229,6 +238,85 @@ class daily_file_sink_st(sink):
         """Get the current log file name"""
         ...
 
+class binary_file_sink_mt(sink):
+    """
+    Multi-threaded binary file sink.
+
+    Records are written unformatted (timestamp, level, logger, thread id and message bytes)
+    and rendered later with decode() or python -m spydlog.decode.
+    """
+
+    def __init__(self, filename: str, truncate: bool = False) -> None:
+        """
+        Initialize the sink.
+
+        Args:
+            filename: Path to the binary log file
+            truncate: If True, truncate the file on open (default: False)
+        """
+        ...
+
+    def filename(self) -> str:
+        """Get the log file name"""
+        ...
+
+class binary_file_sink_st(sink):
+    """Single-threaded binary file sink, see binary_file_sink_mt."""
+
+    def __init__(self, filename: str, truncate: bool = False) -> None:
+        """
+        Initialize the sink.
+
+        Args:
+            filename: Path to the binary log file
+            truncate: If True, truncate the file on open (default: False)
+        """
+        ...
+
+    def filename(self) -> str:
+        """Get the log file name"""
+        ...
+
+class raw_file_sink_mt(sink):
+    """
+    Multi-threaded raw file sink.
+
+    With the "%v" pattern (the default), the message of each record is written to the
+    file as is, followed by the end of line, without being formatted first. Other
+    patterns are formatted as by basic_file_sink_mt.
+    """
+
+    def __init__(self, filename: str, truncate: bool = False) -> None:
+        """
+        Initialize the sink.
+
+        Args:
+            filename: Path to the log file
+            truncate: If True, truncate the file on open (default: False)
+        """
+        ...
+
+    def filename(self) -> str:
+        """Get the log file name"""
+        ...
+
+class raw_file_sink_st(sink):
+    """Single-threaded raw file sink, see raw_file_sink_mt."""
+
+    def __init__(self, filename: str, truncate: bool = False) -> None:
+        """
+        Initialize the sink.
+
+        Args:
+            filename: Path to the log file
+            truncate: If True, truncate the file on open (default: False)
+        """
+        ...
+
+    def filename(self) -> str:
+        """Get the log file name"""
+        ...
+
 class null_sink_st(sink):
     """Single-threaded null sink (discards all messages)."""
 
@@ -236,6 +324,129 @@ class null_sink_st(sink):
         """Initialize the sink."""
         ...
 
+class dist_sink_mt(sink):
+    """Multi-threaded distribution sink, forwards messages to a list of sinks."""
+
+    def __init__(self, sinks: List[SinkPtr] = ...) -> None:
+        """
+        Initialize the sink.
+
+        Args:
+            sinks: Initial list of sinks (default: empty)
+        """
+        ...
+
+    def add_sink(self, sink: SinkPtr) -> None:
+        """Add a sink, can be called while other threads are logging."""
+        ...
+
+    def remove_sink(self, sink: SinkPtr) -> None:
+        """Remove a sink, can be called while other threads are logging."""
+        ...
+
+    def set_sinks(self, sinks: List[SinkPtr]) -> None:
+        """Replace all the sinks, can be called while other threads are logging."""
+        ...
+
+    def sinks(self) -> List[SinkPtr]:
+        """Get a copy of the current list of sinks."""
+        ...
+
+class dist_sink_st(sink):
+    """Single-threaded distribution sink, forwards messages to a list of sinks."""
+
+    def __init__(self, sinks: List[SinkPtr] = ...) -> None:
+        """
+        Initialize the sink.
+
+        Args:
+            sinks: Initial list of sinks (default: empty)
+        """
+        ...
+
+    def add_sink(self, sink: SinkPtr) -> None:
+        """Add a sink."""
+        ...
+
+    def remove_sink(self, sink: SinkPtr) -> None:
+        """Remove a sink."""
+        ...
+
+    def set_sinks(self, sinks: List[SinkPtr]) -> None:
+        """Replace all the sinks."""
+        ...
+
+    def sinks(self) -> List[SinkPtr]:
+        """Get a copy of the current list of sinks."""
+        ...
+
+class shm_queue_sink(sink):
+    """Sink writing records to the shared memory queue of a collector, from any process."""
+
+    def __init__(self, name: str, block: bool = True) -> None:
+        """
+        Attach to the queue of a collector.
+
+        Args:
+            name: Name of the collector queue
+            block: Wait for room when the queue is full, otherwise drop the record (default: True).
+                Records are dropped once the collector process is found dead
+        """
+        ...
+
+    def dropped(self) -> int:
+        """Get the number of records dropped by all the sinks of the queue."""
+        ...
+
+class collector:
+    """Creates a shared memory queue and writes its records to sinks on a background thread."""
+
+    def __init__(self, name: str, sinks: List[SinkPtr], slot_count: int = 8192, slot_size: int = 256, poll_interval_ms: int = 1) -> None:
+        """
+        Create the queue and start the collector thread. The segment left behind by a
+        collector of the same name whose process died is replaced.
+
+        Args:
+            name: Name of the queue, used by shm_queue_sink to attach
+            sinks: Sinks receiving the records
+            slot_count: Number of slots of the queue, a power of two (default: 8192)
+            slot_size: Size of a slot in bytes, a multiple of 64 (default: 256)
+            poll_interval_ms: Sleep time of the collector thread when the queue is empty (default: 1)
+        """
+        ...
+
+    def name(self) -> str:
+        """Get the queue name."""
+        ...
+
+    def sinks(self) -> List[SinkPtr]:
+        """Get the sinks."""
+        ...
+
+    def flush(self) -> int:
+        """Write the pending records and flush the sinks, returns the number of records written."""
+        ...
+
+    def stop(self) -> None:
+        """Write the pending records and stop the collector thread."""
+        ...
+
+    def dropped(self) -> int:
+        """Get the number of records dropped by the queue sinks."""
+        ...
+
+    def queue_size(self) -> int:
+        """Get the number of slots in use."""
+        ...
+
+    def slot_count(self) -> int:
+        """Get the number of slots."""
+        ...
+
+    def slot_size(self) -> int:
+        """Get the size of a slot in bytes."""
+        ...
+
 class logger:
     """Logger class for logging messages."""
 
@@ -250,42 +461,58 @@ class logger:
         """
         ...
 
-    def trace(self, msg: str) -> None:
+    def trace(self, msg: Message) -> None:
         """Log a trace message."""
         ...
 
-    def debug(self, msg: str) -> None:
+    def debug(self, msg: Message) -> None:
         """Log a debug message."""
         ...
 
-    def info(self, msg: str) -> None:
+    def info(self, msg: Message) -> None:
         """Log an info message."""
         ...
 
-    def warn(self, msg: str) -> None:
+    def warn(self, msg: Message) -> None:
         """Log a warning message."""
         ...
 
-    def error(self, msg: str) -> None:
+    def error(self, msg: Message) -> None:
         """Log an error message."""
         ...
 
-    def critical(self, msg: str) -> None:
+    def critical(self, msg: Message) -> None:
         """Log a critical message."""
         ...
 
-    def log(self, lvl: level, msg: str) -> None:
+    def log(self, lvl: level, msg: Message) -> None:
         """
         Log a message with the specified level.
 
         Args:
             lvl: Log level
+            msg: Message to log (str or UTF-8 encoded bytes-like object)
+        """
+        ...
+
+    def exception(self, msg: Message, exc: Optional[BaseException] = None) -> None:
+        """
+        Log an error message followed by the traceback of an exception, after those of
+        its chained exceptions (__cause__, or __context__ unless suppressed). Source lines
+        are read through linecache, like the traceback module.
+
+        Args:
             msg: Message to log
+            exc: Exception to log (default: the exception currently being handled)
         """
         ...
 
-    def set_level(self, lvl: level) -> None:
-        """Set the log level for this logger."""
+    def set_level(self, lvl: Optional[level]) -> None:
+        """
+        Set the log level for this logger. The descendants of a logger of the
+        get_logger hierarchy that do not set their own level follow it, None makes
+        such a logger follow its parent again.
+        """
         ...
 
     def level(self) -> level:
@@ -306,8 +533,29 @@ class logger:
         """
         ...
 
-    def flush(self) -> None:
-        """Flush any buffered messages."""
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Flush any buffered messages.
+
+        An async logger waits until the records it queued are written and its sinks flushed
+        (with several pool workers, a record still being written by another worker may not
+        be). The timeout includes the wait for a free queue slot.
+
+        Args:
+            timeout: Maximum time to wait in seconds (default: no limit)
+
+        Returns:
+            False if the flush did not complete before the timeout
+        """
+        ...
+
+    def flush_async(self) -> concurrent.futures.Future[None]:
+        """
+        Flush without waiting, even when the async queue is full.
+
+        Returns:
+            A future completed once the sinks are flushed, or holding a RuntimeError if a sink failed
+        """
         ...
 
     def flush_on(self, lvl: level) -> None:
@@ -335,8 +583,47 @@ class logger:
         """
         ...
 
-    def clone(self) -> logger:
-        """Returns a clone of the logger"""
+    def clone(self, logger_name: str) -> logger:
+        """Returns a clone of the logger with a new name"""
+        ...
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the logger statistics: message counts per level, payload bytes,
+        truncated messages, per-sink counts (see enable_sink_stats) and the flush()
+        latency histogram.
+        None for loggers not created by spydlog (e.g. by a native extension).
+        """
+        ...
+
+    @property
+    def trace_enabled(self) -> bool:
+        """True if the logger would log a trace message."""
+        ...
+
+    @property
+    def debug_enabled(self) -> bool:
+        """True if the logger would log a debug message."""
+        ...
+
+    @property
+    def info_enabled(self) -> bool:
+        """True if the logger would log an info message."""
+        ...
+
+    @property
+    def warn_enabled(self) -> bool:
+        """True if the logger would log a warning message."""
+        ...
+
+    @property
+    def error_enabled(self) -> bool:
+        """True if the logger would log an error message."""
+        ...
+
+    @property
+    def critical_enabled(self) -> bool:
+        """True if the logger would log a critical message."""
         ...
 
 # Type aliases for clarity
@@ -349,22 +636,111 @@ class _async_logger(logger):
 
 # Async logger factory functions
 @overload
-def async_logger(name: str, sink: SinkPtr) -> _async_logger:
+def async_logger(name: str, sink: SinkPtr, overflow_policy: async_overflow_policy = ...) -> _async_logger:
     """Create an async logger with a single sink."""
     ...
 
 @overload
-def async_logger(name: str, sinks: List[SinkPtr]) -> _async_logger:
+def async_logger(name: str, sinks: List[SinkPtr], overflow_policy: async_overflow_policy = ...) -> _async_logger:
     """Create an async logger with multiple sinks."""
     ...
 
-def async_logger(name: str, sink_or_sinks: Union[SinkPtr, List[SinkPtr]]) -> _async_logger:
-    """Create an async logger."""
+def async_logger(name: str, sink_or_sinks: Union[SinkPtr, List[SinkPtr]], overflow_policy: async_overflow_policy = ...) -> _async_logger:
+    """
+    Create an async logger.
+
+    Args:
+        name: Logger name
+        sink_or_sinks: Sink or list of sinks
+        overflow_policy: What to do when the queue is full (default: block)
+    """
+    ...
+
+class _per_thread_logger(logger):
+    """Logger with a sink or buffer per thread (internal use)."""
+    ...
+
+# Per-thread logger factory functions
+@overload
+def per_thread_logger(name: str, sink_factory: Callable[[], SinkPtr]) -> _per_thread_logger:
+    """Create a logger writing each thread's records to the sink made for it by sink_factory."""
+    ...
+
+@overload
+def per_thread_logger(name: str, sink: SinkPtr, buffer_size: int = 8192, merge_interval_ms: int = 10) -> _per_thread_logger:
+    """Create a logger merging the records buffered by each thread into a sink."""
+    ...
+
+@overload
+def per_thread_logger(name: str, sinks: List[SinkPtr], buffer_size: int = 8192, merge_interval_ms: int = 10) -> _per_thread_logger:
+    """Create a logger merging the records buffered by each thread into several sinks."""
+    ...
+
+def per_thread_logger(name: str, sink_factory_or_sinks: Union[Callable[[], SinkPtr], SinkPtr, List[SinkPtr]],
+                      buffer_size: int = 8192, merge_interval_ms: int = 10) -> _per_thread_logger:
+    """
+    Create a logger giving each thread its own sinks or its own buffer, so threads
+    log without contending on a lock.
+
+    With a sink factory, it is called (without arguments) the first time a thread logs
+    and the sink it returns (e.g. an _st sink writing to a file per thread) is used by
+    that thread only.
+
+    With sinks, each thread buffers its records and a background thread writes them to
+    the shared sinks in timestamp order every merge_interval_ms. A thread waits when its
+    buffer holds buffer_size records. flush() writes all the buffered records.
+
+    Args:
+        name: Logger name
+        sink_factory_or_sinks: Sink factory, sink or list of sinks
+        buffer_size: Records buffered per thread (merged mode)
+        merge_interval_ms: Interval of the merge thread in milliseconds (merged mode)
+    """
+    ...
+
+def init_thread_pool(queue_size: int = 8192, thread_count: int = 1, cpu_affinity: Optional[List[int]] = None,
+                     nice: Optional[int] = None, thread_name: str = "spydlog-worker") -> None:
+    """
+    Rebuild the async thread pool. The records already queued are written first, and
+    the existing async loggers use the new pool. Threads logging to async loggers
+    meanwhile wait for the new pool.
+
+    Args:
+        queue_size: Number of records the queue holds
+        thread_count: Number of worker threads
+        cpu_affinity: CPUs the workers may run on (Linux only)
+        nice: Nice value of the workers, from -20 to 19 (Linux only)
+        thread_name: Name of the worker threads (Linux and macOS, truncated to 15
+            characters on Linux)
+
+    Raises:
+        RuntimeError: If an option is invalid, or could not be applied by the workers
+            (e.g. a negative nice value without the privilege), the pool then runs
+            without it
+    """
+    ...
+
+def shutdown(timeout: Optional[float] = None) -> int:
+    """
+    Write all the queued async records, flush all the sinks, stop the collectors and
+    drop all the loggers from the registry except the default logger. Called
+    automatically at exit, with a 5 second timeout.
+
+    Args:
+        timeout: Maximum time in seconds to wait for the async queue (default: no limit)
+
+    Returns:
+        The number of records dropped since the last shutdown: overwritten under
+        overrun_oldest, or not written before the timeout
+    """
     ...
 
 # Global logger functions
 def set_level(lvl: level) -> None:
-    """Set the global log level."""
+    """
+    Set the global log level. The loggers of get_logger that set their own level keep it,
+    the others follow their parent.
+    """
     ...
 
 def get_level() -> level:
@@ -375,6 +751,27 @@ def flush_on(lvl: level) -> None:
     """Set the global flush level."""
     ...
 
+def load_levels(levels: str) -> None:
+    """
+    Set the global level and the levels of loggers from a SPDLOG_LEVEL string, e.g.
+    "warn,app=debug" or "off,app=info". The levels apply to the registered loggers and
+    to the loggers created by the factory functions afterwards. In the get_logger tree, the
+    named loggers set their own level and the others keep theirs or follow their parent.
+    """
+    ...
+
+def load_env_levels() -> None:
+    """Set the levels from the SPDLOG_LEVEL environment variable (see load_levels), if set."""
+    ...
+
+def configure(spec: Union[Dict[str, Any], str, os.PathLike[str]]) -> None:
+    """
+    Build and register the sinks and loggers of a specification, a dict or the path of a
+    TOML or JSON file, and apply its global settings. Nothing is applied if the
+    specification is invalid. See spydlog.config for reload, watch and reload_on_signal.
+    """
+    ...
+
 def flush_every(milliseconds: int) -> None:
     """
     Set periodic flushing interval.
@@ -384,6 +781,28 @@ def flush_every(milliseconds: int) -> None:
     """
     ...
 
+def set_max_message_size(size: int) -> None:
+    """
+    Truncate the messages longer than size bytes, not inside a UTF-8 sequence.
+
+    Args:
+        size: Maximum message size in bytes, 0 for no limit (default)
+    """
+    ...
+
+def set_message_chunk_size(size: int) -> None:
+    """
+    Log the messages longer than size bytes as consecutive records of at most size
+    bytes, split after the last newline of each chunk (dropped) when there is one.
+
+    Args:
+        size: Chunk size in bytes, at least 4, or 0 to log messages whole (default)
+
+    Raises:
+        ValueError: If size is between 1 and 3
+    """
+    ...
+
 def set_pattern(pattern: str, time_type: pattern_time_type = ...) -> None:
     """
     Set the global formatting pattern.
@@ -394,31 +813,154 @@ def set_pattern(pattern: str, time_type: pattern_time_type = ...) -> None:
     """
     ...
 
+def enable_source_location() -> None:
+    """
+    Enable call-site capture, the caller file, line and function are then
+    available to patterns through %s, %g, %# and %!.
+    """
+    ...
+
+def disable_source_location() -> None:
+    """Disable call-site capture (default)."""
+    ...
+
+def source_location_enabled() -> bool:
+    """Returns True if call-site capture is enabled."""
+    ...
+
+def enable_coarse_clock() -> None:
+    """
+    Timestamp the records with the coarse system clock (Linux and Windows),
+    cheaper to read but with a resolution of a few milliseconds.
+    """
+    ...
+
+def disable_coarse_clock() -> None:
+    """Timestamp the records with the precise system clock (default)."""
+    ...
+
+def coarse_clock_enabled() -> bool:
+    """Returns True if the coarse clock is enabled."""
+    ...
+
+def stats() -> Dict[str, Any]:
+    """
+    Returns the statistics of all the live loggers (sorted by name) and of
+    the async thread pool, as {"loggers": [...], "thread_pool": {...}}.
+    """
+    ...
+
+def thread_pool_stats(reset: bool = False) -> Dict[str, int]:
+    """
+    Returns the async thread pool statistics: queue_size, queue_capacity,
+    queue_high_water_mark, overrun, slot_capacity (bytes of logger name and message
+    held inline by a queue slot) and heap_fallback (records larger than a slot,
+    copied to the heap).
+
+    Args:
+        reset: Start the high water mark over from the current queue size
+    """
+    ...
+
+def stats_prometheus() -> str:
+    """Returns the statistics in the Prometheus text exposition format."""
+    ...
+
+def enable_sink_stats() -> None:
+    """
+    Count the messages and bytes accepted by each sink of a logger. Off by default,
+    as it checks the level of every sink for every message.
+    """
+    ...
+
+def disable_sink_stats() -> None:
+    """Stop counting the messages of each sink."""
+    ...
+
+def sink_stats_enabled() -> bool:
+    """True if the messages of each sink are counted."""
+    ...
+
+# Binary log decoding
+BinaryRecord = Tuple[int, level, str, int, bytes]
+
+@overload
+def decode(filename: str, pattern: None = None, time_type: pattern_time_type = ...,
+           level: level = ...) -> Iterator[BinaryRecord]: ...
+
+@overload
+def decode(filename: str, pattern: str, time_type: pattern_time_type = ...,
+           level: level = ...) -> Iterator[str]: ...
+
+def decode(filename: str, pattern: Optional[str] = None, time_type: pattern_time_type = ...,
+           level: level = ...) -> Union[Iterator[BinaryRecord], Iterator[str]]:
+    """
+    Read the records of a file written by binary_file_sink_mt / binary_file_sink_st.
+
+    The file is memory-mapped and read sequentially. A record truncated by a crash
+    ends the iteration.
+
+    Args:
+        filename: Path to the binary log file
+        pattern: If given, each record is formatted with this pattern (without the end of line)
+        time_type: Time zone used by the pattern (default: local)
+        level: Records below this level are skipped (default: trace)
+
+    Returns:
+        An iterator of (time_ns, level, logger_name, thread_id, message) tuples, or of
+        formatted strings when a pattern is given
+
+    Raises:
+        RuntimeError: If the file cannot be opened or is not a binary log
+    """
+    ...
+
 # Global logging functions
-def trace(msg: str) -> None:
+def trace(msg: Message) -> None:
     """Log a global trace message."""
     ...
 
-def debug(msg: str) -> None:
+def debug(msg: Message) -> None:
     """Log a global debug message."""
     ...
 
-def info(msg: str) -> None:
+def info(msg: Message) -> None:
     """Log a global info message."""
     ...
 
-def warn(msg: str) -> None:
+def warn(msg: Message) -> None:
     """Log a global warning message."""
     ...
 
-def error(msg: str) -> None:
+def error(msg: Message) -> None:
     """Log a global error message."""
     ...
 
-def critical(msg: str) -> None:
+def critical(msg: Message) -> None:
     """Log a global critical message."""
     ...
 
+def exception(msg: Message, exc: Optional[BaseException] = None) -> None:
+    """
+    Log a global error message followed by the traceback of an exception.
+
+    Args:
+        msg: Message to log
+        exc: Exception to log (default: the exception currently being handled)
+    """
+    ...
+
+def set_traceback_limit(limit: int) -> None:
+    """
+    Set the maximum number of traceback frames logged by exception(), per exception
+    of the chain. Only the most recent frames are kept (default: 64).
+    """
+    ...
+
+def get_traceback_limit() -> int:
+    """Get the maximum number of traceback frames logged by exception()."""
+    ...
+
 # Logger registry functions
 def set_default_logger(logger: LoggerPtr) -> None:
     """Set the default logger."""
@@ -430,7 +972,8 @@ def default_logger() -> LoggerPtr:
 
 def get(name: str) -> Optional[LoggerPtr]:
     """
-    Get a logger by name.
+    Get a logger by name. Found loggers are cached (weakly) until drop, drop_all,
+    set_default_logger or shutdown, a repeated lookup returns the same object.
 
     Args:
         name: Logger name
@@ -440,6 +983,22 @@ def get(name: str) -> Optional[LoggerPtr]:
     """
     ...
 
+def get_logger(name: str = "") -> LoggerPtr:
+    """
+    Get a logger of the dotted name hierarchy, creating it and its missing ancestors.
+    "app.db" is a child of "app", top level loggers are children of the default logger
+    (returned for ""). A new logger is registered, shares the sinks of its parent and
+    follows its level until its own level is set. Registered loggers found on the way
+    are adopted with their sinks and level.
+
+    Args:
+        name: Dotted logger name
+
+    Returns:
+        The same logger for a name until it is dropped
+    """
+    ...
+
 def drop(name: str) -> None:
     """
     Drop a logger from the registry.
@@ -462,6 +1021,16 @@ def register_logger(logger: LoggerPtr) -> None:
     """
     ...
 
+def replace_loggers(loggers: List[LoggerPtr]) -> None:
+    """
+    Register loggers in place of the registered loggers of the same names, in one step:
+    a concurrent get returns either the old or the new loggers, never None.
+
+    Args:
+        loggers: Loggers to register, with distinct names
+    """
+    ...
+
 def apply_all(fun: Callable[[LoggerPtr], None]) -> None:
     """
     Apply a function to all registered loggers.
@@ -659,3 +1228,31 @@ def daily_logger_st(logger_name: str, filename: str, hour: int = 0, minute: int
         Logger instance
     """
     ...
+
+def binary_logger_mt(logger_name: str, filename: str, truncate: bool = False) -> LoggerPtr:
+    """
+    Create a multi-threaded binary file logger.
+
+    Args:
+        logger_name: Name of the logger
+        filename: Path to the binary log file
+        truncate: If True, truncate the file on open (default: False)
+
+    Returns:
+        Logger instance
+    """
+    ...
+
+def binary_logger_st(logger_name: str, filename: str, truncate: bool = False) -> LoggerPtr:
+    """
+    Create a single-threaded binary file logger.
+
+    Args:
+        logger_name: Name of the logger
+        filename: Path to the binary log file
+        truncate: If True, truncate the file on open (default: False)
+
+    Returns:
+        Logger instance
+    """
+    ...
@@ -38,6 +38,9 @@ def reset_global_settings():
     spydlog.set_level(spydlog.level.info)
     spydlog.set_pattern("%+")  # Default pattern
     spydlog.flush_on(spydlog.level.off)
+    spydlog.disable_source_location()
+    spydlog.disable_coarse_clock()
+    spydlog.set_traceback_limit(64)
 
 
 def pytest_configure(config):
@@ -2,7 +2,9 @@ import pytest
 import spydlog
 import tempfile
 import os
+import threading
 import time
+import concurrent.futures
 
 from tests.conftest import handle_permission_error
 
@@ -232,3 +234,352 @@ class TestAsyncLoggerConcurrency:
         async_logger.info("From async logger")
 
         async_logger.flush()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="os.fork is not available")
+@pytest.mark.filterwarnings("ignore:.*fork.*:DeprecationWarning")
+class TestAsyncLoggerFork:
+    """Test async loggers across os.fork"""
+
+    def fork(self, child):
+        pid = os.fork()
+
+        if pid == 0:
+            code = 1
+
+            try:
+                child()
+                code = 0
+            finally:
+                os._exit(code)
+
+        _, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status) if hasattr(os, "waitstatus_to_exitcode") else status >> 8
+
+    def test_async_logger_in_child(self):
+        """Test that the thread pool works in a forked child"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "fork_child.log")
+            sink = spydlog.basic_file_sink_mt(filepath)
+            sink.set_pattern("%v")
+
+            logger = spydlog.async_logger("async_fork_child", sink)
+            logger.info("Before fork")
+
+            def child():
+                logger.info("From child")
+                logger.flush()
+                time.sleep(0.1)
+
+            assert self.fork(child) == 0
+
+            logger.info("After fork")
+            logger.flush()
+            time.sleep(0.1)
+
+            with open(filepath, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert sorted(lines) == ["After fork", "Before fork", "From child"]
+
+    def test_pending_records_written_once(self):
+        """Test that the records queued before a fork are written once, by the parent"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "fork_pending.log")
+            sink = spydlog.basic_file_sink_mt(filepath)
+            sink.set_pattern("%v")
+
+            logger = spydlog.async_logger("async_fork_pending", sink)
+
+            for i in range(5000):
+                logger.info(f"Message {i}")
+
+            assert self.fork(sink.flush) == 0
+
+            logger.flush()
+            time.sleep(0.1)
+
+            with open(filepath, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert lines == [f"Message {i}" for i in range(5000)]
+
+
+class TestShutdown:
+    """Test spydlog.shutdown"""
+
+    @handle_permission_error
+    def test_shutdown_writes_queued_records(self):
+        """Test that shutdown writes and flushes all queued records"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "shutdown.log")
+            sink = spydlog.basic_file_sink_mt(filepath)
+            sink.set_pattern("%v")
+
+            logger = spydlog.async_logger("async_shutdown", sink)
+
+            for i in range(1000):
+                logger.info(f"Message {i}")
+
+            assert spydlog.shutdown() == 0
+
+            with open(filepath, 'r') as f:
+                assert f.read().splitlines() == [f"Message {i}" for i in range(1000)]
+
+    @handle_permission_error
+    def test_concurrent_shutdowns(self):
+        """Test that shutdowns from several threads wait for each other"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "concurrent_shutdown.log")
+            sink = spydlog.basic_file_sink_mt(filepath)
+            sink.set_pattern("%v")
+            logger = spydlog.async_logger("async_concurrent_shutdown", sink)
+
+            def run(thread):
+                for i in range(50):
+                    logger.info(f"Message {thread} {i}")
+                    assert spydlog.shutdown(timeout=10.0) == 0
+
+            # A shutdown releasing the workers parked by another would make it time out
+            start = time.monotonic()
+
+            with concurrent.futures.ThreadPoolExecutor(4) as executor:
+                list(executor.map(run, range(4)))
+
+            assert time.monotonic() - start < 10.0
+
+            with open(filepath) as f:
+                assert len(f.read().splitlines()) == 200
+
+    def test_shutdown_drops_loggers(self):
+        """Test that shutdown removes the loggers from the registry but keeps the default logger"""
+        default = spydlog.default_logger()
+        spydlog.register_logger(spydlog.async_logger("async_shutdown_registry", spydlog.null_sink_st()))
+        assert spydlog.get("async_shutdown_registry") is not None
+
+        spydlog.shutdown()
+
+        assert spydlog.get("async_shutdown_registry") is None
+        assert spydlog.default_logger() is default
+        spydlog.info("still logged after shutdown")
+
+    def test_shutdown_reports_overruns(self):
+        """Test that records overwritten under overrun_oldest are reported once"""
+        sink = spydlog.null_sink_st()
+        logger = spydlog.async_logger("async_shutdown_overrun", sink,
+                                      overflow_policy=spydlog.async_overflow_policy.overrun_oldest)
+
+        spydlog.shutdown()
+        overrun = spydlog.thread_pool_stats()["overrun"]
+
+        for i in range(50000):
+            logger.info("Message")
+
+        dropped = spydlog.shutdown()
+
+        assert dropped == spydlog.thread_pool_stats()["overrun"] - overrun
+        assert spydlog.shutdown() == 0
+
+    def test_shutdown_timeout(self):
+        """Test shutdown with a deadline"""
+        logger = spydlog.async_logger("async_shutdown_timeout", spydlog.null_sink_st())
+
+        for i in range(1000):
+            logger.info("Message")
+
+        assert spydlog.shutdown(timeout=0) >= 0
+        assert spydlog.shutdown(timeout=5.0) == 0
+
+    def test_logging_after_shutdown(self):
+        """Test that loggers still work after shutdown"""
+        logger = spydlog.async_logger("async_after_shutdown", spydlog.null_sink_st())
+        spydlog.shutdown()
+
+        logger.info("After shutdown")
+        logger.flush()
+
+
+class TestFlushCompletion:
+    """Test waiting for the flush of async loggers"""
+
+    @handle_permission_error
+    def test_flush_timeout(self):
+        """Test that flush returns once the queued records are written"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "flush_timeout.log")
+            logger = spydlog.async_logger("async_flush_timeout", spydlog.basic_file_sink_mt(filepath))
+
+            for i in range(1000):
+                logger.info(f"Message {i}")
+
+            assert logger.flush(timeout=5.0) is True
+
+            with open(filepath) as f:
+                assert len(f.read().splitlines()) == 1000
+
+            logger.info("Message")
+            assert isinstance(logger.flush(timeout=0), bool)
+            assert logger.flush() is True
+
+    @handle_permission_error
+    def test_flush_async(self):
+        """Test that the future of flush_async completes once the queued records are written"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "flush_async.log")
+            logger = spydlog.async_logger("async_flush_future", spydlog.basic_file_sink_mt(filepath))
+
+            for i in range(1000):
+                logger.info(f"Message {i}")
+
+            future = logger.flush_async()
+            assert isinstance(future, concurrent.futures.Future)
+            assert future.result(timeout=5.0) is None
+
+            with open(filepath) as f:
+                assert len(f.read().splitlines()) == 1000
+
+            futures = [logger.flush_async() for _ in range(10)]
+            done, _ = concurrent.futures.wait(futures, timeout=5.0)
+            assert len(done) == 10
+
+    @pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="FIFOs are not available")
+    def test_flush_timeout_full_queue(self):
+        """Test that flush(timeout) is bounded when a stuck sink keeps the queue full"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fifo = os.path.join(tmpdir, "stuck.fifo")
+            os.mkfifo(fifo)
+            reader = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+
+            try:
+                spydlog.init_thread_pool(queue_size=16)
+                logger = spydlog.async_logger("async_flush_stuck", spydlog.basic_file_sink_mt(fifo),
+                                              spydlog.async_overflow_policy.overrun_oldest)
+
+                # Nobody reads the FIFO: the worker blocks writing, then the queue fills up
+                for i in range(100):
+                    logger.info("x" * 10000)
+
+                start = time.monotonic()
+                assert logger.flush(timeout=0.5) is False
+                future = logger.flush_async()
+                assert time.monotonic() - start < 5.0
+                assert not future.done()
+
+                while not future.done():
+                    try:
+                        os.read(reader, 1 << 16)
+                    except BlockingIOError:
+                        time.sleep(0.001)
+
+                assert future.result() is None
+            finally:
+                os.close(reader)
+                spydlog.init_thread_pool()
+
+    def test_sync_logger(self):
+        """Test that sync loggers flush immediately"""
+        logger = spydlog.logger("sync_flush_future", spydlog.null_sink_st())
+
+        assert logger.flush(timeout=0) is True
+        assert logger.flush_async().done()
+
+
+class TestInitThreadPool:
+    """Test rebuilding the async thread pool"""
+
+    @pytest.fixture(autouse=True)
+    def default_thread_pool(self):
+        yield
+        spydlog.init_thread_pool()
+
+    def worker_threads(self, name):
+        """Thread ids of the threads of this process with the given name"""
+        tids = []
+        for tid in os.listdir("/proc/self/task"):
+            with open(f"/proc/self/task/{tid}/comm") as f:
+                if f.read().strip() == name:
+                    tids.append(int(tid))
+        return tids
+
+    @handle_permission_error
+    def test_queued_records_written(self):
+        """Test that existing async loggers keep working across a rebuild"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "init_thread_pool.log")
+            logger = spydlog.async_logger("async_init_thread_pool", spydlog.basic_file_sink_mt(filepath))
+
+            for i in range(1000):
+                logger.info(f"Message {i}")
+
+            spydlog.init_thread_pool(queue_size=128, thread_count=2)
+
+            for i in range(1000, 2000):
+                logger.info(f"Message {i}")
+            logger.flush()
+            spydlog.shutdown()
+
+            with open(filepath) as f:
+                assert len(f.readlines()) == 2000
+
+            assert spydlog.thread_pool_stats()["queue_capacity"] == 128
+
+    @handle_permission_error
+    def test_rebuild_while_logging(self):
+        """Test rebuilding the pool while other threads log to async loggers"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "rebuild_while_logging.log")
+            sink = spydlog.basic_file_sink_mt(filepath)
+            sink.set_pattern("%v")
+            logger = spydlog.async_logger("async_rebuild_while_logging", sink)
+            stop = threading.Event()
+
+            def produce():
+                count = 0
+                while not stop.is_set():
+                    logger.info("Message")
+                    count += 1
+                return count
+
+            with concurrent.futures.ThreadPoolExecutor(3) as executor:
+                producers = [executor.submit(produce) for _ in range(3)]
+                try:
+                    for _ in range(20):
+                        spydlog.init_thread_pool(queue_size=64, thread_count=2)
+                finally:
+                    stop.set()
+
+                count = sum(producer.result(timeout=10) for producer in producers)
+
+            assert logger.flush(timeout=10)
+
+            with open(filepath) as f:
+                assert len(f.readlines()) == count
+
+    @pytest.mark.skipif(not os.path.isdir("/proc/self/task"), reason="Linux only")
+    def test_worker_options(self):
+        """Test that the workers apply their name, affinity and nice value"""
+        cpu = min(os.sched_getaffinity(0))
+        spydlog.init_thread_pool(thread_count=2, cpu_affinity=[cpu], nice=19, thread_name="spydlog-test")
+
+        tids = self.worker_threads("spydlog-test")
+        assert len(tids) == 2
+        for tid in tids:
+            assert os.sched_getaffinity(tid) == {cpu}
+            assert os.getpriority(os.PRIO_PROCESS, tid) == 19
+
+        spydlog.init_thread_pool()
+        assert self.worker_threads("spydlog-test") == []
+        assert len(self.worker_threads("spydlog-worker")) == 1
+
+    def test_invalid_options(self):
+        """Test that invalid options are rejected before the pool is rebuilt"""
+        with pytest.raises(RuntimeError):
+            spydlog.init_thread_pool(thread_count=0)
+        with pytest.raises(RuntimeError):
+            spydlog.init_thread_pool(cpu_affinity=[-1])
+        with pytest.raises(RuntimeError):
+            spydlog.init_thread_pool(nice=20)
+
+        logger = spydlog.async_logger("async_invalid_options", spydlog.null_sink_st())
+        logger.info("Message")
+        logger.flush()
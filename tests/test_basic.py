@@ -1,3 +1,4 @@
+import pytest
 import spydlog
 
 class TestBasicLogging:
@@ -22,6 +23,19 @@ class TestBasicLogging:
         spydlog.error("error message")
         spydlog.critical("critical message")
 
+    def test_global_logging_bytes(self):
+        """Test global logging functions with bytes messages"""
+        spydlog.info(b"bytes info message")
+        spydlog.error(b"bytes error message")
+
+    def test_global_logging_invalid_arguments(self):
+        """Test global logging functions argument validation"""
+        with pytest.raises(TypeError):
+            spydlog.info(None)
+
+        with pytest.raises(TypeError):
+            spydlog.warn()
+
     def test_set_get_level(self):
         """Test setting and getting global log level"""
         spydlog.set_level(spydlog.level.debug)
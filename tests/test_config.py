@@ -0,0 +1,285 @@
+import pytest
+import spydlog
+import tempfile
+import os
+import json
+import signal
+import sys
+import time
+
+from spydlog import config
+from tests.conftest import handle_permission_error
+
+
+def spec(filepath, app_level="debug"):
+    return {
+        "level": "warn",
+        "sinks": {
+            "file": {"type": "basic_file_sink_mt", "filename": filepath, "pattern": "[%n] [%l] %v"},
+            "null": {"type": "null_sink_st", "level": "off"},
+        },
+        "loggers": {
+            "config_app": {"sinks": ["file", "null"], "level": app_level},
+            "config_async": {"sinks": ["file"], "async": True, "overflow_policy": "block", "flush_on": "error"},
+        },
+    }
+
+
+class TestConfigure:
+    """Test configuring loggers from a specification"""
+
+    @handle_permission_error
+    def test_configure_dict(self):
+        """Test that configure builds and registers the loggers"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "config.log")
+            spydlog.configure(spec(filepath))
+
+            app = spydlog.get("config_app")
+            assert app.level() == spydlog.level.debug
+            assert app.sinks()[1].level() == spydlog.level.off
+            assert spydlog.get("config_async").level() == spydlog.level.warn
+
+            app.debug("Debug")
+            app.flush()
+
+            with open(filepath) as f:
+                assert f.read().splitlines() == ["[config_app] [debug] Debug"]
+
+    @handle_permission_error
+    def test_configure_files(self):
+        """Test reading the specification from TOML and JSON files"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "config.log").replace("\\", "/")
+
+            json_path = os.path.join(tmpdir, "logging.json")
+            with open(json_path, "w") as f:
+                json.dump(spec(filepath), f)
+
+            spydlog.configure(json_path)
+            assert spydlog.get("config_app").level() == spydlog.level.debug
+
+            if sys.version_info < (3, 11):
+                pytest.importorskip("tomli")
+
+            toml_path = os.path.join(tmpdir, "logging.toml")
+            with open(toml_path, "w") as f:
+                f.write('level = "info"\n'
+                        '[sinks.file]\n'
+                        f'type = "basic_file_sink_mt"\nfilename = "{filepath}"\n'
+                        '[loggers.config_toml]\n'
+                        'sinks = ["file"]\nlevel = "trace"\n')
+
+            spydlog.configure(toml_path)
+            assert spydlog.get("config_toml").level() == spydlog.level.trace
+
+    def test_invalid_spec_not_applied(self):
+        """Test that an invalid specification changes nothing"""
+        spydlog.set_level(spydlog.level.info)
+
+        invalid = [
+            {"level": "warn", "loggers": {"config_invalid": {"sinks": ["missing"]}}},
+            {"level": "warn", "loggers": {"config_invalid": {"level": "verbose"}}},
+            {"level": "warn", "sinks": {"bad": {"type": "logger"}}},
+            {"level": "warn", "sinks": {"bad": {"type": "null_sink_st", "filename": "x"}}},
+            {"level": "warn", "unknown": 1},
+            {"level": "warn", "thread_pool": {"thread_count": 0}},
+            {"level": "warn", "thread_pool": {"queue_size": "large"}},
+            {"level": "warn", "thread_pool": {"cpu_affinity": [-1]}},
+            {"level": "warn", "thread_pool": {"nice": 20}},
+            {"level": "warn", "thread_pool": {"thread_name": 1}},
+            {"level": "warn", "pattern": 1},
+            {"level": "warn", "loggers": {"config_invalid": {"async": "yes"}}},
+            {"level": "warn", "loggers": {"config_invalid": []}},
+        ]
+
+        for entry in invalid:
+            with pytest.raises(ValueError):
+                spydlog.configure(entry)
+
+        assert spydlog.get_level() == spydlog.level.info
+        assert spydlog.get("config_invalid") is None
+
+    def test_thread_pool(self):
+        """Test that the thread pool is rebuilt once the loggers are registered"""
+        spydlog.configure({
+            "thread_pool": {"queue_size": 1024, "thread_count": 1},
+            "sinks": {"null": {"type": "null_sink_st"}},
+            "loggers": {"config_pool": {"sinks": ["null"], "async": True}},
+        })
+
+        assert spydlog.thread_pool_stats()["queue_capacity"] == 1024
+        spydlog.get("config_pool").info("Message")
+        spydlog.init_thread_pool()
+
+    def test_dist_sink(self):
+        """Test that a dist_sink contains the sinks it names"""
+        spydlog.configure({
+            "sinks": {
+                "a": {"type": "null_sink_st"},
+                "dist": {"type": "dist_sink_mt", "sinks": ["a"]},
+            },
+            "loggers": {"config_dist": {"sinks": "dist"}},
+        })
+
+        assert len(spydlog.get("config_dist").sinks()[0].sinks()) == 1
+
+    def test_replace_loggers(self):
+        """Test that a concurrent get always finds the loggers being replaced"""
+        import threading
+
+        spec = {"sinks": {"null": {"type": "null_sink_st"}},
+                "loggers": {f"config_replace_{i}": {"sinks": ["null"]} for i in range(4)}}
+        spydlog.configure(spec)
+
+        stop = threading.Event()
+        missed = []
+
+        def lookup():
+            while not stop.is_set():
+                for i in range(4):
+                    if spydlog.get(f"config_replace_{i}") is None:
+                        missed.append(i)
+
+        thread = threading.Thread(target=lookup)
+        thread.start()
+
+        try:
+            for _ in range(50):
+                spydlog.configure(spec)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert missed == []
+
+        with pytest.raises(ValueError):
+            spydlog.replace_loggers([None])
+
+
+class TestReload:
+    """Test changing levels without recreating loggers"""
+
+    @handle_permission_error
+    def test_reload_levels(self):
+        """Test that reload applies levels and patterns to the configured loggers and sinks"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "reload.log")
+            spydlog.configure(spec(filepath))
+            app = spydlog.get("config_app")
+
+            reloaded = spec(filepath, app_level="error")
+            reloaded["sinks"]["file"]["pattern"] = "%l %v"
+            config.reload(reloaded)
+
+            assert app.level() == spydlog.level.err
+            app.error("Error")
+            app.flush()
+
+            with open(filepath) as f:
+                assert f.read().splitlines() == ["error Error"]
+
+    def test_reload_validates_first(self):
+        """Test that an invalid reload changes nothing"""
+        spydlog.configure({"sinks": {"null": {"type": "null_sink_st"}},
+                           "loggers": {"config_a": {"sinks": ["null"], "level": "info"},
+                                       "config_b": {"sinks": ["null"], "level": "info"}}})
+
+        with pytest.raises(ValueError):
+            config.reload({"loggers": {"config_a": {"level": "debug"}, "config_b": {"pattern": 123}}})
+
+        assert spydlog.get("config_a").level() == spydlog.level.info
+
+    @handle_permission_error
+    def test_watch(self):
+        """Test that a watched file is reloaded when it changes"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "watch.log")
+            json_path = os.path.join(tmpdir, "logging.json")
+            with open(json_path, "w") as f:
+                json.dump(spec(filepath), f)
+
+            spydlog.configure(json_path)
+            watcher = config.watch(json_path, interval=0.01)
+
+            try:
+                with open(json_path, "w") as f:
+                    json.dump(spec(filepath, app_level="critical"), f)
+
+                deadline = time.monotonic() + 5
+                while spydlog.get("config_app").level() != spydlog.level.critical and time.monotonic() < deadline:
+                    time.sleep(0.01)
+
+                assert spydlog.get("config_app").level() == spydlog.level.critical
+
+                with open(json_path, "w") as f:
+                    f.write("{ invalid")
+
+                deadline = time.monotonic() + 5
+                while watcher.error is None and time.monotonic() < deadline:
+                    time.sleep(0.01)
+
+                assert isinstance(watcher.error, ValueError)
+                assert spydlog.get("config_app").level() == spydlog.level.critical
+            finally:
+                watcher.stop()
+
+    def test_reload_on_signal_requires_signum(self, monkeypatch):
+        """Test that platforms without SIGHUP require a signal number"""
+        monkeypatch.delattr(signal, "SIGHUP", raising=False)
+
+        with pytest.raises(ValueError):
+            config.reload_on_signal("logging.json")
+
+    @pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="SIGHUP is not available")
+    @handle_permission_error
+    def test_reload_on_signal(self):
+        """Test that SIGHUP reloads the configuration file"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "signal.log")
+            json_path = os.path.join(tmpdir, "logging.json")
+            with open(json_path, "w") as f:
+                json.dump(spec(filepath), f)
+
+            spydlog.configure(json_path)
+            previous = signal.getsignal(signal.SIGHUP)
+
+            try:
+                config.reload_on_signal(json_path)
+
+                with open(json_path, "w") as f:
+                    json.dump(spec(filepath, app_level="trace"), f)
+
+                os.kill(os.getpid(), signal.SIGHUP)
+
+                deadline = time.monotonic() + 5
+                while spydlog.get("config_app").level() != spydlog.level.trace and time.monotonic() < deadline:
+                    time.sleep(0.01)
+
+                assert spydlog.get("config_app").level() == spydlog.level.trace
+            finally:
+                signal.signal(signal.SIGHUP, previous)
+
+
+class TestLoadLevels:
+    """Test the spdlog SPDLOG_LEVEL syntax"""
+
+    def test_load_levels(self):
+        """Test setting the global level and the levels of registered loggers"""
+        logger = spydlog.logger("config_levels", spydlog.null_sink_st())
+        spydlog.register_logger(logger)
+
+        spydlog.load_levels("warn,config_levels=trace")
+
+        assert spydlog.get_level() == spydlog.level.warn
+        assert logger.level() == spydlog.level.trace
+
+    def test_load_env_levels(self, monkeypatch):
+        """Test reading the levels from SPDLOG_LEVEL"""
+        logger = spydlog.logger("config_env_levels", spydlog.null_sink_st())
+        spydlog.register_logger(logger)
+
+        monkeypatch.setenv("SPDLOG_LEVEL", "config_env_levels=critical")
+        spydlog.load_env_levels()
+
+        assert logger.level() == spydlog.level.critical
@@ -1,3 +1,4 @@
+import pytest
 import spydlog
 import tempfile
 import os
@@ -258,6 +259,100 @@ class TestLoggerRegistry:
 
         spydlog.drop_all()
 
+    def test_apply_all_can_use_registry(self):
+        """Test that the applied function may call the registry functions"""
+        spydlog.drop_all()
+
+        spydlog.stdout_color_mt("apply_drop_logger1")
+        spydlog.stdout_color_mt("apply_drop_logger2")
+
+        names = []
+
+        def drop(logger):
+            names.append(logger.name())
+            spydlog.drop(logger.name())
+
+        spydlog.apply_all(drop)
+
+        assert sorted(names) == ["apply_drop_logger1", "apply_drop_logger2"]
+        assert spydlog.get("apply_drop_logger1") is None
+        assert spydlog.get("apply_drop_logger2") is None
+
+
+    def test_get_returns_same_object(self):
+        """Test that repeated lookups return the same logger object until it is dropped"""
+        logger = spydlog.logger("get_cached_logger", spydlog.null_sink_st())
+        spydlog.register_logger(logger)
+
+        first = spydlog.get("get_cached_logger")
+        assert first is spydlog.get("get_cached_logger")
+        assert first is logger
+
+        spydlog.drop("get_cached_logger")
+        assert spydlog.get("get_cached_logger") is None
+
+        replacement = spydlog.logger("get_cached_logger", spydlog.null_sink_st())
+        spydlog.register_logger(replacement)
+        assert spydlog.get("get_cached_logger") is replacement
+
+    def test_get_after_default_logger_replaced(self):
+        """Test that replacing the default logger is seen by get"""
+        previous = spydlog.default_logger()
+        assert spydlog.get(previous.name()) is previous
+
+        default = spydlog.logger(previous.name(), spydlog.null_sink_st())
+        spydlog.set_default_logger(default)
+
+        assert spydlog.get(previous.name()) is default
+
+    def test_get_requires_str(self):
+        """Test that get rejects names that are not str"""
+        with pytest.raises(TypeError):
+            spydlog.get(b"name")
+
+    def test_get_name_keyword(self):
+        """Test that get accepts the name as a keyword"""
+        logger = spydlog.logger("get_keyword_logger", spydlog.null_sink_st())
+        spydlog.register_logger(logger)
+
+        assert spydlog.get(name="get_keyword_logger") is logger
+
+        with pytest.raises(TypeError):
+            spydlog.get(nme="get_keyword_logger")
+
+        with pytest.raises(TypeError):
+            spydlog.get("get_keyword_logger", name="get_keyword_logger")
+
+    def test_get_str_subclass(self):
+        """Test that get accepts str subclasses"""
+        class Name(str):
+            pass
+
+        logger = spydlog.logger("get_subclass_logger", spydlog.null_sink_st())
+        spydlog.register_logger(logger)
+
+        assert spydlog.get(Name("get_subclass_logger")) is logger
+        assert spydlog.get(Name("get_subclass_logger")) is logger
+        assert spydlog.get(Name("get_subclass_missing")) is None
+
+        with pytest.raises(TypeError):
+            spydlog.get(b"get_subclass_logger")
+
+    def test_get_cache_is_weak(self):
+        """Test that the lookup cache does not keep logger objects alive"""
+        import gc
+        import weakref
+
+        spydlog.stdout_logger_mt("get_weak_logger")
+        logger = spydlog.get("get_weak_logger")
+        ref = weakref.ref(logger)
+
+        del logger
+        gc.collect()
+
+        assert ref() is None
+        assert spydlog.get("get_weak_logger").name() == "get_weak_logger"
+        spydlog.drop("get_weak_logger")
 
 class TestFactoryUniqueness:
     """Test that factory functions create unique loggers"""
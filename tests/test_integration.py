@@ -1,7 +1,9 @@
+import datetime
 import pytest
 import spydlog
 import tempfile
 import os
+import sys
 import time
 
 from tests.conftest import handle_permission_error
@@ -220,6 +222,182 @@ class TestPatternFormatting:
         logger.error("Error with color")
         logger.critical("Critical with color")
 
+    @handle_permission_error
+    def test_pattern_shared_by_loggers(self):
+        """Test loggers and sinks sharing a pattern, then changing it after logging"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath1 = os.path.join(tmpdir, "shared1.log")
+            filepath2 = os.path.join(tmpdir, "shared2.log")
+            sink1 = spydlog.basic_file_sink_mt(filepath1)
+            sink2 = spydlog.basic_file_sink_mt(filepath2)
+            logger1 = spydlog.logger("shared_pattern1", sink1)
+            logger2 = spydlog.logger("shared_pattern2", [sink1, sink2])
+
+            logger1.set_pattern("[%n] %v")
+            logger2.set_pattern("[%n] %v")
+            logger1.info("first")
+            logger2.info("second")
+
+            sink2.set_pattern("<%l> %v")
+            logger2.info("third")
+            logger1.set_pattern("%v", spydlog.pattern_time_type.utc)
+            logger1.info("fourth")
+
+            logger1.flush()
+            logger2.flush()
+            del logger1, logger2, sink1, sink2
+
+            with open(filepath1) as f:
+                assert f.read().splitlines() == ["[shared_pattern1] first", "[shared_pattern2] second",
+                                                 "[shared_pattern2] third", "fourth"]
+            with open(filepath2) as f:
+                assert f.read().splitlines() == ["[shared_pattern2] second", "<info> third"]
+
+    @handle_permission_error
+    def test_global_pattern_applies_to_new_loggers(self):
+        """Test that loggers created after the global set_pattern use the pattern"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "global_pattern.log")
+
+            spydlog.set_pattern("[%n] [%l] %v")
+            logger = spydlog.basic_logger_mt("global_pattern", filepath)
+            logger.warn("message")
+            logger.flush()
+            spydlog.drop("global_pattern")
+            del logger
+
+            with open(filepath) as f:
+                assert f.read().splitlines() == ["[global_pattern] [warning] message"]
+
+
+class TestTimestamps:
+    """Test record timestamps, with the precise and the coarse clock"""
+
+    def test_coarse_clock_toggle(self):
+        """Test enabling and disabling the coarse clock"""
+        assert not spydlog.coarse_clock_enabled()
+
+        spydlog.enable_coarse_clock()
+        assert spydlog.coarse_clock_enabled()
+
+        spydlog.disable_coarse_clock()
+        assert not spydlog.coarse_clock_enabled()
+
+    @handle_permission_error
+    def test_timestamps(self):
+        """Test that the date prefix and the epoch seconds match the current time with both clocks"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "timestamps.log")
+            logger = spydlog.basic_logger_mt("timestamps", log_file)
+            logger.set_pattern("%E [%Y-%m-%d %H:%M:%S.%e] %v", spydlog.pattern_time_type.utc)
+
+            start = time.time()
+            logger.info("precise")
+            spydlog.enable_coarse_clock()
+            logger.info("coarse")
+            logger.sinks()[0].log(spydlog.level.info, "sink")
+            end = time.time()
+            logger.flush()
+
+            with open(log_file) as f:
+                lines = f.read().splitlines()
+
+            assert [line.split()[-1] for line in lines] == ["precise", "coarse", "sink"]
+            for line in lines:
+                seconds, date, clock, _ = line.split(" ")
+                assert start - 1 <= int(seconds) <= end
+                timestamp = datetime.datetime.strptime(f"{date} {clock}", "[%Y-%m-%d %H:%M:%S.%f]")
+                timestamp = timestamp.replace(tzinfo=datetime.timezone.utc).timestamp()
+                assert int(timestamp) == int(seconds)
+                # The coarse clock resolution is a few milliseconds
+                assert start - 0.05 <= timestamp <= end
+
+
+class TestSourceLocation:
+    """Test call-site source location capture"""
+
+    def test_source_location_toggle(self):
+        """Test enabling and disabling source location capture"""
+        assert not spydlog.source_location_enabled()
+
+        spydlog.enable_source_location()
+        assert spydlog.source_location_enabled()
+
+        spydlog.disable_source_location()
+        assert not spydlog.source_location_enabled()
+
+    @handle_permission_error
+    def test_source_location_in_pattern(self):
+        """Test that %s, %# and %! print the caller location"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "source_loc.log")
+            sink = spydlog.basic_file_sink_mt(log_file)
+            sink.set_pattern("%s:%# %! %v")
+            logger = spydlog.logger("source_loc", sink)
+
+            logger.info("without location")
+
+            spydlog.enable_source_location()
+            line = sys._getframe().f_lineno + 1
+            logger.info("with location")
+            sink.log(spydlog.level.info, "direct to sink")
+            logger.flush()
+
+            with open(log_file, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert lines[0].endswith(" without location")
+            assert not lines[0].startswith("test_integration.py")
+            assert lines[1].startswith(f"test_integration.py:{line} ")
+            assert "test_source_location_in_pattern" in lines[1]
+            assert lines[1].endswith("with location")
+            assert lines[2].startswith(f"test_integration.py:{line + 1} ")
+
+    @handle_permission_error
+    def test_source_location_async(self):
+        """Test that source locations survive the async queue"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "source_loc_async.log")
+            sink = spydlog.basic_file_sink_mt(log_file)
+            sink.set_pattern("%g|%!|%v")
+            logger = spydlog.async_logger("source_loc_async", sink)
+
+            spydlog.enable_source_location()
+
+            def nested_function():
+                logger.info("from nested function")
+
+            nested_function()
+            logger.flush()
+            time.sleep(0.1)
+
+            with open(log_file, 'r') as f:
+                filename, funcname, msg = f.read().strip().split("|")
+
+            assert filename == __file__
+            assert funcname.endswith("nested_function")
+            assert msg == "from nested function"
+
+    def test_source_location_releases_code(self):
+        """Test that capturing a location does not keep the code object alive"""
+        import gc
+        import weakref
+
+        logger = spydlog.logger("source_loc_release", spydlog.null_sink_st())
+        spydlog.enable_source_location()
+
+        namespace = {"logger": logger}
+        exec("def generated():\n    logger.info('generated')\n", namespace)
+        generated = namespace.pop("generated")
+        generated()
+        generated()
+
+        code = weakref.ref(generated.__code__)
+        del generated
+        gc.collect()
+
+        assert code() is None
+
 
 class TestLevelManagement:
     """Test log level management across different scenarios"""
@@ -2,6 +2,9 @@ import pytest
 import spydlog
 import tempfile
 import os
+import threading
+import time
+import traceback
 
 from tests.conftest import handle_permission_error
 
@@ -86,6 +89,30 @@ class TestLoggerMethods:
         logger.log(spydlog.level.warn, "warn via log()")
         logger.log(spydlog.level.err, "error via log()")
 
+    def test_logger_log_bytes(self, logger):
+        """Test logging pre-encoded bytes messages"""
+        logger.info(b"bytes info message")
+        logger.log(spydlog.level.warn, b"bytes warn via log()")
+
+    def test_logger_invalid_arguments(self, logger):
+        """Test that the logging methods validate their arguments"""
+        with pytest.raises(TypeError):
+            logger.info(42)
+
+        with pytest.raises(TypeError):
+            logger.info()
+
+        with pytest.raises(TypeError):
+            logger.info("too", "many")
+
+        with pytest.raises(TypeError):
+            logger.log("info", "not a level")
+
+    def test_logger_disabled_skips_conversion(self, logger):
+        """Test that a disabled level returns before looking at the message"""
+        logger.set_level(spydlog.level.off)
+        logger.info(42)
+
     def test_logger_set_level(self, logger):
         """Test setting logger level"""
         logger.set_level(spydlog.level.debug)
@@ -135,6 +162,53 @@ class TestLoggerMethods:
 class TestLoggerFiltering:
     """Test logger level filtering"""
 
+    @handle_permission_error
+    def test_logger_str_and_bytes_output(self):
+        """Test that str and bytes messages are written identically"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "bytes_test.log")
+            sink = spydlog.basic_file_sink_mt(filepath)
+            sink.set_pattern("%v")
+            logger = spydlog.logger("bytes_logger", sink)
+
+            logger.info("h\u00e9llo")
+            logger.info("h\u00e9llo".encode("utf-8"))
+            logger.flush()
+
+            with open(filepath, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+
+            assert lines == ["h\u00e9llo", "h\u00e9llo"]
+
+    @handle_permission_error
+    def test_logger_buffer_payloads(self):
+        """Test logging bytearray and memoryview payloads"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "buffer_test.log")
+            sink = spydlog.basic_file_sink_mt(filepath)
+            sink.set_pattern("%v")
+            logger = spydlog.logger("buffer_logger", sink)
+
+            frame = b'{"id": 1, "payload": "frame"}'
+
+            logger.info(bytearray(frame))
+            logger.info(memoryview(frame))
+            logger.info(memoryview(b"xx" + frame + b"yy")[2:-2])
+            logger.log(spydlog.level.err, bytearray(frame))
+            logger.flush()
+
+            with open(filepath, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert lines == [frame.decode()] * 4
+
+    def test_logger_non_contiguous_buffer(self):
+        """Test that non contiguous buffers are rejected"""
+        logger = spydlog.logger("strided_logger", spydlog.null_sink_st())
+
+        with pytest.raises(BufferError):
+            logger.info(memoryview(b"abcdef")[::2])
+
     @handle_permission_error
     def test_logger_filters_by_level(self):
         """Test that logger respects level filtering"""
@@ -158,6 +232,268 @@ class TestLoggerFiltering:
                 assert "should appear" in content
 
 
+class TestLevelEnabledAttributes:
+    """Test the level gate attributes (logger.debug_enabled, ...)"""
+
+    def test_level_enabled_follows_set_level(self):
+        """Test that level attributes follow logger.set_level"""
+        logger = spydlog.logger("gate_logger", spydlog.null_sink_st())
+
+        logger.set_level(spydlog.level.info)
+        assert not logger.trace_enabled
+        assert not logger.debug_enabled
+        assert logger.info_enabled
+        assert logger.warn_enabled
+        assert logger.error_enabled
+        assert logger.critical_enabled
+
+        logger.set_level(spydlog.level.trace)
+        assert logger.trace_enabled
+        assert logger.debug_enabled
+
+        logger.set_level(spydlog.level.off)
+        assert not logger.critical_enabled
+
+    def test_level_enabled_follows_global_set_level(self):
+        """Test that level attributes follow the global set_level"""
+        logger = spydlog.logger("gate_global_logger", spydlog.null_sink_st())
+        spydlog.register_logger(logger)
+
+        spydlog.set_level(spydlog.level.err)
+        assert not logger.warn_enabled
+        assert logger.error_enabled
+
+        spydlog.set_level(spydlog.level.debug)
+        assert logger.debug_enabled
+
+    def test_level_enabled_async_logger(self):
+        """Test that level attributes are available on async loggers"""
+        logger = spydlog.async_logger("gate_async_logger", spydlog.null_sink_st())
+        logger.set_level(spydlog.level.warn)
+        assert not logger.info_enabled
+        assert logger.warn_enabled
+
+    def test_level_enabled_is_read_only(self):
+        """Test that level attributes cannot be assigned"""
+        logger = spydlog.logger("gate_ro_logger", spydlog.null_sink_st())
+
+        with pytest.raises(AttributeError):
+            logger.debug_enabled = True
+
+
+class TestExceptionLogging:
+    """Test logger.exception traceback formatting"""
+
+    @staticmethod
+    def raise_nested(depth):
+        if depth == 0:
+            raise ValueError("nested failure")
+
+        TestExceptionLogging.raise_nested(depth - 1)
+
+    @handle_permission_error
+    def test_exception_current(self):
+        """Test logging the exception currently being handled"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "exception.log")
+            sink = spydlog.basic_file_sink_mt(log_file)
+            sink.set_pattern("[%l] %v")
+            logger = spydlog.logger("exception_logger", sink)
+
+            try:
+                self.raise_nested(2)
+            except ValueError:
+                logger.exception("operation failed")
+
+            logger.flush()
+
+            with open(log_file, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert lines[0] == "[error] operation failed"
+            assert lines[1] == "Traceback (most recent call last):"
+            assert lines[2].startswith(f'  File "{__file__}", line ')
+            assert lines[2].endswith("test_exception_current")
+            assert lines[3] == "    self.raise_nested(2)"
+            assert len([line for line in lines if line.startswith("  File") and "raise_nested" in line]) == 3
+            assert lines[-2] == '    raise ValueError("nested failure")'
+            assert lines[-1] == "ValueError: nested failure"
+
+    @handle_permission_error
+    def test_exception_source_lines(self):
+        """Test that source lines are logged like the traceback module does, when available"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "exception.log")
+            sink = spydlog.basic_file_sink_mt(log_file)
+            sink.set_pattern("%v")
+            logger = spydlog.logger("exception_source_logger", sink)
+
+            generated = compile("def fail():\n    raise KeyError('generated')\n", "<generated>", "exec")
+            namespace = {}
+            exec(generated, namespace)
+
+            for _ in range(2):
+                try:
+                    namespace["fail"]()
+                except KeyError as e:
+                    error = e
+                    logger.exception("no source")
+
+            logger.flush()
+
+            with open(log_file, 'r') as f:
+                lines = f.read().splitlines()
+
+            # The second message reads the source lines cached for the code objects
+            printed = "".join(traceback.format_exception(type(error), error, error.__traceback__)).splitlines()
+            expected = ["no source"] + [line for line in printed if not line.strip().startswith(("^", "~"))]
+            assert lines == expected + expected
+            assert lines[-2] == '  File "<generated>", line 2, in fail'
+
+    @handle_permission_error
+    def test_exception_explicit(self):
+        """Test logging an exception passed explicitly"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "exception.log")
+            sink = spydlog.basic_file_sink_mt(log_file)
+            sink.set_pattern("%v")
+            logger = spydlog.logger("exception_explicit_logger", sink)
+
+            try:
+                {}["missing"]
+            except KeyError as e:
+                error = e
+
+            logger.exception(b"lookup failed", exc=error)
+            logger.exception("no exception")
+            logger.flush()
+
+            with open(log_file, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert lines[0] == "lookup failed"
+            assert lines[-2] == "KeyError: 'missing'"
+            assert lines[-1] == "no exception"
+
+    @handle_permission_error
+    def test_exception_frame_limit(self):
+        """Test that the traceback limit keeps the most recent frames"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "exception.log")
+            sink = spydlog.basic_file_sink_mt(log_file)
+            sink.set_pattern("%v")
+            logger = spydlog.logger("exception_limit_logger", sink)
+
+            spydlog.set_traceback_limit(2)
+            assert spydlog.get_traceback_limit() == 2
+
+            try:
+                self.raise_nested(5)
+            except ValueError:
+                logger.exception("limited")
+
+            logger.flush()
+
+            with open(log_file, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert lines[2] == "  ... (5 frames omitted)"
+            assert len([line for line in lines if line.startswith("  File")]) == 2
+
+    @handle_permission_error
+    def test_exception_chain(self):
+        """Test that causes and contexts are logged before the exception, like the traceback module"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "exception.log")
+            sink = spydlog.basic_file_sink_mt(log_file)
+            sink.set_pattern("%v")
+            logger = spydlog.logger("exception_chain_logger", sink)
+
+            try:
+                try:
+                    try:
+                        self.raise_nested(0)
+                    except ValueError as e:
+                        raise RuntimeError("outer") from e
+                except RuntimeError:
+                    raise KeyError("context")
+            except KeyError:
+                logger.exception("chained")
+
+            try:
+                try:
+                    self.raise_nested(0)
+                except ValueError:
+                    raise TypeError("suppressed") from None
+            except TypeError:
+                logger.exception("not chained")
+
+            logger.flush()
+
+            with open(log_file, 'r') as f:
+                lines = f.read().splitlines()
+
+            summaries = [line for line in lines if not line.startswith("  ")]
+            assert summaries == [
+                "chained",
+                "Traceback (most recent call last):",
+                "ValueError: nested failure",
+                "",
+                "The above exception was the direct cause of the following exception:",
+                "",
+                "Traceback (most recent call last):",
+                "RuntimeError: outer",
+                "",
+                "During handling of the above exception, another exception occurred:",
+                "",
+                "Traceback (most recent call last):",
+                "KeyError: 'context'",
+                "not chained",
+                "Traceback (most recent call last):",
+                "TypeError: suppressed",
+            ]
+            assert lines[2].endswith(", in test_exception_chain")
+            assert lines[3] == "    self.raise_nested(0)"
+            assert lines[4].endswith(", in raise_nested")
+
+    @handle_permission_error
+    def test_exception_async(self):
+        """Test exception logging through an async logger"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "exception.log")
+            sink = spydlog.basic_file_sink_mt(log_file)
+            sink.set_pattern("%v")
+            logger = spydlog.async_logger("exception_async_logger", sink)
+
+            try:
+                raise RuntimeError("async failure")
+            except RuntimeError:
+                logger.exception("async")
+
+            logger.flush()
+            time.sleep(0.1)
+
+            with open(log_file, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert lines[0] == "async"
+            assert lines[-1] == "RuntimeError: async failure"
+
+    def test_exception_invalid_exc(self):
+        """Test that exc must be an exception instance"""
+        logger = spydlog.logger("exception_invalid_logger", spydlog.null_sink_st())
+
+        with pytest.raises(TypeError):
+            logger.exception("invalid", exc="not an exception")
+
+    def test_global_exception(self):
+        """Test the global exception function"""
+        try:
+            raise ValueError("global failure")
+        except ValueError:
+            spydlog.exception("global exception")
+
+
 class TestMultipleSinks:
     """Test logger with multiple sinks"""
 
@@ -218,3 +554,507 @@ class TestMultipleSinks:
                 assert "Debug message" not in error_content
                 assert "Info message" not in error_content
                 assert "Error message" in error_content
+
+
+class TestLoggerStats:
+    """Test logger and thread pool statistics"""
+
+    def test_message_counts(self):
+        """Test per-level message and byte counts"""
+        logger = spydlog.logger("stats_logger", spydlog.null_sink_st())
+        logger.set_level(spydlog.level.info)
+
+        logger.debug("filtered")
+        logger.info("hello")
+        logger.info(b"world")
+        logger.error("boom")
+
+        stats = logger.stats()
+        assert stats["name"] == "stats_logger"
+        assert stats["async"] is False
+        assert stats["messages"]["debug"] == 0
+        assert stats["messages"]["info"] == 2
+        assert stats["messages"]["error"] == 1
+        assert stats["bytes"] == 14
+
+    def test_sink_counts(self):
+        """Test that sink counters are opt-in and only include accepted messages"""
+        sink_all = spydlog.null_sink_st()
+        sink_error = spydlog.null_sink_st()
+        sink_error.set_level(spydlog.level.err)
+
+        logger = spydlog.logger("stats_sinks_logger", [sink_all, sink_error])
+        logger.info("uncounted")
+        assert not spydlog.sink_stats_enabled()
+
+        spydlog.enable_sink_stats()
+        try:
+            assert spydlog.sink_stats_enabled()
+            logger.info("info")
+            logger.error("error")
+        finally:
+            spydlog.disable_sink_stats()
+
+        logger.error("uncounted")
+
+        sinks = logger.stats()["sinks"]
+        assert sinks[0] == {"messages": 2, "bytes": 9}
+        assert sinks[1] == {"messages": 1, "bytes": 5}
+        assert logger.stats()["messages"]["info"] == 2
+
+    def test_thread_counts(self):
+        """Test that the counts of all the threads add up, exited threads included"""
+        logger = spydlog.logger("stats_threads_logger", spydlog.dist_sink_mt())
+
+        def run():
+            for _ in range(1000):
+                logger.info("x")
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+
+        # Counted while the threads are running, then after they exit
+        assert logger.stats()["messages"]["info"] <= 4000
+
+        for thread in threads:
+            thread.join()
+
+        run()
+        stats = logger.stats()
+        assert stats["messages"]["info"] == 5000
+        assert stats["bytes"] == 5000
+
+    def test_flush_latency(self):
+        """Test that flush calls are recorded in the latency histogram"""
+        logger = spydlog.logger("stats_flush_logger", spydlog.null_sink_st())
+        logger.flush()
+        logger.flush()
+
+        latency = logger.stats()["flush_latency"]
+        assert latency["count"] == 2
+        assert latency["sum"] >= 0
+        assert latency["buckets"][-1] == (float("inf"), 2)
+
+        counts = [count for _, count in latency["buckets"]]
+        assert counts == sorted(counts)
+
+    def test_async_logger_stats(self):
+        """Test async logger and thread pool statistics"""
+        logger = spydlog.async_logger("stats_async_logger", [spydlog.null_sink_st()])
+
+        for i in range(100):
+            logger.info(f"message {i}")
+        logger.flush()
+
+        stats = logger.stats()
+        assert stats["async"] is True
+        assert stats["messages"]["info"] == 100
+
+        pool = spydlog.thread_pool_stats()
+        assert set(pool) == {"queue_size", "queue_capacity", "queue_high_water_mark", "overrun",
+                             "slot_capacity", "heap_fallback"}
+        assert 1 <= pool["queue_high_water_mark"] <= pool["queue_capacity"]
+
+    def test_thread_pool_stats_reset(self):
+        """Test that the high water mark starts over after a reset"""
+        logger = spydlog.async_logger("stats_high_water_mark", [spydlog.null_sink_st()])
+
+        for i in range(100):
+            logger.info(f"message {i}")
+        logger.flush()
+
+        assert spydlog.thread_pool_stats(reset=True)["queue_high_water_mark"] >= 1
+        assert spydlog.thread_pool_stats()["queue_high_water_mark"] == 0
+
+    def test_thread_pool_heap_fallback(self):
+        """Test that only the records larger than a queue slot buffer are counted"""
+        logger = spydlog.async_logger("stats_heap_fallback", [spydlog.null_sink_st()])
+        capacity = spydlog.thread_pool_stats()["slot_capacity"] - len(logger.name())
+        fallback = spydlog.thread_pool_stats()["heap_fallback"]
+
+        logger.info("x" * capacity)
+        logger.info(b"x" * (capacity + 1))
+        logger.info("x" * 10000)
+        logger.flush()
+
+        assert spydlog.thread_pool_stats()["heap_fallback"] - fallback == 2
+
+    def test_clone_has_own_stats(self):
+        """Test that clones get their own counters and name"""
+        logger = spydlog.logger("stats_original", spydlog.null_sink_st())
+        logger.info("original")
+
+        clone = logger.clone("stats_clone")
+        clone.info("clone")
+        clone.info("clone")
+
+        assert clone.name() == "stats_clone"
+        assert logger.stats()["messages"]["info"] == 1
+        assert clone.stats()["messages"]["info"] == 2
+
+        async_clone = spydlog.async_logger("stats_async_original", [spydlog.null_sink_st()]).clone("stats_async_clone")
+        assert async_clone.name() == "stats_async_clone"
+        assert async_clone.stats()["async"] is True
+
+    def test_global_stats(self):
+        """Test the statistics of all the live loggers"""
+        logger = spydlog.logger("stats_global_logger", spydlog.null_sink_st())
+        logger.warn("warning")
+
+        stats = spydlog.stats()
+        assert set(stats) == {"loggers", "thread_pool"}
+
+        names = [entry["name"] for entry in stats["loggers"]]
+        assert names == sorted(names)
+        assert "stats_global_logger" in names
+
+    def test_prometheus_export(self):
+        """Test the Prometheus text exposition output"""
+        logger = spydlog.logger("stats_prometheus_logger", spydlog.null_sink_st())
+        logger.critical("critical")
+        logger.flush()
+
+        text = spydlog.stats_prometheus()
+        assert "# TYPE spydlog_messages_total counter" in text
+        assert 'spydlog_messages_total{logger="stats_prometheus_logger",level="critical"} 1' in text
+        assert 'spydlog_bytes_total{logger="stats_prometheus_logger"} 8' in text
+        assert 'spydlog_flush_duration_seconds_count{logger="stats_prometheus_logger"} 1' in text
+        assert "spydlog_thread_pool_queue_capacity" in text
+        assert text.endswith("\n")
+
+
+class TestMessageLimits:
+    """Test truncating and chunking large messages"""
+
+    @handle_permission_error
+    def test_max_message_size(self):
+        """Test that longer messages are truncated, not inside a UTF-8 sequence"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "truncated.log")
+            logger = spydlog.logger("limits_truncated", spydlog.raw_file_sink_mt(filepath))
+
+            spydlog.set_max_message_size(5)
+            try:
+                logger.info("short")
+                logger.info("truncated")
+                logger.info("abcd\u00e9")
+                logger.info(b"\xff" * 10)
+            finally:
+                spydlog.set_max_message_size(0)
+
+            logger.info("unlimited")
+            logger.flush()
+
+            with open(filepath, "rb") as f:
+                assert f.read().splitlines() == [b"short", b"trunc", b"abcd", b"\xff" * 5, b"unlimited"]
+
+            assert logger.stats()["truncated"] == 3
+            assert logger.stats()["bytes"] == 28
+
+    @handle_permission_error
+    def test_chunked_messages(self):
+        """Test that longer messages are split after their last newline or at the chunk size"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "chunked.log")
+            sink = spydlog.raw_file_sink_mt(filepath)
+            logger = spydlog.logger("limits_chunked", sink)
+            async_logger = spydlog.async_logger("limits_chunked_async", sink)
+            dump = "\n".join(f"Line {i} \u00e9" for i in range(10000))
+
+            spydlog.set_message_chunk_size(1024)
+            try:
+                logger.info(dump)
+                async_logger.info(dump)
+                async_logger.flush()
+                logger.info("\u00e9" * 1000)
+            finally:
+                spydlog.set_message_chunk_size(0)
+
+            logger.flush()
+
+            with open(filepath, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+
+            assert lines[:20000] == dump.splitlines() * 2
+            assert lines[20000:] == ["\u00e9" * 512, "\u00e9" * 488]
+            assert logger.stats()["messages"]["info"] == 2
+
+    def test_invalid_chunk_size(self):
+        """Test that a chunk size cannot split a UTF-8 sequence"""
+        with pytest.raises(ValueError):
+            spydlog.set_message_chunk_size(3)
+
+
+class TestConcurrentLogging:
+    """Test loggers and the registry used from several threads"""
+
+    @handle_permission_error
+    def test_mt_file_logger_from_threads(self):
+        """Test that no message is lost when threads share a _mt file logger"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "threads.log")
+            logger = spydlog.basic_logger_mt("threads_file_logger", filepath)
+            logger.set_pattern("%v")
+
+            def worker(index):
+                for i in range(1000):
+                    logger.info(f"thread {index} message {i}")
+
+            threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            logger.flush()
+            spydlog.drop("threads_file_logger")
+            del logger
+
+            with open(filepath) as f:
+                lines = f.read().splitlines()
+
+            assert len(lines) == 8000
+            assert len(set(lines)) == 8000
+
+    def test_registry_from_threads(self):
+        """Test registering, getting and dropping loggers from several threads"""
+        errors = []
+
+        def worker(index):
+            try:
+                for i in range(200):
+                    name = f"threads_registry_{index}_{i}"
+                    spydlog.register_logger(spydlog.logger(name, spydlog.null_sink_st()))
+                    assert spydlog.get(name).name() == name
+                    spydlog.apply_all(lambda logger: logger.name())
+                    spydlog.drop(name)
+                    assert spydlog.get(name) is None
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+
+
+class TestPerThreadLogger:
+    """Test loggers giving each thread its own sinks or buffer"""
+
+    @handle_permission_error
+    def test_sink_factory_per_thread(self):
+        """Test that each thread writes to the sink the factory created for it"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            def sink_factory():
+                name = threading.current_thread().name
+                return spydlog.basic_file_sink_st(os.path.join(tmpdir, f"{name}.log"))
+
+            logger = spydlog.per_thread_logger("per_thread_files", sink_factory)
+            logger.set_pattern("%v")
+
+            def worker():
+                for i in range(500):
+                    logger.info(f"{threading.current_thread().name} message {i}")
+
+            threads = [threading.Thread(target=worker, name=f"worker{index}") for index in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            logger.flush()
+            del logger
+
+            for index in range(4):
+                with open(os.path.join(tmpdir, f"worker{index}.log")) as f:
+                    lines = f.read().splitlines()
+                assert lines == [f"worker{index} message {i}" for i in range(500)]
+
+    @handle_permission_error
+    def test_set_pattern_reaches_thread_sinks(self):
+        """Test that set_pattern and the global set_pattern apply to the sinks of the threads"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "pattern.log")
+            logger = spydlog.per_thread_logger("per_thread_pattern", lambda: spydlog.basic_file_sink_st(filepath))
+            logger.info("before")
+            logger.set_pattern("[%l] %v")
+            logger.info("after")
+            spydlog.set_pattern("<%l> %v")
+            logger.info("global")
+            logger.flush()
+
+            with open(filepath) as f:
+                lines = f.read().splitlines()
+            assert lines[0].endswith("before")
+            assert lines[1] == "[info] after"
+            assert lines[2] == "<info> global"
+
+    def test_sink_factory_error(self):
+        """Test that an error of the sink factory is raised, and the factory called again"""
+        calls = []
+
+        def sink_factory():
+            calls.append(None)
+            if len(calls) == 1:
+                raise ValueError("no sink")
+            return spydlog.null_sink_st()
+
+        logger = spydlog.per_thread_logger("per_thread_error", sink_factory)
+        with pytest.raises(ValueError, match="no sink"):
+            logger.info("first")
+        logger.info("second")
+        logger.info("third")
+        assert len(calls) == 2
+
+    @handle_permission_error
+    def test_merged_in_timestamp_order(self):
+        """Test that the records of all the threads are merged in timestamp order, none lost"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "merged.log")
+            # A small buffer makes the threads wait for the merge thread
+            logger = spydlog.per_thread_logger("per_thread_merged", spydlog.basic_file_sink_st(filepath),
+                                               buffer_size=64)
+            logger.set_pattern("%Y-%m-%d %H:%M:%S.%F %v")
+            assert len(logger.sinks()) == 1
+
+            def worker(index):
+                for i in range(2000):
+                    logger.info(f"thread {index} message {i}")
+
+            threads = [threading.Thread(target=worker, args=(index,)) for index in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            logger.flush()
+
+            with open(filepath) as f:
+                lines = f.read().splitlines()
+
+            assert len(lines) == 8000
+            assert len(set(line[30:] for line in lines)) == 8000
+            times = [line[:29] for line in lines]
+            assert times == sorted(times)
+
+    def test_merged_flush_writes_records(self):
+        """Test that flush writes the buffered records before the merge interval"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "flush.log")
+            logger = spydlog.per_thread_logger("per_thread_flush", [spydlog.basic_file_sink_mt(filepath)],
+                                               merge_interval_ms=60000)
+            logger.set_pattern("%v")
+            logger.info("buffered")
+            logger.flush()
+
+            with open(filepath) as f:
+                assert f.read().splitlines() == ["buffered"]
+
+            clone = logger.clone("per_thread_flush_clone")
+            clone.info("cloned")
+            clone.flush()
+
+            with open(filepath) as f:
+                assert f.read().splitlines() == ["buffered", "cloned"]
+
+
+class TestHierarchicalLoggers:
+    """Test dotted logger hierarchies"""
+
+    def test_children_inherit_sinks_and_level(self):
+        """Test that get_logger creates the ancestors, sharing the sinks and level of the parent"""
+        sink = spydlog.null_sink_st()
+        app = spydlog.logger("hier_app", sink)
+        spydlog.register_logger(app)
+        app.set_level(spydlog.level.warn)
+        app.flush_on(spydlog.level.err)
+
+        pool = spydlog.get_logger("hier_app.db.pool")
+        db = spydlog.get("hier_app.db")
+
+        assert db is not None
+        assert spydlog.get_logger("hier_app.db.pool") is pool
+        assert spydlog.get_logger("hier_app") is app
+        assert pool.sinks()[0] is sink
+        assert pool.level() == spydlog.level.warn
+        assert pool.should_log(spydlog.level.err)
+        assert not pool.should_log(spydlog.level.info)
+
+    def test_level_propagation(self):
+        """Test that level changes reach the descendants that do not set their own level"""
+        app = spydlog.get_logger("hier_prop")
+        db = spydlog.get_logger("hier_prop.db")
+        pool = spydlog.get_logger("hier_prop.db.pool")
+        cache = spydlog.get_logger("hier_prop.cache")
+
+        app.set_level(spydlog.level.err)
+        assert [db.level(), pool.level(), cache.level()] == [spydlog.level.err] * 3
+
+        db.set_level(spydlog.level.debug)
+        app.set_level(spydlog.level.critical)
+        assert db.level() == spydlog.level.debug
+        assert pool.level() == spydlog.level.debug
+        assert cache.level() == spydlog.level.critical
+
+        db.set_level(None)
+        assert db.level() == spydlog.level.critical
+        assert pool.level() == spydlog.level.critical
+
+    def test_default_logger_is_root(self):
+        """Test that top level loggers follow the default logger"""
+        top = spydlog.get_logger("hier_top")
+        assert len(top.sinks()) == len(spydlog.default_logger().sinks())
+        assert spydlog.get_logger() is spydlog.default_logger()
+
+        spydlog.default_logger().set_level(spydlog.level.err)
+        assert top.level() == spydlog.level.err
+
+    def test_global_levels(self):
+        """Test that set_level and load_levels keep the explicit levels of the tree"""
+        app = spydlog.get_logger("hier_global")
+        db = spydlog.get_logger("hier_global.db")
+        pool = spydlog.get_logger("hier_global.db.pool")
+        cache = spydlog.get_logger("hier_global.cache")
+
+        db.set_level(spydlog.level.debug)
+        spydlog.set_level(spydlog.level.warn)
+        assert app.level() == spydlog.level.warn
+        assert cache.level() == spydlog.level.warn
+        assert db.level() == spydlog.level.debug
+        assert pool.level() == spydlog.level.debug
+
+        spydlog.load_levels("err, hier_global = critical")
+        assert app.level() == spydlog.level.critical
+        assert cache.level() == spydlog.level.critical
+        assert db.level() == spydlog.level.debug
+
+        spydlog.set_level(spydlog.level.info)
+        assert app.level() == spydlog.level.critical
+        assert cache.level() == spydlog.level.critical
+
+        spydlog.get("hier_global.db").set_level(None)
+        assert pool.level() == spydlog.level.critical
+
+    def test_invalid_names(self):
+        """Test that empty name components are rejected"""
+        for name in [".hier", "hier.", "hier..db"]:
+            with pytest.raises(ValueError):
+                spydlog.get_logger(name)
+
+        with pytest.raises(ValueError):
+            spydlog.logger("hier_plain", spydlog.null_sink_st()).set_level(None)
+
+    def test_drop(self):
+        """Test that dropped loggers leave the hierarchy"""
+        db = spydlog.get_logger("hier_drop.db")
+        spydlog.drop("hier_drop.db")
+
+        assert spydlog.get("hier_drop.db") is None
+        assert spydlog.get_logger("hier_drop.db") is not db
+
+        spydlog.drop_all()
+        assert spydlog.get("hier_drop") is None
@@ -0,0 +1,184 @@
+import pytest
+import spydlog
+import tempfile
+import os
+from datetime import datetime, timedelta, timezone
+
+from spydlog import reader
+from tests.conftest import handle_permission_error
+
+
+class TestRotationSet:
+    """Test finding the files of a log"""
+
+    @handle_permission_error
+    def test_rotated_files(self):
+        """Test that rotated files are listed oldest first, before the current file"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "app.log")
+            logger = spydlog.rotating_logger_mt("rotation_set", filepath, 1024, 3)
+            for i in range(100):
+                logger.info(f"Message {i}")
+            logger.flush()
+
+            assert reader.rotation_set(filepath) == [
+                os.path.join(tmpdir, "app.3.log"),
+                os.path.join(tmpdir, "app.2.log"),
+                os.path.join(tmpdir, "app.1.log"),
+                filepath,
+            ]
+
+    @handle_permission_error
+    def test_daily_files(self):
+        """Test that daily files are listed by date and other logs are ignored"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ["app_2025-01-02.log", "app_2024-12-31.log", "other_2025-01-01.log", "app.txt"]:
+                open(os.path.join(tmpdir, name), "w").close()
+
+            assert reader.rotation_set(os.path.join(tmpdir, "app.log")) == [
+                os.path.join(tmpdir, "app_2024-12-31.log"),
+                os.path.join(tmpdir, "app_2025-01-02.log"),
+            ]
+
+    def test_missing_log(self):
+        """Test that a reader of a missing log raises"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with pytest.raises(FileNotFoundError):
+                reader.LogReader(os.path.join(tmpdir, "missing.log"))
+
+
+class TestLogReader:
+    """Test reading text logs"""
+
+    @handle_permission_error
+    def test_default_pattern(self):
+        """Test reading records written with the default pattern, across rotated files"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "default.log")
+            logger = spydlog.rotating_logger_mt("reader_default", filepath, 4096, 10)
+            for i in range(200):
+                logger.warn(f"Message {i}") if i % 2 else logger.info(f"Message {i}")
+            logger.flush()
+
+            records = list(reader.LogReader(filepath))
+            assert [r.message for r in records] == [f"Message {i}" for i in range(200)]
+            assert records[1].level == spydlog.level.warn
+            assert records[0].logger == "reader_default"
+            assert abs(records[0].time - datetime.now()) < timedelta(minutes=1)
+            assert records[0].filename != filepath
+
+            warnings = list(reader.LogReader(filepath, level=spydlog.level.warn))
+            assert [r.message for r in warnings] == [f"Message {i}" for i in range(1, 200, 2)]
+
+    @handle_permission_error
+    def test_multiline_records(self):
+        """Test that lines not matching the pattern belong to the previous record"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "multiline.log")
+            logger = spydlog.basic_logger_mt("reader_multiline", filepath)
+            try:
+                raise ValueError("Test error")
+            except ValueError:
+                logger.exception("Failed")
+            logger.info("After")
+            logger.flush()
+
+            records = list(reader.LogReader(filepath))
+            assert len(records) == 2
+            assert records[0].message.startswith("Failed\nTraceback (most recent call last):")
+            assert records[0].message.endswith("ValueError: Test error")
+            assert records[1].message == "After"
+
+    @handle_permission_error
+    def test_tail(self):
+        """Test getting the last records of a rotated log"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "tail.log")
+            logger = spydlog.rotating_logger_mt("reader_tail", filepath, 2048, 5)
+            for i in range(300):
+                logger.error(f"Message {i}") if i % 10 == 0 else logger.info(f"Message {i}")
+            logger.flush()
+
+            log = reader.LogReader(filepath)
+            assert [r.message for r in log.tail(3)] == ["Message 297", "Message 298", "Message 299"]
+            assert len(log.tail(1000)) == len(list(log))
+            assert log.tail(0) == []
+
+            errors = reader.LogReader(filepath, level=spydlog.level.err).tail(4)
+            assert [r.message for r in errors] == ["Message 260", "Message 270", "Message 280", "Message 290"]
+
+    @handle_permission_error
+    def test_between(self):
+        """Test seeking records by time with the index"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "between.log")
+            logger = spydlog.basic_logger_mt("reader_between", filepath)
+            logger.set_pattern("%Y-%m-%d %H:%M:%S.%f %v")
+            for i in range(20000):
+                logger.info(f"Message {i}")
+            logger.flush()
+
+            log = reader.LogReader(filepath, "%Y-%m-%d %H:%M:%S.%f %v")
+            records = list(log)
+            start, end = records[5000].time, records[15000].time
+
+            found = list(log.between(start, end))
+            expected = [r for r in records if start <= r.time <= end]
+            assert found == expected
+            assert list(log.between(end=records[0].time)) == [r for r in records if r.time <= records[0].time]
+            assert list(log.between(start=records[-1].time + timedelta(seconds=1))) == []
+
+    @handle_permission_error
+    def test_between_requires_date(self):
+        """Test that a pattern without the date cannot seek by time"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "nodate.log")
+            logger = spydlog.basic_logger_mt("reader_nodate", filepath)
+            logger.set_pattern("%H:%M:%S %v")
+            logger.info("Message")
+            logger.flush()
+
+            log = reader.LogReader(filepath, "%H:%M:%S %v")
+            assert [r.message for r in log] == ["Message"]
+            assert log.tail()[0].time is None
+            with pytest.raises(ValueError):
+                list(log.between(datetime.now()))
+
+    @handle_permission_error
+    def test_pattern_flags(self):
+        """Test a pattern with composite, padded and time zone flags"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "flags.log")
+            pattern = "%D %r.%e %z [%-8l] [%=10n] <%t> %v"
+            logger = spydlog.basic_logger_mt("flags", filepath)
+            logger.set_pattern(pattern, spydlog.pattern_time_type.utc)
+            logger.critical("Message")
+            logger.flush()
+
+            record = reader.LogReader(filepath, pattern).tail(1)[0]
+            assert record.level == spydlog.level.critical
+            assert record.logger == "flags"
+            assert record.thread > 0
+            assert record.message == "Message"
+            assert record.time.tzinfo is not None
+            assert abs(record.time - datetime.now(timezone.utc)) < timedelta(minutes=1)
+
+    @handle_permission_error
+    def test_json_lines(self):
+        """Test that JSON lines are detected without a pattern"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "json.log")
+            logger = spydlog.basic_logger_mt("reader_json", filepath)
+            logger.set_pattern('{"time": "%Y-%m-%dT%H:%M:%S.%f", "level": "%l", "logger": "%n", "thread": %t, '
+                               '"message": "%v"}')
+            logger.info("First")
+            logger.error("Second\nline")
+            logger.flush()
+
+            records = list(reader.LogReader(filepath))
+            assert [(r.level, r.logger, r.message) for r in records] == [
+                (spydlog.level.info, "reader_json", "First"),
+                (spydlog.level.err, "reader_json", "Second\nline"),
+            ]
+            assert abs(records[0].time - datetime.now()) < timedelta(minutes=1)
+            assert list(reader.LogReader(filepath).between(start=records[1].time)) == records[1:]
@@ -1,6 +1,11 @@
+import pytest
 import spydlog
 import tempfile
+import multiprocessing
 import os
+import subprocess
+import sys
+import time
 
 from tests.conftest import handle_permission_error
 
@@ -160,6 +165,497 @@ class TestNullSink:
         assert sink is not None
 
 
+class TestDistSink:
+    """Test dist sink (dynamic list of sinks)"""
+
+    def test_dist_sink_mt(self):
+        """Test multi-threaded dist sink creation"""
+        sink = spydlog.dist_sink_mt()
+        assert sink is not None
+        assert len(sink.sinks()) == 0
+
+    def test_dist_sink_st(self):
+        """Test single-threaded dist sink creation with initial sinks"""
+        sink = spydlog.dist_sink_st([spydlog.null_sink_st(), spydlog.null_sink_st()])
+        assert len(sink.sinks()) == 2
+
+    def test_dist_sink_add_remove(self):
+        """Test adding and removing sinks from a dist sink"""
+        dist = spydlog.dist_sink_mt()
+        null1 = spydlog.null_sink_st()
+        null2 = spydlog.null_sink_st()
+
+        dist.add_sink(null1)
+        dist.add_sink(null2)
+        assert len(dist.sinks()) == 2
+
+        dist.remove_sink(null1)
+        assert len(dist.sinks()) == 1
+
+        dist.set_sinks([null1, null2])
+        assert len(dist.sinks()) == 2
+
+        dist.set_sinks([])
+        assert len(dist.sinks()) == 0
+
+    @handle_permission_error
+    def test_dist_sink_attach_detach_file(self):
+        """Test attaching a file sink to a live logger and detaching it"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "dist.log")
+
+            dist = spydlog.dist_sink_mt()
+            logger = spydlog.logger("dist_logger", dist)
+            logger.info("before attach")
+
+            # Sub-sinks keep their own pattern
+            file_sink = spydlog.basic_file_sink_mt(filepath)
+            file_sink.set_pattern("%v")
+            dist.add_sink(file_sink)
+            logger.info("while attached")
+            logger.flush()
+
+            dist.remove_sink(file_sink)
+            logger.info("after detach")
+            logger.flush()
+
+            with open(filepath, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert lines == ["while attached"]
+
+    @handle_permission_error
+    def test_dist_sink_logger_pattern(self):
+        """Test that a logger pattern is copied to the sinks attached to the dist sink"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "dist_pattern.log")
+
+            file_sink = spydlog.basic_file_sink_mt(filepath)
+            file_sink.set_pattern("[own] %v")
+            dist = spydlog.dist_sink_mt([file_sink])
+            logger = spydlog.logger("dist_pattern_logger", dist)
+            logger.set_pattern("[logger] %v")
+            logger.info("message")
+            logger.flush()
+
+            with open(filepath, 'r') as f:
+                assert f.read().splitlines() == ["[logger] message"]
+
+    @handle_permission_error
+    def test_dist_sink_swap_under_load(self):
+        """Test adding and removing sinks while other threads are logging"""
+        import threading
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "dist_load.log")
+
+            dist = spydlog.dist_sink_mt([spydlog.null_sink_st()])
+            logger = spydlog.logger("dist_load_logger", dist)
+            file_sink = spydlog.basic_file_sink_mt(filepath)
+            stop = threading.Event()
+
+            def worker():
+                while not stop.is_set():
+                    logger.info("message under load")
+
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for t in threads:
+                t.start()
+
+            for _ in range(200):
+                dist.add_sink(file_sink)
+                dist.remove_sink(file_sink)
+
+            stop.set()
+            for t in threads:
+                t.join()
+
+            assert len(dist.sinks()) == 1
+
+
+def shm_queue_name(suffix):
+    return f"spydlog_{os.getpid()}_{suffix}"
+
+
+def shm_queue_worker(name, index, count):
+    logger = spydlog.logger(f"worker{index}", spydlog.shm_queue_sink(name))
+
+    for i in range(count):
+        logger.info(f"message {i}")
+
+
+def shm_dead_collector(name):
+    collector = spydlog.collector(name, [], slot_count=4)  # noqa: F841, exits without removing it
+    os._exit(0)
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+
+class TestShmQueueSink:
+    """Test the shared memory queue sink and its collector"""
+
+    @handle_permission_error
+    def test_collector_writes_records(self):
+        """Test that records logged to the queue reach the collector sinks"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "collected.log")
+            file_sink = spydlog.basic_file_sink_mt(log_file)
+            file_sink.set_pattern("[%n] [%l] %v")
+
+            name = shm_queue_name("records")
+            collector = spydlog.collector(name, [file_sink])
+
+            logger = spydlog.logger("shm_logger", spydlog.shm_queue_sink(name))
+            logger.info("Hello")
+            logger.error(b"World")
+
+            assert collector.flush() >= 0
+            collector.stop()
+
+            with open(log_file, 'r') as f:
+                assert f.read().splitlines() == ["[shm_logger] [info] Hello", "[shm_logger] [error] World"]
+
+    @handle_permission_error
+    def test_records_spanning_slots(self):
+        """Test records larger than a slot, and truncation of records larger than the queue"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "large.log")
+            file_sink = spydlog.basic_file_sink_mt(log_file)
+            file_sink.set_pattern("%v")
+
+            name = shm_queue_name("large")
+            collector = spydlog.collector(name, [file_sink], slot_count=16, slot_size=128)
+
+            logger = spydlog.logger("shm_large_logger", spydlog.shm_queue_sink(name))
+            logger.info("x" * 1000)
+            logger.info("y" * 100000)
+            collector.stop()
+
+            with open(log_file, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert lines[0] == "x" * 1000
+            assert 0 < len(lines[1]) < 16 * 128
+            assert set(lines[1]) == {"y"}
+
+    def test_sink_level(self):
+        """Test that the collector honours the levels of its sinks"""
+        name = shm_queue_name("level")
+        null_sink = spydlog.null_sink_st()
+        collector = spydlog.collector(name, [null_sink])
+
+        queue_sink = spydlog.shm_queue_sink(name)
+        queue_sink.set_level(spydlog.level.warn)
+
+        logger = spydlog.logger("shm_level_logger", queue_sink)
+
+        spydlog.enable_sink_stats()
+        try:
+            logger.info("filtered")
+            logger.warn("kept")
+        finally:
+            spydlog.disable_sink_stats()
+
+        assert logger.stats()["sinks"] == [{"messages": 1, "bytes": 4}]
+        collector.stop()
+
+    def test_drop_when_full(self):
+        """Test that non blocking sinks drop and count records once the collector stopped"""
+        name = shm_queue_name("drop")
+        collector = spydlog.collector(name, [spydlog.null_sink_st()], slot_count=4)
+        collector.stop()
+
+        for block in (False, True):
+            queue_sink = spydlog.shm_queue_sink(name, block=block)
+            logger = spydlog.logger("shm_drop_logger", queue_sink)
+
+            for i in range(10):
+                logger.info("message")
+
+        assert collector.dropped() == 16
+        assert queue_sink.dropped() == 16
+        assert collector.queue_size() == 4
+
+    def test_invalid_arguments(self):
+        """Test queue creation and attach errors"""
+        name = shm_queue_name("invalid")
+
+        with pytest.raises(RuntimeError):
+            spydlog.shm_queue_sink(name)
+
+        with pytest.raises(RuntimeError):
+            spydlog.collector(name, [], slot_count=1000)
+
+        with pytest.raises(RuntimeError):
+            spydlog.collector(name, [], slot_size=100)
+
+        collector = spydlog.collector(name, [])
+
+        with pytest.raises(RuntimeError):
+            spydlog.collector(name, [])
+
+        assert collector.name() == name
+        assert collector.slot_count() == 8192
+        assert collector.slot_size() == 256
+        collector.stop()
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="Windows removes the segment with its last handle")
+    def test_dead_collector(self):
+        """Test that producers stop waiting for a dead collector, and that its segment is replaced"""
+        name = shm_queue_name("dead")
+        context = multiprocessing.get_context("spawn")
+        process = context.Process(target=shm_dead_collector, args=(name,))
+        process.start()
+        process.join()
+
+        queue_sink = spydlog.shm_queue_sink(name, block=True)
+        logger = spydlog.logger("shm_dead_logger", queue_sink)
+
+        for i in range(10):
+            logger.info("message")
+
+        assert queue_sink.dropped() == 6
+
+        collector = spydlog.collector(name, [spydlog.null_sink_st()])
+        assert collector.dropped() == 0
+        collector.stop()
+
+    @pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="needs the segments in /dev/shm")
+    def test_dead_producer(self):
+        """Test that the collector releases the slots claimed by a dead producer"""
+        import mmap
+        import struct
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "dead_producer.log")
+            file_sink = spydlog.basic_file_sink_mt(log_file)
+            file_sink.set_pattern("%v")
+
+            name = shm_queue_name("dead_producer")
+            collector = spydlog.collector(name, [file_sink], slot_count=4, slot_size=128)
+
+            # Claims the first two slots as a dead process that never publishes them
+            with open(f"/dev/shm/{name}", "r+b") as f, mmap.mmap(f.fileno(), 0) as segment:
+                struct.pack_into("<QqQ", segment, 256 + 8, 0, dead_pid(), 2)
+                struct.pack_into("<Q", segment, 64, 2)
+
+            logger = spydlog.logger("shm_dead_producer_logger", spydlog.shm_queue_sink(name))
+            logger.info("after the dead producer")
+            collector.stop()
+
+            assert collector.dropped() == 1
+
+            with open(log_file, 'r') as f:
+                assert f.read().splitlines() == ["after the dead producer"]
+
+    @handle_permission_error
+    def test_multiple_processes(self):
+        """Test several processes logging through the same queue"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "processes.log")
+            file_sink = spydlog.basic_file_sink_mt(log_file)
+            file_sink.set_pattern("%n %v")
+
+            name = shm_queue_name("processes")
+            collector = spydlog.collector(name, [file_sink], slot_count=64)
+
+            context = multiprocessing.get_context("spawn")
+            processes = [context.Process(target=shm_queue_worker, args=(name, i, 200)) for i in range(3)]
+
+            for process in processes:
+                process.start()
+
+            for process in processes:
+                process.join()
+                assert process.exitcode == 0
+
+            collector.stop()
+
+            with open(log_file, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert len(lines) == 600
+
+            for i in range(3):
+                worker_lines = [line for line in lines if line.startswith(f"worker{i} ")]
+                assert worker_lines == [f"worker{i} message {j}" for j in range(200)]
+
+
+class TestBinaryFileSink:
+    """Test binary file sinks and the binary log decoder"""
+
+    @handle_permission_error
+    def test_decode_records(self):
+        """Test that records are decoded with their logger, level, thread and raw payload"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "records.bin")
+            sink = spydlog.binary_file_sink_mt(filepath)
+            assert sink.filename() == filepath
+
+            alpha = spydlog.logger("alpha", sink)
+            beta = spydlog.logger("beta", sink)
+            alpha.info("first")
+            beta.warn("second")
+            alpha.error(b"\xff raw")
+            alpha.debug("filtered by the logger level")
+            sink.flush()
+
+            records = list(spydlog.decode(filepath))
+            assert [(r[1], r[2], r[4]) for r in records] == [
+                (spydlog.level.info, "alpha", b"first"),
+                (spydlog.level.warn, "beta", b"second"),
+                (spydlog.level.err, "alpha", b"\xff raw"),
+            ]
+
+            times = [r[0] for r in records]
+            assert times == sorted(times)
+            assert abs(times[0] / 1e9 - time.time()) < 60
+            assert len({r[3] for r in records}) == 1
+
+    @handle_permission_error
+    def test_decode_with_pattern(self):
+        """Test rendering records with a pattern and a minimum level"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "pattern.bin")
+            logger = spydlog.binary_logger_st("binary_pattern", filepath)
+            logger.info("info message")
+            logger.critical("critical message")
+            logger.flush()
+
+            lines = list(spydlog.decode(filepath, "[%n] [%l] %v", spydlog.pattern_time_type.utc))
+            assert lines == ["[binary_pattern] [info] info message",
+                             "[binary_pattern] [critical] critical message"]
+
+            lines = list(spydlog.decode(filepath, "%v", level=spydlog.level.warn))
+            assert lines == ["critical message"]
+
+            # The text pattern set on the logger does not change the binary records
+            logger.set_pattern("ignored %v")
+            logger.info("after set_pattern")
+            logger.flush()
+            assert list(spydlog.decode(filepath, "%v"))[-1] == "after set_pattern"
+
+    @handle_permission_error
+    def test_append_sessions(self):
+        """Test that a file appended to by several sinks keeps the logger names of each session"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "sessions.bin")
+
+            for name in ["first", "second"]:
+                sink = spydlog.binary_file_sink_st(filepath)
+                logger = spydlog.logger(name, sink)
+                logger.info(f"from {name}")
+                logger.flush()
+                del logger, sink
+
+            assert list(spydlog.decode(filepath, "%n %v")) == ["first from first", "second from second"]
+
+            sink = spydlog.binary_file_sink_st(filepath, truncate=True)
+            del sink
+            assert list(spydlog.decode(filepath)) == []
+
+    @handle_permission_error
+    def test_truncated_and_invalid_files(self):
+        """Test that a record cut short ends the iteration and that other files are rejected"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "truncated.bin")
+            logger = spydlog.binary_logger_mt("binary_truncated", filepath)
+            logger.info("complete")
+            logger.info("cut short")
+            logger.flush()
+            spydlog.drop("binary_truncated")
+            del logger
+
+            with open(filepath, "r+b") as f:
+                f.truncate(os.path.getsize(filepath) - 3)
+
+            assert list(spydlog.decode(filepath, "%v")) == ["complete"]
+
+            textpath = os.path.join(tmpdir, "text.log")
+            with open(textpath, "w") as f:
+                f.write("[2025-01-01 00:00:00.000] [text] [info] not a binary log\n")
+
+            with pytest.raises(RuntimeError):
+                spydlog.decode(textpath)
+
+            with pytest.raises(RuntimeError):
+                spydlog.decode(os.path.join(tmpdir, "missing.bin"))
+
+    @handle_permission_error
+    def test_async_logger(self):
+        """Test an async logger writing binary records"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "async.bin")
+            logger = spydlog.async_logger("binary_async", spydlog.binary_file_sink_mt(filepath))
+
+            for i in range(1000):
+                logger.info(f"message {i}")
+
+            spydlog.shutdown()
+            del logger
+
+            assert list(spydlog.decode(filepath, "%v")) == [f"message {i}" for i in range(1000)]
+
+    @handle_permission_error
+    def test_decode_cli(self):
+        """Test python -m spydlog.decode"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "cli.bin")
+            logger = spydlog.binary_logger_st("binary_cli", filepath)
+            logger.info("info message")
+            logger.error("error message")
+            logger.flush()
+
+            result = subprocess.run([sys.executable, "-m", "spydlog.decode", filepath,
+                                     "--pattern", "%n %l %v", "--level", "warn"],
+                                    capture_output=True, text=True)
+            assert result.returncode == 0
+            assert result.stdout.splitlines() == ["binary_cli error error message"]
+
+            result = subprocess.run([sys.executable, "-m", "spydlog.decode", os.path.join(tmpdir, "missing.bin")],
+                                    capture_output=True, text=True)
+            assert result.returncode == 1
+            assert "error" in result.stderr
+
+
+class TestRawFileSink:
+    """Test raw file sink"""
+
+    @handle_permission_error
+    def test_raw_file_sink(self):
+        """Test that payloads are written as is until another pattern is set"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "raw.log")
+            sink = spydlog.raw_file_sink_mt(filepath)
+            logger = spydlog.logger("raw_logger", sink)
+
+            assert sink.filename() == filepath
+
+            logger.info("Payload")
+            logger.info(b"\x00\x01")
+            sink.set_pattern("[%l] %v")
+            logger.warn("Formatted")
+            logger.set_pattern("%v")
+            logger.error("Raw again")
+            logger.flush()
+
+            with open(filepath, "rb") as f:
+                assert f.read().splitlines() == [b"Payload", b"\x00\x01", b"[warning] Formatted", b"Raw again"]
+
+            sink = spydlog.raw_file_sink_st(filepath, truncate=True)
+            logger = spydlog.async_logger("raw_async", sink)
+            logger.info("Truncated")
+            assert logger.flush(timeout=5.0)
+
+            with open(filepath, "rb") as f:
+                assert f.read().splitlines() == [b"Truncated"]
+
+
 class TestSinkConfiguration:
     """Test sink configuration methods"""
 
@@ -188,3 +684,29 @@ class TestSinkConfiguration:
         # Should not crash
         sink.log(spydlog.level.info, "Direct sink logging test")
         sink.log(spydlog.level.warn, "Warning message")
+
+    @handle_permission_error
+    def test_sink_log_bytes_like(self):
+        """Test logging bytes-like payloads directly to a sink"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "sink_bytes.log")
+            sink = spydlog.basic_file_sink_st(filepath)
+            sink.set_pattern("%v")
+
+            sink.log(spydlog.level.info, "str payload")
+            sink.log(spydlog.level.info, b"bytes payload")
+            sink.log(spydlog.level.info, bytearray(b"bytearray payload"))
+            sink.log(spydlog.level.info, memoryview(b"memoryview payload"))
+            sink.flush()
+
+            with open(filepath, 'r') as f:
+                lines = f.read().splitlines()
+
+            assert lines == ["str payload", "bytes payload", "bytearray payload", "memoryview payload"]
+
+    def test_sink_log_invalid_payload(self):
+        """Test that sink.log rejects non bytes-like payloads"""
+        sink = spydlog.null_sink_st()
+
+        with pytest.raises(TypeError):
+            sink.log(spydlog.level.info, 42)